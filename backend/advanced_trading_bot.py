@@ -16,6 +16,9 @@ from dotenv import load_dotenv
 import requests
 import json
 
+from bar_feed import BarDispatcher, create_bar_feed
+from market_calendar import TradingScheduler
+
 # Simple RL implementation without heavy dependencies
 class SimpleTradingAgent:
     """
@@ -201,6 +204,7 @@ class AdvancedTradingSystem:
         self.agents = {}
         self.running = False
         self.api_headers = self._get_api_headers()
+        self.scheduler = TradingScheduler(interval=int(os.getenv('POLLING_INTERVAL', 15)))
         
         # Initialize agents
         for symbol in symbols:
@@ -239,77 +243,126 @@ class AdvancedTradingSystem:
         cycle_results = {}
         
         for symbol in self.symbols:
-            try:
-                agent = self.agents[symbol]
-                
-                # Get market data
-                current_price, current_volume = self.get_market_data(symbol)
-                if current_price is None:
-                    continue
-                
-                # Update price history
-                agent.price_history.append(current_price)
-                agent.volume_history.append(current_volume)
-                
-                # Keep only recent history
-                if len(agent.price_history) > 50:
-                    agent.price_history = agent.price_history[-50:]
-                    agent.volume_history = agent.volume_history[-50:]
-                
-                # Get current state
-                current_state = agent.get_state(current_price, current_volume)
-                
-                # Choose and execute action
-                action = agent.choose_action(current_state)
-                reward, action_taken = agent.execute_action(action, current_price, self.api_headers)
-                
-                # Get next state (same as current for now)
-                next_state = current_state
-                
-                # Update Q-table
-                agent.update_q_table(current_state, action, reward, next_state)
-                
-                # Store results
-                cycle_results[symbol] = {
-                    'price': current_price,
-                    'action': action_taken,
-                    'reward': reward,
-                    'state': current_state,
-                    'performance': agent.get_performance_metrics()
-                }
-                
-            except Exception as e:
-                logger.error(f"Error in trading cycle for {symbol}: {e}")
-                cycle_results[symbol] = {'error': str(e)}
+            # Get market data
+            current_price, current_volume = self.get_market_data(symbol)
+            if current_price is None:
+                continue
+            
+            cycle_results[symbol] = self.run_agent(symbol, current_price, current_volume)
         
         return cycle_results
     
-    def start_autonomous_trading(self):
-        """Start autonomous trading loop"""
+    def run_agent(self, symbol, current_price, current_volume):
+        """Let one symbol's agent observe a price and act on it"""
+        try:
+            agent = self.agents[symbol]
+            
+            # Update price history
+            agent.price_history.append(current_price)
+            agent.volume_history.append(current_volume)
+            
+            # Keep only recent history
+            if len(agent.price_history) > 50:
+                agent.price_history = agent.price_history[-50:]
+                agent.volume_history = agent.volume_history[-50:]
+            
+            # Get current state
+            current_state = agent.get_state(current_price, current_volume)
+            
+            # Choose and execute action
+            action = agent.choose_action(current_state)
+            reward, action_taken = agent.execute_action(action, current_price, self.api_headers)
+            
+            # Get next state (same as current for now)
+            next_state = current_state
+            
+            # Update Q-table
+            agent.update_q_table(current_state, action, reward, next_state)
+            
+            # Store results
+            return {
+                'price': current_price,
+                'action': action_taken,
+                'reward': reward,
+                'state': current_state,
+                'performance': agent.get_performance_metrics()
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in trading cycle for {symbol}: {e}")
+            return {'error': str(e)}
+    
+    def _log_results(self, results):
+        for symbol, result in results.items():
+            if 'error' not in result:
+                perf = result['performance']
+                logger.info(f"{symbol}: {result['action']} @ ${result['price']:.2f} | "
+                          f"Balance: ${perf['balance']:.2f} | "
+                          f"Return: {perf['total_return']:.2%} | "
+                          f"Trades: {perf['total_trades']}")
+    
+    def _on_bars(self, bars):
+        """Run each agent on the closed bars of its symbol within market sessions, oldest first"""
+        for bar in bars:
+            if not self.running:
+                break
+            symbol = bar.get('symbol')
+            if symbol in self.agents and self.scheduler.calendar.is_open(bar.get('timestamp')):
+                self._log_results({symbol: self.run_agent(symbol, float(bar['Close']), float(bar['Volume']))})
+    
+    def start_autonomous_trading(self, bar_feed=None):
+        """
+        Start autonomous trading
+        Agents act on every closed bar from a bar feed (``BAR_FEED=alpaca`` or
+        ``replay``); without one (``BAR_FEED=poll``, the default), or once the
+        feed fails, every agent acts on simulated prices at the scheduler's
+        cadence while the market is open.
+        """
         self.running = True
         logger.info("🤖 Starting autonomous trading...")
         
+        feed = bar_feed if bar_feed is not None else create_bar_feed()
+        if feed is not None:
+            self.bar_dispatcher = BarDispatcher(feed, self._on_bars, name='advanced-bars',
+                                                on_failure=self._on_feed_failure)
+            try:
+                self.bar_dispatcher.start(self.symbols)
+                return
+            except Exception as e:
+                # e.g. alpaca-py missing (this bot does not otherwise use it) or no API keys
+                logger.warning(f"Bar feed unavailable ({e}), falling back to polling")
+                self.bar_dispatcher = None
+        
+        self._start_polling()
+    
+    def _on_feed_failure(self, error):
+        """Continue on simulated prices once the bar feed has died"""
+        dispatcher, self.bar_dispatcher = getattr(self, 'bar_dispatcher', None), None
+        if dispatcher is not None:
+            dispatcher.stop()
+        if self.running:
+            logger.warning(f"Bar feed failed ({error}), falling back to polling")
+            self._start_polling()
+    
+    def _start_polling(self):
+        """Run trading cycles at the scheduler's cadence, on a thread of its own"""
         def trading_loop():
             cycle_count = 0
             while self.running:
                 try:
+                    if not self.scheduler.calendar.is_open():
+                        logger.info(f"💤 Market closed, sleeping until {self.scheduler.calendar.next_open():%Y-%m-%d %H:%M %Z}")
+                        self.scheduler.sleep()
+                        continue
+                    
                     cycle_count += 1
                     logger.info(f"📊 Trading Cycle #{cycle_count}")
                     
                     # Run trading cycle
-                    results = self.run_trading_cycle()
-                    
-                    # Log results
-                    for symbol, result in results.items():
-                        if 'error' not in result:
-                            perf = result['performance']
-                            logger.info(f"{symbol}: {result['action']} @ ${result['price']:.2f} | "
-                                      f"Balance: ${perf['balance']:.2f} | "
-                                      f"Return: {perf['total_return']:.2%} | "
-                                      f"Trades: {perf['total_trades']}")
+                    self._log_results(self.run_trading_cycle())
                     
-                    # Wait before next cycle
-                    time.sleep(int(os.getenv('POLLING_INTERVAL', 15)))
+                    # Wait before next cycle: POLLING_INTERVAL, shorter around the open and close
+                    self.scheduler.sleep()
                     
                 except Exception as e:
                     logger.error(f"Error in trading loop: {e}")
@@ -323,6 +376,10 @@ class AdvancedTradingSystem:
     def stop_trading(self):
         """Stop autonomous trading"""
         self.running = False
+        self.scheduler.wake()
+        if getattr(self, 'bar_dispatcher', None) is not None:
+            self.bar_dispatcher.stop()
+            self.bar_dispatcher = None
         logger.info("🛑 Autonomous trading stopped")
     
     def get_system_status(self):
@@ -1,6 +1,6 @@
 """
 Advanced AI Training System
-Allows importing 3-6 months of historical data, stock search, and simulation training
+Imports up to IMPORT_MAX_MONTHS (default 36) of historical data in checkpointed monthly chunks, stock search, and simulation training
 """
 
 import os
@@ -8,20 +8,38 @@ import logging
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional
 import requests
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 from alpaca.trading.client import TradingClient
+from alpaca.trading.requests import GetAssetsRequest
+from alpaca.trading.enums import AssetClass, AssetStatus
 from stable_baselines3 import PPO, A2C, SAC
 from stable_baselines3.common.vec_env import DummyVecEnv
 from stable_baselines3.common.callbacks import EvalCallback, CheckpointCallback
 import gymnasium as gym
 from dotenv import load_dotenv
 import json
-import threading
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from quote_cache import get_quote_cache
+from metrics import span
+from training_jobs import TrainingProgressCallback, get_training_queue
+from asset_universe import AssetUniverse
+from ttl_cache import TTLCache
+from simulation_store import SimulationStore
+from backtest import BacktestEngine
+from simulation_sweep import (MAX_SWEEP_TASKS, RANK_METRICS, build_tasks, dataset_feature_key, load_market_data,
+                              rank_results, run_sweep)
+from monte_carlo import block_bootstrap
+from indicators import get_indicator_engine
+from walk_forward import HYPERPARAMETERS, MODEL_TYPES, FoldCache, aggregate_folds, plan_folds, run_walk_forward
+from columnar_store import dataset_name, list_datasets, load_frame, migrate_csv_datasets, read_manifest
+from feature_store import get_feature_registry
+from historical_import import DEFAULT_TIMEFRAME, ChunkedImport
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -31,8 +49,9 @@ class AdvancedTrainingSystem:
     Advanced AI training system with historical data import and simulation capabilities
     """
     
-    def __init__(self, mode='paper'):
+    def __init__(self, mode='paper', event_hub=None):
         self.mode = mode
+        self.event_hub = event_hub
         self.trading_client = TradingClient(
             api_key=os.getenv(f'ALPACA_{mode.upper()}_KEY'),
             secret_key=os.getenv(f'ALPACA_{mode.upper()}_SECRET'),
@@ -46,7 +65,7 @@ class AdvancedTrainingSystem:
         # Training configuration
         self.training_config = {
             'default_months': 3,
-            'max_months': 6,
+            'max_months': int(os.getenv('IMPORT_MAX_MONTHS', 36)),
             'min_data_points': 1000,
             'validation_split': 0.2,
             'simulation_days': 30
@@ -56,64 +75,112 @@ class AdvancedTrainingSystem:
         self.models_dir = 'advanced_models'
         os.makedirs(self.models_dir, exist_ok=True)
         
-        # Training state
-        self.training_jobs = {}
-        self.simulation_results = {}
+        # Imported datasets are columnar; CSVs from earlier imports are converted once
+        migrate_csv_datasets(self.models_dir)
+        
+        # Chunk checkpoints of imports that are running or were interrupted
+        self.import_dir = os.path.join(self.models_dir, 'import_checkpoints')
+        self.active_imports = {}
+        self.import_lock = threading.Lock()
+        
+        # Training state: jobs run on the shared, concurrency-limited training queue
+        self.training_queue = get_training_queue()
+        self.training_queue.add_listener(self._publish_job_update)
+        self.simulation_results = SimulationStore(os.path.join(self.models_dir, 'simulations'))
+        self.simulation_chart_points = int(os.getenv('SIMULATION_CHART_POINTS', 500))
+        self.simulation_bootstrap_resamples = int(os.getenv('SIMULATION_BOOTSTRAP_RESAMPLES', 10000))
+        self.fold_cache = FoldCache(os.path.join(self.models_dir, 'walk_forward_cache'))
+        
+        # Searchable asset list, cached on disk and refreshed in the background
+        self.asset_universe = AssetUniverse(
+            self._fetch_assets,
+            cache_path=os.path.join(self.models_dir, f'asset_universe_{mode}.json')
+        )
+        
+        # Stock info lookups run concurrently; each part is cached for as long as it stays meaningful
+        self.asset_cache = TTLCache(float(os.getenv('STOCK_ASSET_TTL', 6 * 3600)), name='asset')
+        self.price_cache = TTLCache(float(os.getenv('STOCK_PRICE_TTL', 5)), name='price')
+        self.performance_cache = TTLCache(float(os.getenv('STOCK_PERFORMANCE_TTL', 300)), name='performance')
+        self.info_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('STOCK_INFO_WORKERS', 8)),
+            thread_name_prefix='stock-info'
+        )
         
         logger.info("✅ Advanced Training System initialized")
     
     def search_stocks(self, query: str, limit: int = 20) -> List[Dict]:
         """
         Search for stocks by symbol or company name
+        Answered from the cached asset index; exact and prefix symbol matches rank first
         """
         try:
-            # Get all active stocks from Alpaca
-            assets = self.trading_client.get_all_assets()
-            
-            # Filter by query (case insensitive)
-            query_lower = query.lower()
-            matching_stocks = []
-            
-            for asset in assets:
-                if (query_lower in asset.symbol.lower() or 
-                    query_lower in asset.name.lower()):
-                    matching_stocks.append({
-                        'symbol': asset.symbol,
-                        'name': asset.name,
-                        'exchange': asset.exchange,
-                        'status': asset.status,
-                        'tradable': asset.tradable
-                    })
-                    
-                    if len(matching_stocks) >= limit:
-                        break
-            
-            return matching_stocks
-            
+            return self.asset_universe.search(query, limit)
         except Exception as e:
             logger.error(f"Error searching stocks: {e}")
             return []
     
+    def _fetch_assets(self) -> List[Dict]:
+        """
+        Get all active US equities from Alpaca for the asset index
+        """
+        with span('alpaca.get_all_assets'):
+            assets = self.trading_client.get_all_assets(
+                GetAssetsRequest(status=AssetStatus.ACTIVE, asset_class=AssetClass.US_EQUITY)
+            )
+        
+        return [{
+            'symbol': asset.symbol,
+            'name': asset.name or '',
+            'exchange': getattr(asset.exchange, 'value', asset.exchange),
+            'status': getattr(asset.status, 'value', asset.status),
+            'tradable': asset.tradable
+        } for asset in assets]
+    
     def get_stock_info(self, symbol: str) -> Dict:
         """
         Get detailed information about a specific stock
+        Asset details, price and recent performance are looked up concurrently
+        """
+        return self.get_stocks_info([symbol]).get(symbol.strip().upper(), {})
+    
+    def get_stocks_info(self, symbols: List[str]) -> Dict[str, Dict]:
         """
+        Get stock information for several symbols at once (e.g. a dashboard grid)
+        Uncached prices are fetched in one batched quote request, the remaining
+        lookups for every symbol run concurrently.
+        """
+        symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+        if not symbols:
+            return {}
+        
+        if len(symbols) > 1:
+            try:
+                for symbol, price in get_quote_cache(self.mode).get_prices(symbols).items():
+                    if price:
+                        self.price_cache.put(symbol, price)
+            except Exception as e:
+                logger.warning(f"Batch quote lookup failed: {e}")
+        
+        lookups = {}
+        for symbol in symbols:
+            lookups[symbol] = (
+                self.info_executor.submit(self._get_cached_asset, symbol),
+                self.info_executor.submit(self._get_cached_price, symbol),
+                self.info_executor.submit(self._get_cached_performance, symbol)
+            )
+        
+        return {symbol: self._build_stock_info(symbol, *futures) for symbol, futures in lookups.items()}
+    
+    def _build_stock_info(self, symbol: str, asset_future, price_future, performance_future) -> Dict:
+        """Combine the results of one symbol's concurrent lookups"""
+        current_price = price_future.result()
+        performance = performance_future.result()
+        
         try:
-            # Get asset details
-            asset = self.trading_client.get_asset(symbol)
-            
-            # Get current price
-            current_price = self._get_current_price(symbol)
-            
-            # Get recent performance
-            performance = self._get_recent_performance(symbol)
-            
+            asset = asset_future.result()
             return {
                 'symbol': symbol,
-                'name': asset.name,
-                'exchange': asset.exchange.value if hasattr(asset.exchange, 'value') else str(asset.exchange),
-                'status': asset.status.value if hasattr(asset.status, 'value') else str(asset.status),
-                'tradable': asset.tradable,
+                **asset,
                 'current_price': current_price,
                 'performance': performance
             }
@@ -127,55 +194,93 @@ class AdvancedTrainingSystem:
                 'exchange': 'NASDAQ',
                 'status': 'active', 
                 'tradable': True,
-                'current_price': None,
-                'performance': None,
+                'current_price': current_price,
+                'performance': performance,
                 'error': str(e)
             }
     
-    def import_historical_data(self, symbol: str, months: int = 3) -> Dict:
+    def _get_cached_asset(self, symbol: str) -> Dict:
+        """Asset details, cached for hours; failures are not cached"""
+        def load():
+            with span('alpaca.get_asset'):
+                asset = self.trading_client.get_asset(symbol)
+            return {
+                'name': asset.name,
+                'exchange': asset.exchange.value if hasattr(asset.exchange, 'value') else str(asset.exchange),
+                'status': asset.status.value if hasattr(asset.status, 'value') else str(asset.status),
+                'tradable': asset.tradable
+            }
+        return self.asset_cache.get_or_load(symbol, load)
+    
+    def _get_cached_price(self, symbol: str) -> Optional[float]:
+        """Current price, cached for seconds"""
+        return self.price_cache.get_or_load(symbol, lambda: self._get_current_price(symbol))
+    
+    def _get_cached_performance(self, symbol: str) -> Dict:
+        """Recent performance, cached for minutes"""
+        return self.performance_cache.get_or_load(symbol, lambda: self._get_recent_performance(symbol))
+    
+    def get_stock_info_stats(self) -> Dict:
+        """Hit/miss counters of the stock info caches"""
+        return {cache.name: cache.get_stats() for cache in (self.asset_cache, self.price_cache, self.performance_cache)}
+    
+    # Bar sizes an import may request
+    IMPORT_TIMEFRAMES = {
+        '1Min': TimeFrame(1, TimeFrameUnit.Minute),
+        '5Min': TimeFrame(5, TimeFrameUnit.Minute),
+        '15Min': TimeFrame(15, TimeFrameUnit.Minute),
+        '1Hour': TimeFrame(1, TimeFrameUnit.Hour),
+        '1Day': TimeFrame(1, TimeFrameUnit.Day)
+    }
+    
+    def import_historical_data(self, symbol: str, months: int = 3, timeframe: str = DEFAULT_TIMEFRAME,
+                               resume: bool = True) -> Dict:
         """
-        Import historical data for training (3-6 months)
+        Import historical data for training
+        The range is fetched in monthly chunks on a few threads under the shared
+        Alpaca rate limit. Each chunk is checkpointed as it arrives, so an import
+        that fails part-way resumes from its finished chunks on the next call.
         """
         try:
-            if months < 1 or months > 6:
-                return {'error': 'Months must be between 1 and 6'}
+            max_months = self.training_config['max_months']
+            if months < 1 or months > max_months:
+                return {'error': f'Months must be between 1 and {max_months}'}
+            if timeframe not in self.IMPORT_TIMEFRAMES:
+                return {'error': f'timeframe must be one of {", ".join(self.IMPORT_TIMEFRAMES)}'}
             
             # Calculate date range - use older data for free tier compatibility
             # Free tier has 15-minute delay, so we go back further
             end_date = datetime.now() - timedelta(days=7)  # Go back at least a week
             start_date = end_date - timedelta(days=months * 30)
             
-            logger.info(f"📊 Importing {months} months of data for {symbol}")
-            
-            # Fetch historical data with 5-minute intervals
-            request = StockBarsRequest(
-                symbol_or_symbols=symbol,
-                timeframe=TimeFrame(5, TimeFrameUnit.Minute),
-                start=start_date,
-                end=end_date
-            )
-            
-            bars = self.data_client.get_stock_bars(request)
-            
-            if not bars or not hasattr(bars, 'df') or len(bars.df) == 0:
-                return {'error': f'No data available for {symbol}'}
-            
-            # Convert to DataFrame
-            df = bars.df.reset_index()
-            df.rename(columns={
-                'open': 'Open',
-                'high': 'High',
-                'low': 'Low',
-                'close': 'Close',
-                'volume': 'Volume'
-            }, inplace=True)
-            
-            # Add technical indicators
-            df = self._add_technical_indicators(df)
-            
-            # Save data
-            data_file = f"{self.models_dir}/{symbol}_data_{months}m.csv"
-            df.to_csv(data_file, index=False)
+            name = dataset_name(symbol, months, timeframe if timeframe != DEFAULT_TIMEFRAME else None)
+            data_file = f"{self.models_dir}/{name}"
+            
+            with self.import_lock:
+                running = self.active_imports.get(name)
+                if running:
+                    return {'error': f'An import of {name} is already running', 'progress': running.progress()}
+                chunked = ChunkedImport(
+                    os.path.join(self.import_dir, name),
+                    lambda start, end: self._fetch_bars(symbol, timeframe, start, end),
+                    start_date, end_date, resume=resume
+                )
+                self.active_imports[name] = chunked
+            
+            try:
+                logger.info(f"📊 Importing {months} months of {timeframe} data for {symbol} "
+                            f"({chunked.chunks_done}/{len(chunked.state['chunks'])} chunks checkpointed)")
+                chunks = chunked.fetch_all()
+                manifest = chunked.assemble(data_file, get_indicator_engine(), timeframe=timeframe)
+                chunked.discard()
+                if manifest is None:
+                    return {'error': f'No data available for {symbol}'}
+            finally:
+                with self.import_lock:
+                    self.active_imports.pop(name, None)
+            
+            # Summaries read only the price and volume columns of the stored dataset
+            df = load_frame(data_file, ('timestamp', 'Open', 'High', 'Low', 'Close', 'Volume'))
             
             # Calculate statistics
             stats = self._calculate_data_statistics(df)
@@ -208,6 +313,8 @@ class AdvancedTrainingSystem:
                 },
                 'statistics': stats,
                 'data_file': data_file,
+                'timeframe': timeframe,
+                'chunks': dict(chunks, resumed=chunked.resumed),
                 'sample_data': sample_data,
                 'price_summary': {
                     'min_price': float(df['Low'].min()),
@@ -232,63 +339,98 @@ class AdvancedTrainingSystem:
             
             return {'error': error_msg}
     
+    def _fetch_bars(self, symbol: str, timeframe: str, start: datetime, end: datetime) -> Optional[pd.DataFrame]:
+        """One chunk of bars from Alpaca, with the column names the training data uses"""
+        request = StockBarsRequest(
+            symbol_or_symbols=symbol,
+            timeframe=self.IMPORT_TIMEFRAMES[timeframe],
+            start=start,
+            end=end
+        )
+        
+        with span('alpaca.get_stock_bars'):
+            bars = self.data_client.get_stock_bars(request)
+        
+        if not bars or not hasattr(bars, 'df') or len(bars.df) == 0:
+            return None
+        
+        return bars.df.reset_index().rename(columns={
+            'open': 'Open',
+            'high': 'High',
+            'low': 'Low',
+            'close': 'Close',
+            'volume': 'Volume'
+        })
+    
+    # Model classes and learning rates supported by train_advanced_model
+    MODEL_TYPES = {
+        'PPO': (PPO, 0.0003),
+        'A2C': (A2C, 0.0007),
+        'SAC': (SAC, 0.0003)
+    }
+    
     def train_advanced_model(self, symbol: str, model_type: str = 'PPO', 
-                           training_steps: int = 50000) -> Dict:
+                           training_steps: int = 50000, priority: int = 0) -> Dict:
         """
-        Train an advanced AI model on historical data
+        Queue training of an advanced AI model on historical data
+        Jobs run on the shared training queue; poll get_training_status for progress.
         """
         try:
             # Check if data exists
-            data_files = [f for f in os.listdir(self.models_dir) 
-                         if f.startswith(f"{symbol}_data_") and f.endswith('.csv')]
+            data_files = list_datasets(self.models_dir, symbol)
             
             if not data_files:
                 return {'error': f'No historical data found for {symbol}. Import data first.'}
             
-            # Use the most recent data file
-            data_file = sorted(data_files)[-1]
-            data_path = f"{self.models_dir}/{data_file}"
-            
-            logger.info(f"🤖 Training {model_type} model for {symbol}")
-            
-            # Load and prepare data
-            df = pd.read_csv(data_path)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df.set_index('timestamp', inplace=True)
-            
-            # Create training environment
-            env = self._create_training_environment(df, symbol)
-            
-            # Select model type
-            if model_type == 'PPO':
-                model = PPO(
-                    "MlpPolicy",
-                    env,
-                    verbose=1,
-                    learning_rate=0.0003,
-                    tensorboard_log=f"{self.models_dir}/tensorboard/{symbol}/"
-                )
-            elif model_type == 'A2C':
-                model = A2C(
-                    "MlpPolicy",
-                    env,
-                    verbose=1,
-                    learning_rate=0.0007,
-                    tensorboard_log=f"{self.models_dir}/tensorboard/{symbol}/"
-                )
-            elif model_type == 'SAC':
-                model = SAC(
-                    "MlpPolicy",
-                    env,
-                    verbose=1,
-                    learning_rate=0.0003,
-                    tensorboard_log=f"{self.models_dir}/tensorboard/{symbol}/"
-                )
-            else:
+            if model_type not in self.MODEL_TYPES:
                 return {'error': f'Unknown model type: {model_type}'}
             
+            # Use the most recent data file
+            data_path = data_files[-1]
+            
+            training_id = f"{symbol}_{model_type}_{int(time.time())}"
+            job = self.training_queue.submit(
+                training_id,
+                lambda job: self._run_training_job(job, symbol, model_type, training_steps, data_path),
+                total_steps=training_steps,
+                priority=priority,
+                kind='advanced',
+                symbol=symbol,
+                model_type=model_type
+            )
+            
+            return {
+                'success': True,
+                'training_id': training_id,
+                'symbol': symbol,
+                'model_type': model_type,
+                'training_steps': training_steps,
+                'status': job.status
+            }
+            
+        except Exception as e:
+            logger.error(f"Error training model for {symbol}: {e}")
+            return {'error': str(e)}
+    
+    def _run_training_job(self, job, symbol: str, model_type: str, training_steps: int, data_path: str) -> Dict:
+        """Train a model inside a training queue job, reporting progress to the job"""
+        logger.info(f"🤖 Training {model_type} model for {symbol}")
+        
+        # Both environments view the dataset's shared feature set until closed
+        env = self._create_training_environment(symbol, data_path)
+        eval_env = None
+        try:
+            model_class, learning_rate = self.MODEL_TYPES[model_type]
+            model = model_class(
+                "MlpPolicy",
+                env,
+                verbose=1,
+                learning_rate=learning_rate,
+                tensorboard_log=f"{self.models_dir}/tensorboard/{symbol}/"
+            )
+            
             # Setup callbacks
-            eval_env = self._create_training_environment(df, symbol)
+            eval_env = self._create_training_environment(symbol, data_path)
             eval_callback = EvalCallback(
                 eval_env,
                 best_model_save_path=f"{self.models_dir}/{symbol}_best/",
@@ -304,57 +446,23 @@ class AdvancedTrainingSystem:
                 name_prefix=f"{symbol}_{model_type}"
             )
             
-            # Start training
-            training_id = f"{symbol}_{model_type}_{int(time.time())}"
-            self.training_jobs[training_id] = {
-                'status': 'training',
-                'progress': 0,
-                'start_time': datetime.now(),
-                'symbol': symbol,
-                'model_type': model_type
-            }
-            
-            # Train in separate thread
-            def train_thread():
-                try:
-                    model.learn(
-                        total_timesteps=training_steps,
-                        callback=[eval_callback, checkpoint_callback],
-                        progress_bar=True
-                    )
-                    
-                    # Save final model
-                    model_path = f"{self.models_dir}/{symbol}_{model_type}_final.zip"
-                    model.save(model_path)
-                    
-                    # Update training status
-                    self.training_jobs[training_id]['status'] = 'completed'
-                    self.training_jobs[training_id]['progress'] = 100
-                    self.training_jobs[training_id]['model_path'] = model_path
-                    
-                    logger.info(f"✅ Training completed for {symbol} ({model_type})")
-                    
-                except Exception as e:
-                    logger.error(f"Training error for {symbol}: {e}")
-                    self.training_jobs[training_id]['status'] = 'failed'
-                    self.training_jobs[training_id]['error'] = str(e)
-            
-            thread = threading.Thread(target=train_thread)
-            thread.daemon = True
-            thread.start()
-            
-            return {
-                'success': True,
-                'training_id': training_id,
-                'symbol': symbol,
-                'model_type': model_type,
-                'training_steps': training_steps,
-                'status': 'started'
-            }
-            
-        except Exception as e:
-            logger.error(f"Error training model for {symbol}: {e}")
-            return {'error': str(e)}
+            # The progress callback stops learn() early when the job is cancelled
+            model.learn(
+                total_timesteps=training_steps,
+                callback=[eval_callback, checkpoint_callback, TrainingProgressCallback(job)]
+            )
+            job.check_cancelled()
+            
+            # Save final model
+            model_path = f"{self.models_dir}/{symbol}_{model_type}_final.zip"
+            model.save(model_path)
+        finally:
+            env.close()
+            if eval_env is not None:
+                eval_env.close()
+        
+        logger.info(f"✅ Training completed for {symbol} ({model_type})")
+        return {'model_path': model_path}
     
     def run_simulation(self, symbol: str, days: int = 30, 
                       model_path: str = None) -> Dict:
@@ -399,7 +507,8 @@ class AdvancedTrainingSystem:
                 end=end_date
             )
             
-            bars = self.data_client.get_stock_bars(request)
+            with span('alpaca.get_stock_bars'):
+                bars = self.data_client.get_stock_bars(request)
             
             if not bars or not hasattr(bars, 'df') or len(bars.df) == 0:
                 return {'error': f'No recent data available for {symbol}'}
@@ -419,38 +528,267 @@ class AdvancedTrainingSystem:
             # Run simulation
             simulation_results = self._run_model_simulation(model, df, symbol)
             
-            # Save simulation results
+            if not simulation_results.get('success'):
+                return {'error': simulation_results.get('error', 'Simulation failed')}
+            
+            # Confidence intervals for the single simulated path
+            if self.simulation_bootstrap_resamples:
+                try:
+                    simulation_results['bootstrap'] = block_bootstrap(
+                        simulation_results['chart_data']['portfolio_value'],
+                        [trade['reward'] for trade in simulation_results['trades']],
+                        resamples=self.simulation_bootstrap_resamples
+                    )
+                except ValueError as e:
+                    logger.warning(f"Skipping bootstrap for {symbol}: {e}")
+            
+            # Save simulation results; the response carries a downsampled chart
             simulation_id = f"{symbol}_sim_{int(time.time())}"
-            self.simulation_results[simulation_id] = simulation_results
+            self.simulation_results.put(simulation_id, simulation_results)
             
             return {
                 'success': True,
                 'simulation_id': simulation_id,
                 'symbol': symbol,
                 'days': days,
-                'results': simulation_results
+                'results': self.simulation_results.query(simulation_id, points=self.simulation_chart_points)
             }
             
         except Exception as e:
             logger.error(f"Error running simulation for {symbol}: {e}")
             return {'error': str(e)}
     
+    def run_simulation_sweep(self, symbols: List[str] = None, model_paths: List[str] = None,
+                             windows: List[Dict] = None, rank_by: str = 'sharpe_ratio',
+                             priority: int = 0) -> Dict:
+        """
+        Queue a sweep backtesting every model against every symbol and date window
+        Defaults to all imported datasets and all saved models. The sweep runs as a
+        job on the training queue; its status carries progress and, when done, the
+        ranked comparison table.
+        """
+        try:
+            if rank_by not in RANK_METRICS:
+                return {'error': f'rank_by must be one of {", ".join(RANK_METRICS)}'}
+            
+            datasets = self._latest_datasets()
+            symbols = [s.upper() for s in symbols] if symbols else sorted(datasets)
+            missing = [s for s in symbols if s not in datasets]
+            if missing:
+                return {'error': f'No historical data found for {", ".join(missing)}. Import data first.'}
+            
+            available = {model['path'] for model in self.get_available_models()}
+            model_paths = model_paths or sorted(available)
+            unknown = [path for path in model_paths if path not in available]
+            if unknown:
+                return {'error': f'Unknown model paths: {", ".join(unknown)}'}
+            if not symbols or not model_paths:
+                return {'error': 'A sweep needs at least one imported dataset and one saved model'}
+            
+            tasks = build_tasks(symbols, model_paths, windows or [])
+            if len(tasks) > MAX_SWEEP_TASKS:
+                return {'error': f'Sweep has {len(tasks)} simulations; the limit is {MAX_SWEEP_TASKS}'}
+            
+            sweep_id = f"sweep_{int(time.time())}"
+            job = self.training_queue.submit(
+                sweep_id,
+                lambda job: self._run_sweep_job(job, tasks, {s: datasets[s] for s in symbols}, rank_by),
+                total_steps=len(tasks),
+                priority=priority,
+                kind='sweep',
+                symbols=symbols,
+                model_count=len(model_paths),
+                window_count=len(windows or []) or 1,
+                rank_by=rank_by
+            )
+            
+            return {
+                'success': True,
+                'sweep_id': sweep_id,
+                'training_id': sweep_id,
+                'simulations': len(tasks),
+                'status': job.status
+            }
+            
+        except ValueError as e:
+            return {'error': str(e)}
+        except Exception as e:
+            logger.error(f"Error starting simulation sweep: {e}")
+            return {'error': str(e)}
+    
+    def _run_sweep_job(self, job, tasks: List[Dict], datasets: Dict[str, str], rank_by: str) -> Dict:
+        """Load the sweep's market data once into shared memory, then fan the simulations out to worker processes"""
+        registry = get_feature_registry()
+        feature_sets = {}
+        try:
+            for symbol, path in datasets.items():
+                feature_sets[symbol] = registry.acquire(dataset_feature_key(symbol, path),
+                                                        lambda path=path: pd.DataFrame(load_market_data(path)))
+            job.update_progress(0, len(tasks))
+            
+            rows = run_sweep(
+                tasks,
+                {symbol: feature_set.descriptor for symbol, feature_set in feature_sets.items()},
+                on_progress=lambda done, total: job.update_progress(done, total),
+                should_stop=job.check_cancelled
+            )
+        finally:
+            for feature_set in feature_sets.values():
+                registry.release(feature_set.key)
+        
+        ranked = rank_results(rows, rank_by)
+        logger.info(f"✅ Simulation sweep {job.job_id} finished: {len(rows)} simulations")
+        return {'results': ranked, 'failed': sum(1 for row in ranked if 'error' in row)}
+    
+    def run_walk_forward(self, symbol: str, model_type: str = 'PPO', folds: int = 4,
+                         train_bars: int = None, test_bars: int = None, anchored: bool = False,
+                         timesteps: int = 10000, hyperparameters: Dict = None, seed: int = None,
+                         priority: int = 0) -> Dict:
+        """
+        Queue a walk-forward evaluation of a model type on a symbol's imported data
+        Each fold trains a fresh model on its training window and is backtested on
+        the following test window; folds train in parallel worker processes. Fold
+        datasets are cached, so reruns with other hyperparameters skip data preparation.
+        """
+        try:
+            symbol = symbol.upper()
+            model_type = model_type.upper()
+            if model_type not in MODEL_TYPES:
+                return {'error': f'model_type must be one of {", ".join(MODEL_TYPES)}'}
+            
+            hyperparameters = hyperparameters or {}
+            unknown = [key for key in hyperparameters if key not in HYPERPARAMETERS]
+            if unknown:
+                return {'error': f'Unsupported hyperparameters: {", ".join(unknown)}'}
+            
+            data_path = self._latest_datasets().get(symbol)
+            if not data_path:
+                return {'error': f'No historical data found for {symbol}. Import data first.'}
+            
+            plan = plan_folds(read_manifest(data_path)['rows'], int(folds), train_bars, test_bars, anchored)
+            
+            run_id = f"walk_forward_{symbol}_{int(time.time())}"
+            job = self.training_queue.submit(
+                run_id,
+                lambda job: self._run_walk_forward_job(job, data_path, plan, {
+                    'symbol': symbol,
+                    'model_type': model_type,
+                    'timesteps': int(timesteps),
+                    'hyperparameters': hyperparameters,
+                    'seed': seed
+                }),
+                total_steps=len(plan),
+                priority=priority,
+                kind='walk_forward',
+                symbol=symbol,
+                model_type=model_type,
+                folds=len(plan),
+                anchored=anchored
+            )
+            
+            return {
+                'success': True,
+                'walk_forward_id': run_id,
+                'training_id': run_id,
+                'folds': plan,
+                'status': job.status
+            }
+            
+        except ValueError as e:
+            return {'error': str(e)}
+        except Exception as e:
+            logger.error(f"Error starting walk-forward evaluation: {e}")
+            return {'error': str(e)}
+    
+    def _run_walk_forward_job(self, job, data_path: str, plan: List[Dict], settings: Dict) -> Dict:
+        """Prepare (or reuse) the fold datasets, then train and evaluate the folds in worker processes"""
+        specs = [dict(spec, **settings) for spec in self.fold_cache.prepare(data_path, plan)]
+        job.update_progress(0, len(specs))
+        
+        rows = run_walk_forward(
+            specs,
+            on_progress=lambda done, total: job.update_progress(done, total),
+            should_stop=job.check_cancelled
+        )
+        
+        logger.info(f"✅ Walk-forward {job.job_id} finished: {len(rows)} folds")
+        return {'fold_results': rows, 'summary': aggregate_folds(rows)}
+    
+    def _latest_datasets(self) -> Dict[str, str]:
+        """Most recent imported dataset per symbol"""
+        datasets = {}
+        for path in list_datasets(self.models_dir):
+            datasets[os.path.basename(path).split('_data_')[0]] = path
+        return datasets
+    
+    def get_simulation(self, simulation_id: str, points: int = None,
+                       start: str = None, end: str = None) -> Dict:
+        """
+        Get a stored simulation result, optionally limited to a time window
+        Chart data is downsampled to ``points`` (LTTB) so payloads stay small.
+        """
+        try:
+            result = self.simulation_results.query(
+                simulation_id, points=points or self.simulation_chart_points, start=start, end=end
+            )
+            if result is None:
+                return {'error': f'Simulation {simulation_id} not found'}
+            return result
+            
+        except ValueError as e:
+            return {'error': str(e)}
+        except Exception as e:
+            logger.error(f"Error getting simulation {simulation_id}: {e}")
+            return {'error': str(e)}
+    
+    def get_simulation_bootstrap(self, simulation_id: str, resamples: int = 10000, block_size: int = None,
+                                 confidence: float = 0.95, seed: int = None) -> Dict:
+        """Block-bootstrap confidence intervals for a stored simulation, with custom settings"""
+        try:
+            stored = self.simulation_results.get(simulation_id)
+            if stored is None:
+                return {'error': f'Simulation {simulation_id} not found'}
+            
+            result = block_bootstrap(
+                stored['series']['portfolio_value'],
+                [trade['reward'] for trade in stored['trades']],
+                resamples=resamples,
+                block_size=block_size,
+                confidence=confidence,
+                seed=seed
+            )
+            result['simulation_id'] = simulation_id
+            return result
+            
+        except ValueError as e:
+            return {'error': str(e)}
+        except Exception as e:
+            logger.error(f"Error bootstrapping simulation {simulation_id}: {e}")
+            return {'error': str(e)}
+    
+    def _publish_job_update(self, job: Dict):
+        """Publish a training job's current state to the event hub, if one is attached"""
+        if self.event_hub is None:
+            return
+        try:
+            self.event_hub.publish('training', 'job_updated', job)
+        except Exception as e:
+            logger.error(f"Error publishing training update for {job.get('training_id')}: {e}")
+    
     def get_training_status(self, training_id: str = None) -> Dict:
         """
-        Get training status and progress
+        Get training status and progress (steps done, steps/sec, ETA, queue position)
         """
         if training_id:
-            return self.training_jobs.get(training_id, {})
+            return self.training_queue.get_job_status(training_id)
         else:
-            return {
-                'active_jobs': len([j for j in self.training_jobs.values() 
-                                   if j['status'] == 'training']),
-                'completed_jobs': len([j for j in self.training_jobs.values() 
-                                      if j['status'] == 'completed']),
-                'failed_jobs': len([j for j in self.training_jobs.values() 
-                                   if j['status'] == 'failed']),
-                'jobs': self.training_jobs
-            }
+            return self.training_queue.get_status()
+    
+    def cancel_training(self, training_id: str) -> Dict:
+        """
+        Cancel a queued or running training job
+        """
+        return self.training_queue.cancel(training_id)
     
     def get_available_models(self) -> List[Dict]:
         """
@@ -707,8 +1045,16 @@ class AdvancedTrainingSystem:
 
     def _get_current_price(self, symbol: str) -> Optional[float]:
         """Get current stock price with fallback to mock data"""
+        # Latest trade from the shared short-TTL quote cache
+        try:
+            price = get_quote_cache(self.mode).get_price(symbol)
+            if price:
+                return price
+        except Exception as e:
+            logger.warning(f"Quote cache lookup failed for {symbol}: {e}")
+        
         try:
-            # Try to get recent historical data first (works with free tier)
+            # Fall back to recent historical data (works with free tier)
             end_date = datetime.now() - timedelta(days=1)  # Go back 1 day
             start_date = end_date - timedelta(days=7)  # Get last week
             
@@ -718,7 +1064,8 @@ class AdvancedTrainingSystem:
                 start=start_date,
                 end=end_date
             )
-            bars = self.data_client.get_stock_bars(request)
+            with span('alpaca.get_stock_bars'):
+                bars = self.data_client.get_stock_bars(request)
             
             if bars and hasattr(bars, 'df') and len(bars.df) > 0:
                 # Use the most recent close price
@@ -750,14 +1097,14 @@ class AdvancedTrainingSystem:
                 end=end_date
             )
             
-            bars = self.data_client.get_stock_bars(request)
+            with span('alpaca.get_stock_bars'):
+                bars = self.data_client.get_stock_bars(request)
             
             if bars and hasattr(bars, 'df') and len(bars.df) > 0:
                 df = bars.df
                 prices = df['close'].tolist()
                 
                 if len(prices) >= 2:
-                    current_price = self._get_current_price(symbol) or float(prices[-1])
                     return {
                         'price_change': float(prices[-1] - prices[0]),
                         'price_change_pct': float((prices[-1] - prices[0]) / prices[0] * 100),
@@ -769,7 +1116,7 @@ class AdvancedTrainingSystem:
             logger.error(f"Error getting performance for {symbol}: {e}")
         
         # Fallback to mock performance data based on realistic ranges
-        current_price = self._get_current_price(symbol) or 100.0
+        current_price = self._get_cached_price(symbol) or 100.0
         mock_performance = {
             'AAPL': {'change_pct': 2.5, 'volatility': 0.25},
             'TSLA': {'change_pct': -1.8, 'volatility': 0.45}, 
@@ -791,60 +1138,14 @@ class AdvancedTrainingSystem:
         }
     
     def _add_technical_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Add technical indicators to DataFrame"""
+        """Add technical indicators to DataFrame (shared engine, same features as the trading environment)"""
         try:
-            # RSI
-            df['RSI'] = self._calculate_rsi(df['Close'])
-            
-            # MACD
-            df['MACD'], df['Signal'] = self._calculate_macd(df['Close'])
-            
-            # Moving averages
-            df['MA_20'] = df['Close'].rolling(window=20).mean()
-            df['MA_50'] = df['Close'].rolling(window=50).mean()
-            
-            # Bollinger Bands
-            df['BB_upper'], df['BB_lower'] = self._calculate_bollinger_bands(df['Close'])
-            
-            # Volume indicators
-            df['Volume_MA'] = df['Volume'].rolling(window=20).mean()
-            df['Volume_Ratio'] = df['Volume'] / df['Volume_MA']
-            
-            # Fill NaN values (updated method)
-            df = df.bfill()
-            df = df.fillna(0)
-            
-            return df
+            return get_indicator_engine().apply(df)
             
         except Exception as e:
             logger.error(f"Error adding technical indicators: {e}")
             return df
     
-    def _calculate_rsi(self, prices: pd.Series, period: int = 14) -> pd.Series:
-        """Calculate RSI"""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
-    
-    def _calculate_macd(self, prices: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[pd.Series, pd.Series]:
-        """Calculate MACD"""
-        ema_fast = prices.ewm(span=fast).mean()
-        ema_slow = prices.ewm(span=slow).mean()
-        macd = ema_fast - ema_slow
-        signal_line = macd.ewm(span=signal).mean()
-        return macd, signal_line
-    
-    def _calculate_bollinger_bands(self, prices: pd.Series, period: int = 20, std_dev: int = 2) -> Tuple[pd.Series, pd.Series]:
-        """Calculate Bollinger Bands"""
-        ma = prices.rolling(window=period).mean()
-        std = prices.rolling(window=period).std()
-        upper = ma + (std * std_dev)
-        lower = ma - (std * std_dev)
-        return upper, lower
-    
     def _calculate_data_statistics(self, df: pd.DataFrame) -> Dict:
         """Calculate statistics for imported data"""
         try:
@@ -870,136 +1171,15 @@ class AdvancedTrainingSystem:
             logger.error(f"Error calculating statistics: {e}")
             return {}
     
-    def _create_training_environment(self, df: pd.DataFrame, symbol: str):
-        """Create training environment from historical data"""
-        # This would create a custom Gym environment
-        # For now, return a simple environment
+    def _create_training_environment(self, symbol: str, data_path: str):
+        """Create a training environment over an imported dataset"""
         from trading_env import TradingEnvironment
-        return TradingEnvironment(symbol, mode=self.mode)
+        return TradingEnvironment(symbol, mode=self.mode, dataset_path=data_path)
     
     def _run_model_simulation(self, model, df: pd.DataFrame, symbol: str) -> Dict:
-        """Run simulation using trained model"""
+        """Run simulation using trained model over precomputed feature arrays"""
         try:
-            # Create simulation environment
-            env = self._create_training_environment(df, symbol)
-            
-            # Run simulation
-            obs = env.reset()
-            total_reward = 0
-            trades = []
-            portfolio_values = []
-            chart_data = []
-            position_history = []
-            
-            for step in range(len(df) - 1):
-                action, _ = model.predict(obs, deterministic=True)
-                obs, reward, done, info = env.step(action)
-                
-                total_reward += reward
-                current_portfolio_value = env.balance + env.position * df['Close'].iloc[step]
-                portfolio_values.append(current_portfolio_value)
-                
-                # Get timestamp - handle different formats
-                timestamp = df.index[step]
-                if hasattr(timestamp, 'strftime'):
-                    timestamp_str = timestamp.strftime('%Y-%m-%d %H:%M:%S')
-                else:
-                    # Convert timestamp to datetime if it's not already
-                    try:
-                        timestamp_dt = pd.to_datetime(timestamp)
-                        timestamp_str = timestamp_dt.strftime('%Y-%m-%d %H:%M:%S')
-                    except:
-                        timestamp_str = str(timestamp)
-                
-                # Store chart data for every step
-                chart_data.append({
-                    'timestamp': timestamp_str,
-                    'price': float(df['Close'].iloc[step]),
-                    'portfolio_value': float(current_portfolio_value),
-                    'position': float(env.position),
-                    'balance': float(env.balance),
-                    'action': int(action),
-                    'reward': float(reward),
-                    'volume': float(df.get('Volume', df.get('volume', 0)).iloc[step]) if 'Volume' in df.columns or 'volume' in df.columns else 0
-                })
-                
-                position_history.append(float(env.position))
-                
-                # Record trades (buy/sell actions)
-                if action in [1, 2]:  # Buy or Sell
-                    trades.append({
-                        'step': step,
-                        'timestamp': timestamp_str,
-                        'action': 'buy' if action == 1 else 'sell',
-                        'price': float(df['Close'].iloc[step]),
-                        'reward': float(reward),
-                        'position_before': float(position_history[step-1] if step > 0 else 0),
-                        'position_after': float(env.position),
-                        'balance': float(env.balance),
-                        'portfolio_value': float(current_portfolio_value)
-                    })
-                
-                if done:
-                    break
-            
-            # Calculate simulation metrics
-            initial_value = portfolio_values[0] if portfolio_values else 10000  # Default starting value
-            final_value = portfolio_values[-1] if portfolio_values else initial_value
-            total_return = ((final_value - initial_value) / initial_value * 100) if initial_value > 0 else 0
-            
-            # Calculate accuracy metrics
-            winning_trades = [t for t in trades if t['reward'] > 0]
-            losing_trades = [t for t in trades if t['reward'] < 0]
-            win_rate = (len(winning_trades) / len(trades) * 100) if trades else 0
-            
-            # Calculate average profits and losses
-            avg_win = sum(t['reward'] for t in winning_trades) / len(winning_trades) if winning_trades else 0
-            avg_loss = sum(t['reward'] for t in losing_trades) / len(losing_trades) if losing_trades else 0
-            
-            # Calculate maximum drawdown
-            max_drawdown = 0
-            peak = initial_value
-            for value in portfolio_values:
-                if value > peak:
-                    peak = value
-                drawdown = (peak - value) / peak * 100
-                if drawdown > max_drawdown:
-                    max_drawdown = drawdown
-            
-            # Calculate Sharpe ratio (simplified)
-            if len(portfolio_values) > 1:
-                returns = [(portfolio_values[i] - portfolio_values[i-1]) / portfolio_values[i-1] 
-                          for i in range(1, len(portfolio_values))]
-                avg_return = np.mean(returns) if returns else 0
-                return_std = np.std(returns) if returns else 0
-                sharpe_ratio = (avg_return / return_std) if return_std > 0 else 0
-            else:
-                sharpe_ratio = 0
-            
-            return {
-                'success': True,
-                'symbol': symbol,
-                'total_reward': float(total_reward),
-                'total_return_pct': float(total_return),
-                'initial_value': float(initial_value),
-                'final_value': float(final_value),
-                'total_trades': len(trades),
-                'win_rate': float(win_rate),
-                'winning_trades': len(winning_trades),
-                'losing_trades': len(losing_trades),
-                'avg_win_pct': float(avg_win),
-                'avg_loss_pct': float(avg_loss),
-                'max_drawdown_pct': float(max_drawdown),
-                'sharpe_ratio': float(sharpe_ratio),
-                'trades': trades,  # All trades for detailed analysis
-                'chart_data': chart_data,  # Complete time series data for charting
-                'portfolio_values': portfolio_values,  # Portfolio value over time
-                'simulation_period': {
-                    'start_date': chart_data[0]['timestamp'] if chart_data else None,
-                    'end_date': chart_data[-1]['timestamp'] if chart_data else None,
-                    'total_steps': len(chart_data)
-                }
-            }
+            return BacktestEngine().run(model, df, symbol)
             
         except Exception as e:
             logger.error(f"Error in simulation: {e}")
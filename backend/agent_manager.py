@@ -9,7 +9,12 @@ import numpy as np
 from stable_baselines3 import PPO
 from stable_baselines3.common.vec_env import DummyVecEnv
 from stable_baselines3.common.evaluation import evaluate_policy
+from alpaca.data.historical import StockHistoricalDataClient
 from trading_env import TradingEnvironment
+from bar_prefetcher import BarPrefetcher
+from bar_feed import BarDispatcher, create_bar_feed
+from market_calendar import TradingScheduler
+from metrics import span
 import logging
 from datetime import datetime
 import threading
@@ -23,10 +28,11 @@ class AgentManager:
     Handles autonomous learning and decision making
     """
     
-    def __init__(self, symbols, mode='paper', model_dir='models'):
+    def __init__(self, symbols, mode='paper', model_dir='models', event_hub=None):
         self.symbols = symbols
         self.mode = mode
         self.model_dir = model_dir
+        self.event_hub = event_hub
         self.agents = {}
         self.environments = {}
         self.learning_stats = {}
@@ -35,6 +41,17 @@ class AgentManager:
         # Create model directory
         os.makedirs(model_dir, exist_ok=True)
         
+        # Environment resets share multi-symbol bar requests; the watchlist is loaded in one go
+        self.bar_prefetcher = BarPrefetcher(StockHistoricalDataClient(
+            api_key=os.getenv(f'ALPACA_{mode.upper()}_KEY'),
+            secret_key=os.getenv(f'ALPACA_{mode.upper()}_SECRET')
+        ))
+        self._prefetch_bars()
+        
+        # Decisions follow the market calendar; news is only refreshed while they run
+        self.scheduler = TradingScheduler()
+        self.news_paused = False
+        
         # Initialize agents for each symbol
         self._initialize_agents()
         
@@ -46,7 +63,7 @@ class AgentManager:
             logger.info(f"Initializing agent for {symbol}")
             
             # Create environment
-            env = TradingEnvironment(symbol)
+            env = TradingEnvironment(symbol, bar_source=self.bar_prefetcher)
             vec_env = DummyVecEnv([lambda: env])
             self.environments[symbol] = vec_env
             
@@ -102,7 +119,8 @@ class AgentManager:
             obs = env._get_observation()
             
             # Predict action
-            action, _states = model.predict(obs, deterministic=False)
+            with span('model.predict'):
+                action, _states = model.predict(obs, deterministic=False)
             
             # Execute action in environment
             new_obs, reward, done, truncated, info = env.step(action)
@@ -119,9 +137,18 @@ class AgentManager:
                 performance = env.get_performance_metrics()
                 self.learning_stats[symbol]['last_performance'] = performance
                 self.learning_stats[symbol]['total_episodes'] += 1
+                # Agents stepped in lockstep tend to finish episodes in the same cycle;
+                # one request refreshes the watchlist and the other resets reuse it.
+                # Environments fed live bars keep them and need no refresh.
+                if not env.live:
+                    self._prefetch_bars()
                 env.reset()
                 
                 logger.info(f"{symbol} Episode complete - Performance: {performance}")
+                self._publish('trading', 'episode_complete', {
+                    'symbol': symbol,
+                    'performance': performance
+                })
             
             return action, reward, info
             
@@ -129,6 +156,21 @@ class AgentManager:
             logger.error(f"Error in predict_and_execute for {symbol}: {e}")
             return None, 0, {}
     
+    def _prefetch_bars(self):
+        """Load recent bars for every symbol without fresh ones in as few requests as possible"""
+        try:
+            self.bar_prefetcher.prefetch(self.symbols)
+        except Exception as e:
+            logger.warning(f"Could not prefetch bars for the watchlist: {e}")
+    
+    def _publish(self, channel, event, data):
+        """Publish an update to the event hub, if one is attached"""
+        if self.event_hub is not None:
+            try:
+                self.event_hub.publish(channel, event, data)
+            except Exception as e:
+                logger.error(f"Error publishing {event} for {channel}: {e}")
+    
     def _online_learning(self, symbol):
         """
         Perform online learning to improve agent performance
@@ -221,25 +263,75 @@ class AgentManager:
         # For now, we'll just update the mode flag
         logger.warning("Mode switching implemented - connect to appropriate APIs in production")
     
-    def start_autonomous_trading(self):
-        """Start autonomous trading loop"""
+    def _trade(self, symbol):
+        """One decision for ``symbol``, logged and published"""
+        action, reward, info = self.predict_and_execute(symbol)
+        
+        if action is not None:
+            logger.info(f"{symbol}: Action={action}, Reward={reward:.4f}, Info={info}")
+            self._publish('trading', 'decision', {
+                'symbol': symbol,
+                'action': int(action),
+                'reward': float(reward),
+                'info': info
+            })
+    
+    def start_autonomous_trading(self, bar_feed=None):
+        """
+        Start autonomous trading
+        With a bar feed (``BAR_FEED=alpaca`` or ``replay``) each agent decides
+        when a bar for its symbol closes; otherwise (``BAR_FEED=poll``, the
+        default) every agent decides on the ``TradingScheduler``'s cadence
+        while the market is open and the loop sleeps through closed hours.
+        A feed that fails to start, or dies later, falls back to polling.
+        """
         self.is_running = True
-        logger.info("Starting autonomous trading mode")
+        self.bar_feed = bar_feed if bar_feed is not None else create_bar_feed(self.mode)
+        
+        if self.bar_feed is not None:
+            logger.info(f"Starting autonomous trading mode on {type(self.bar_feed).__name__}")
+            self.bar_dispatcher = BarDispatcher(self.bar_feed, self._on_bars, name='agent-bars',
+                                                on_failure=self._on_feed_failure)
+            try:
+                self.bar_dispatcher.start(self.symbols)
+                return
+            except Exception as e:
+                logger.warning(f"Bar feed unavailable ({e}), falling back to polling")
+                self.bar_dispatcher = None
+        
+        self._start_polling()
+    
+    def _on_feed_failure(self, error):
+        """Continue on the polling loop once the bar feed has died"""
+        dispatcher, self.bar_dispatcher = getattr(self, 'bar_dispatcher', None), None
+        if dispatcher is not None:
+            dispatcher.stop()
+        if self.is_running:
+            logger.warning(f"Bar feed failed ({error}), falling back to polling")
+            self._start_polling()
+    
+    def _start_polling(self):
+        """Decide for every symbol at the scheduler's cadence, on a thread of its own"""
+        logger.info("Starting autonomous trading mode on the polling loop")
         
         def trading_loop():
             while self.is_running:
                 try:
+                    if not self.scheduler.calendar.is_open():
+                        self._pause_news(True)
+                        logger.info(f"Market closed, sleeping until {self.scheduler.calendar.next_open():%Y-%m-%d %H:%M %Z}")
+                        self.scheduler.sleep()
+                        continue
+                    
+                    self._pause_news(False)
                     for symbol in self.symbols:
                         if not self.is_running:
                             break
                         
-                        action, reward, info = self.predict_and_execute(symbol)
-                        
-                        if action is not None:
-                            logger.info(f"{symbol}: Action={action}, Reward={reward:.4f}, Info={info}")
+                        self._trade(symbol)
                     
-                    # Wait before next cycle (configurable polling interval) - increased to reduce frequency
-                    time.sleep(int(os.getenv('POLLING_INTERVAL', 30)))  # Changed from 10 to 30 seconds
+                    # Wait before next cycle: POLLING_INTERVAL, shorter around the open and close
+                    self.scheduler.sleep()
                     
                 except Exception as e:
                     logger.error(f"Error in trading loop: {e}")
@@ -250,14 +342,75 @@ class AgentManager:
         self.trading_thread.daemon = True
         self.trading_thread.start()
     
+    def _on_bars(self, bars):
+        """
+        Decide on closed bars from the feed
+        Bars are appended to their symbol's environment with streaming indicators,
+        and the decision is on the newest of them; a symbol with several pending
+        bars gets all of them and one decision, provided one of them falls
+        within a market session.
+        """
+        updated = []
+        for bar in bars:
+            symbol = bar.get('symbol')
+            if symbol not in self.environments:
+                continue
+            try:
+                env = self.environments[symbol].envs[0]
+                env.append_bar(bar)
+                # Pre- and post-market bars feed the indicators but trigger no decision
+                if symbol not in updated and self.scheduler.calendar.is_open(bar.get('timestamp')):
+                    updated.append(symbol)
+            except Exception as e:
+                logger.error(f"Error appending bar for {symbol}: {e}")
+        
+        self._pause_news(not updated)
+        for symbol in updated:
+            if not self.is_running:
+                break
+            try:
+                self._trade(symbol)
+            except Exception as e:
+                logger.error(f"Error trading {symbol} on bar close: {e}")
+    
+    def _pause_news(self, paused):
+        """Pause or resume the environments' news refreshes, which only decisions read"""
+        if paused == self.news_paused:
+            return
+        self.news_paused = paused
+        for vec_env in self.environments.values():
+            news_analyzer = vec_env.envs[0].news_analyzer
+            if paused:
+                news_analyzer.pause()
+            else:
+                news_analyzer.resume()
+        logger.info(f"News refreshes {'paused' if paused else 'resumed'}")
+    
     def stop_autonomous_trading(self):
         """Stop autonomous trading loop"""
         logger.info("Stopping autonomous trading mode")
         self.is_running = False
+        self.scheduler.wake()
+        
+        if getattr(self, 'bar_dispatcher', None) is not None:
+            self.bar_dispatcher.stop()
+            self.bar_dispatcher = None
         
         if hasattr(self, 'trading_thread'):
             self.trading_thread.join(timeout=5)
     
+    def close(self):
+        """Stop trading and close the environments, releasing their shared feature sets"""
+        if self.is_running:
+            self.stop_autonomous_trading()
+        for symbol, vec_env in self.environments.items():
+            try:
+                vec_env.close()
+            except Exception as e:
+                logger.error(f"Error closing environment for {symbol}: {e}")
+        self.environments = {}
+        self.agents = {}
+    
     def get_learning_progress(self):
         """Get learning progress for all agents"""
         progress = {}
@@ -284,8 +437,12 @@ class AgentManager:
         
         return progress
     
-    def retrain_agent(self, symbol, timesteps=50000):
-        """Retrain a specific agent from scratch"""
+    def retrain_agent(self, symbol, timesteps=50000, callback=None):
+        """
+        Retrain a specific agent from scratch
+        ``callback`` (e.g. a TrainingProgressCallback) receives progress and may stop training early;
+        a cancelled retrain leaves the current agent in place.
+        """
         logger.info(f"Retraining agent for {symbol}")
         
         if symbol in self.agents:
@@ -302,7 +459,11 @@ class AgentManager:
             )
             
             # Train
-            model.learn(total_timesteps=timesteps)
+            model.learn(total_timesteps=timesteps, callback=callback)
+            
+            if callback is not None and getattr(callback, 'cancelled', False):
+                logger.info(f"Retraining cancelled for {symbol}; keeping current agent")
+                return
             
             # Update agent
             self.agents[symbol] = model
@@ -3,11 +3,10 @@ Flask API Server for Autonomous Trading Bot
 Handles web interface communication, trading controls, and real-time updates
 """
 
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context
 from flask_cors import CORS
 import os
 import logging
-import threading
 import time
 from datetime import datetime
 import json
@@ -18,6 +17,11 @@ from options_trader import OptionsTrader
 from risk_manager import RiskManager
 from analytics import TradingAnalytics
 from advanced_training_system import AdvancedTrainingSystem
+from event_hub import EventHub, LiveState, stream_events
+from broadcast_queue import BroadcastQueue
+from metrics import metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from feature_store import get_feature_registry
+from training_jobs import TrainingProgressCallback, get_training_queue
 import pusher
 
 # Load environment variables
@@ -33,6 +37,7 @@ logger = logging.getLogger(__name__)
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend communication
+metrics.install(app)  # Per-route latency histograms for /metrics
 
 # Global variables
 agent_manager = None
@@ -44,6 +49,9 @@ advanced_training = None
 trading_active = False
 trading_thread = None
 
+# In-process event hub: the trading loop and training jobs publish, /events streams to subscribers
+event_hub = EventHub()
+
 # Initialize Pusher for real-time updates (optional)
 try:
     pusher_client = pusher.Pusher(
@@ -57,6 +65,9 @@ except Exception as e:
     logger.warning(f"Pusher not configured: {e}")
     pusher_client = None
 
+# Pusher deliveries run on a background sender so handlers never wait on the network
+pusher_queue = BroadcastQueue(pusher_client) if pusher_client else None
+
 def get_stock_list():
     """Get list of stocks from environment"""
     stocks = os.getenv('STOCKS', 'AAPL,TSLA,GOOGL,MSFT,NVDA')
@@ -71,22 +82,22 @@ def initialize_components():
         mode = os.getenv('MODE', 'paper')
         
         # Initialize components
-        agent_manager = AgentManager(stocks, mode=mode)
+        agent_manager = AgentManager(stocks, mode=mode, event_hub=event_hub)
         news_analyzer = NewsAnalyzer()
         options_trader = OptionsTrader(mode=mode)
         risk_manager = RiskManager(mode=mode)
         analytics = TradingAnalytics()
-        advanced_training = AdvancedTrainingSystem(mode=mode)
+        advanced_training = AdvancedTrainingSystem(mode=mode, event_hub=event_hub)
         
         logger.info(f"✅ All components initialized in {mode} mode")
 
 def broadcast_update(channel, event, data):
-    """Broadcast real-time updates via Pusher"""
-    if pusher_client:
-        try:
-            pusher_client.trigger(channel, event, data)
-        except Exception as e:
-            logger.error(f"Error broadcasting update: {e}")
+    """Broadcast real-time updates to SSE subscribers and via Pusher"""
+    event_hub.publish(channel, event, data)
+    
+    if pusher_queue:
+        if not pusher_queue.submit(channel, event, data):
+            logger.warning("Broadcast queue full, dropped oldest pending update")
 
 # API Routes
 
@@ -166,37 +177,73 @@ def stop_trading():
         logger.error(f"Error stopping trading: {e}")
         return jsonify({'error': str(e)}), 500
 
+def compute_status():
+    """Compute the full trading status and performance snapshot"""
+    if not agent_manager:
+        return {
+            'trading_active': False,
+            'message': 'Agent manager not initialized'
+        }
+    
+    # Get portfolio status
+    portfolio_status = agent_manager.get_portfolio_status()
+    
+    # Get learning progress
+    learning_progress = agent_manager.get_learning_progress()
+    
+    return {
+        'trading_active': trading_active,
+        'mode': agent_manager.mode,
+        'stocks': agent_manager.symbols,
+        'portfolio': portfolio_status,
+        'learning_progress': learning_progress,
+        'timestamp': datetime.now().isoformat()
+    }
+
+# Status is recomputed once per trading/training change (or every STATUS_REFRESH_INTERVAL seconds)
+status_state = LiveState(
+    event_hub,
+    compute_status,
+    refresh_interval=float(os.getenv('STATUS_REFRESH_INTERVAL', 30))
+)
+
 @app.route('/status', methods=['GET'])
 def get_status():
     """Get current trading status and performance"""
     try:
-        if not agent_manager:
-            return jsonify({
-                'trading_active': False,
-                'message': 'Agent manager not initialized'
-            })
-        
-        # Get portfolio status
-        portfolio_status = agent_manager.get_portfolio_status()
-        
-        # Get learning progress
-        learning_progress = agent_manager.get_learning_progress()
-        
-        status_data = {
-            'trading_active': trading_active,
-            'mode': agent_manager.mode,
-            'stocks': agent_manager.symbols,
-            'portfolio': portfolio_status,
-            'learning_progress': learning_progress,
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        return jsonify(status_data)
+        status_state.start()
+        return jsonify(status_state.get())
         
     except Exception as e:
         logger.error(f"Error getting status: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/events', methods=['GET'])
+def stream_updates():
+    """Stream status deltas and trading/training events as Server-Sent Events"""
+    channels = request.args.get('channels')
+    channels = [c.strip() for c in channels.split(',') if c.strip()] if channels else None
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    
+    status_state.start()
+    initial = [{
+        'channel': 'status',
+        'event': 'snapshot',
+        'data': status_state.get(),
+        'timestamp': datetime.now().isoformat()
+    }]
+    
+    stream = stream_events(
+        event_hub,
+        channels=channels,
+        last_event_id=int(last_event_id) if last_event_id and last_event_id.isdigit() else None,
+        initial=initial
+    )
+    return Response(stream_with_context(stream), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/switch-mode', methods=['POST'])
 def switch_mode():
     """Switch between paper and live trading"""
@@ -263,6 +310,8 @@ def configure_stocks():
         
         # Reinitialize agent manager
         global agent_manager
+        if agent_manager:
+            agent_manager.close()
         agent_manager = None
         initialize_agent_manager()
         
@@ -318,27 +367,38 @@ def retrain_agent(symbol):
             return jsonify({'error': f'Symbol {symbol} not configured'}), 400
         
         data = request.get_json() or {}
-        timesteps = data.get('timesteps', 50000)
-        
-        # Stop trading temporarily
-        was_active = trading_active
-        if trading_active:
-            stop_trading()
-        
-        # Retrain in background thread
-        def retrain_task():
-            agent_manager.retrain_agent(symbol, timesteps)
-            if was_active:
-                start_trading()
-        
-        retrain_thread = threading.Thread(target=retrain_task)
-        retrain_thread.start()
-        
-        logger.info(f"Started retraining for {symbol} with {timesteps} timesteps")
+        timesteps = int(data.get('timesteps', 50000))
+        priority = int(data.get('priority', 0))
+        
+        # Retrain on the shared training queue; trading pauses only while the job runs
+        def retrain_task(job):
+            with app.app_context():
+                was_active = trading_active
+                if was_active:
+                    stop_trading()
+                try:
+                    agent_manager.retrain_agent(symbol, timesteps, callback=TrainingProgressCallback(job))
+                finally:
+                    if was_active:
+                        start_trading()
+        
+        training_id = f"retrain_{symbol}_{int(time.time())}"
+        job = get_training_queue().submit(
+            training_id,
+            retrain_task,
+            total_steps=timesteps,
+            priority=priority,
+            kind='retrain',
+            symbol=symbol
+        )
+        
+        logger.info(f"Queued retraining for {symbol} with {timesteps} timesteps")
         
         return jsonify({
             'symbol': symbol,
-            'status': 'retraining_started',
+            'status': 'retraining_queued',
+            'training_id': training_id,
+            'job_status': job.status,
             'timesteps': timesteps,
             'timestamp': datetime.now().isoformat()
         })
@@ -408,6 +468,45 @@ def health_check():
         logger.error(f"Health check failed: {e}")
         return jsonify({'status': 'unhealthy', 'error': str(e)}), 500
 
+@app.route('/broadcast-stats', methods=['GET'])
+def get_broadcast_stats():
+    """Get real-time update delivery metrics (Pusher queue and SSE hub)"""
+    return jsonify({
+        'success': True,
+        'pusher': pusher_queue.get_stats() if pusher_queue else None,
+        'event_hub': event_hub.get_stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/memory-stats', methods=['GET'])
+def get_memory_stats():
+    """Get shared feature memory: sets in shared memory, environments viewing them and copies avoided"""
+    return jsonify({
+        'success': True,
+        'feature_store': get_feature_registry().memory_report(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+metrics.register_gauge('tradingbot_sse_subscribers', 'Connected /events subscribers',
+                       lambda: event_hub.get_stats()['subscribers'])
+metrics.register_gauge('tradingbot_status_computations', 'Status snapshot recomputations since start',
+                       lambda: status_state.compute_count)
+metrics.register_gauge('tradingbot_broadcast_queue_depth', 'Pusher broadcasts waiting to be sent',
+                       lambda: pusher_queue.get_stats()['queue_depth'] if pusher_queue else None)
+metrics.register_counter('tradingbot_broadcast_updates_total', 'Pusher broadcasts by outcome since start',
+                         lambda: {(outcome,): pusher_queue.get_stats()[outcome]
+                                  for outcome in ('delivered', 'dropped', 'failed', 'coalesced')}
+                         if pusher_queue else None,
+                         labelnames=('outcome',))
+metrics.register_gauge('tradingbot_feature_store_bytes', 'Feature bytes in shared memory and bytes saved by sharing them',
+                       lambda: {(kind,): get_feature_registry().memory_report()[f'{kind}_bytes'] for kind in ('shared', 'saved')},
+                       labelnames=('kind',))
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics: request latency per route/status and internal span timings"""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/news/<symbol>', methods=['GET'])
 def get_news_sentiment(symbol):
     """Get news sentiment for a symbol"""
@@ -592,6 +691,28 @@ def get_stock_info(symbol):
             }
         }), 500
 
+MAX_STOCK_INFO_SYMBOLS = 50
+
+@app.route('/training/stocks-info', methods=['GET'])
+def get_stocks_info():
+    """Get information for several stocks in one call (comma-separated symbols)"""
+    try:
+        if not advanced_training:
+            initialize_components()
+        
+        symbols = [s for s in request.args.get('symbols', '').split(',') if s.strip()]
+        if not symbols:
+            return jsonify({'error': 'Symbols parameter is required'}), 400
+        if len(symbols) > MAX_STOCK_INFO_SYMBOLS:
+            return jsonify({'error': f'At most {MAX_STOCK_INFO_SYMBOLS} symbols per request'}), 400
+        
+        stocks = advanced_training.get_stocks_info(symbols)
+        return jsonify({'stocks': stocks, 'count': len(stocks)})
+        
+    except Exception as e:
+        logger.error(f"Error getting stocks info: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/training/import-data', methods=['POST'])
 def import_historical_data():
     """Import historical data for training"""
@@ -602,11 +723,13 @@ def import_historical_data():
         data = request.get_json()
         symbol = data.get('symbol')
         months = int(data.get('months', 3))
+        timeframe = data.get('timeframe', '5Min')
+        resume = bool(data.get('resume', True))
         
         if not symbol:
             return jsonify({'error': 'Symbol is required'}), 400
         
-        result = advanced_training.import_historical_data(symbol, months)
+        result = advanced_training.import_historical_data(symbol, months, timeframe=timeframe, resume=resume)
         return jsonify(result)
         
     except Exception as e:
@@ -624,11 +747,12 @@ def train_advanced_model():
         symbol = data.get('symbol')
         model_type = data.get('model_type', 'PPO')
         training_steps = int(data.get('training_steps', 50000))
+        priority = int(data.get('priority', 0))
         
         if not symbol:
             return jsonify({'error': 'Symbol is required'}), 400
         
-        result = advanced_training.train_advanced_model(symbol, model_type, training_steps)
+        result = advanced_training.train_advanced_model(symbol, model_type, training_steps, priority=priority)
         return jsonify(result)
         
     except Exception as e:
@@ -657,6 +781,101 @@ def run_simulation():
         logger.error(f"Error running simulation: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/training/simulation-sweep', methods=['POST'])
+def run_simulation_sweep():
+    """Backtest a grid of symbols x saved models x date windows in worker processes"""
+    try:
+        if not advanced_training:
+            initialize_components()
+        
+        data = request.get_json() or {}
+        result = advanced_training.run_simulation_sweep(
+            symbols=data.get('symbols'),
+            model_paths=data.get('model_paths'),
+            windows=data.get('windows'),
+            rank_by=data.get('rank_by', 'sharpe_ratio'),
+            priority=int(data.get('priority', 0))
+        )
+        if 'error' in result:
+            return jsonify(result), 400
+        return jsonify(result), 202
+        
+    except Exception as e:
+        logger.error(f"Error starting simulation sweep: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/training/walk-forward', methods=['POST'])
+def run_walk_forward():
+    """Walk-forward evaluation: train on rolling folds in worker processes and test on the next window"""
+    try:
+        if not advanced_training:
+            initialize_components()
+        
+        data = request.get_json() or {}
+        if not data.get('symbol'):
+            return jsonify({'error': 'symbol is required'}), 400
+        
+        result = advanced_training.run_walk_forward(
+            symbol=data['symbol'],
+            model_type=data.get('model_type', 'PPO'),
+            folds=int(data.get('folds', 4)),
+            train_bars=data.get('train_bars'),
+            test_bars=data.get('test_bars'),
+            anchored=bool(data.get('anchored', False)),
+            timesteps=int(data.get('timesteps', 10000)),
+            hyperparameters=data.get('hyperparameters'),
+            seed=data.get('seed'),
+            priority=int(data.get('priority', 0))
+        )
+        if 'error' in result:
+            return jsonify(result), 400
+        return jsonify(result), 202
+        
+    except Exception as e:
+        logger.error(f"Error starting walk-forward evaluation: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/training/simulation/<simulation_id>', methods=['GET'])
+def get_simulation(simulation_id):
+    """Get a stored simulation result, downsampled to ?points= and limited to ?start=/&end="""
+    try:
+        if not advanced_training:
+            initialize_components()
+        
+        points = request.args.get('points', type=int)
+        result = advanced_training.get_simulation(
+            simulation_id, points, request.args.get('start'), request.args.get('end')
+        )
+        if 'error' in result:
+            return jsonify(result), 404 if result['error'].endswith('not found') else 400
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"Error getting simulation {simulation_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/training/simulation/<simulation_id>/bootstrap', methods=['GET'])
+def get_simulation_bootstrap(simulation_id):
+    """Monte Carlo block bootstrap of a stored simulation (?resamples=&block_size=&confidence=&seed=)"""
+    try:
+        if not advanced_training:
+            initialize_components()
+        
+        result = advanced_training.get_simulation_bootstrap(
+            simulation_id,
+            resamples=request.args.get('resamples', 10000, type=int),
+            block_size=request.args.get('block_size', type=int),
+            confidence=request.args.get('confidence', 0.95, type=float),
+            seed=request.args.get('seed', type=int)
+        )
+        if 'error' in result:
+            return jsonify(result), 404 if result['error'].endswith('not found') else 400
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"Error bootstrapping simulation {simulation_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/training/status', methods=['GET'])
 def get_training_status():
     """Get training status and progress"""
@@ -672,6 +891,19 @@ def get_training_status():
         logger.error(f"Error getting training status: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/training/cancel/<training_id>', methods=['POST'])
+def cancel_training(training_id):
+    """Cancel a queued or running training job"""
+    try:
+        result = get_training_queue().cancel(training_id)
+        if 'error' in result:
+            return jsonify(result), 404
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"Error cancelling training {training_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/training/models', methods=['GET'])
 def get_available_models():
     """Get list of available trained models"""
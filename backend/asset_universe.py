@@ -0,0 +1,247 @@
+"""
+Asset Universe
+Cached, periodically refreshed list of tradable assets with an in-memory typeahead index
+"""
+
+import os
+import re
+import json
+import time
+import heapq
+import logging
+import threading
+from bisect import bisect_left
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+def _prefix_range(sorted_keys: List[str], prefix: str):
+    """Index range of keys in ``sorted_keys`` that start with ``prefix``"""
+    start = bisect_left(sorted_keys, prefix)
+    end = bisect_left(sorted_keys, prefix + '\uffff', lo=start)
+    return start, end
+
+
+class AssetIndex:
+    """
+    Immutable search index over an asset list
+    Symbols are kept sorted for prefix lookups by binary search; company-name
+    tokens map to assets through an inverted index whose keys are also sorted,
+    so token prefixes resolve the same way. Assets are stored in tie-break
+    order (tradable first, then shorter and alphabetically earlier symbols),
+    so within a ranking tier the lowest positions are the best matches.
+    """
+
+    def __init__(self, assets: List[Dict]):
+        self.assets = sorted(assets, key=lambda asset: (not asset.get('tradable', True), len(asset['symbol']), asset['symbol']))
+        self._symbols = sorted((asset['symbol'].lower(), i) for i, asset in enumerate(self.assets))
+        self._symbol_keys = [symbol for symbol, _ in self._symbols]
+        self._exact_symbols = {symbol: i for symbol, i in self._symbols}
+
+        postings = {}
+        first_postings = {}
+        for i, asset in enumerate(self.assets):
+            tokens = tokenize(asset.get('name'))
+            for token in set(tokens):
+                postings.setdefault(token, []).append(i)
+            if tokens:
+                first_postings.setdefault(tokens[0], []).append(i)
+
+        self._postings = postings
+        self._token_keys = sorted(postings)
+        self._first_postings = first_postings
+        self._first_token_keys = sorted(first_postings)
+
+    def __len__(self):
+        return len(self.assets)
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """Ranked matches: exact symbol, exact name, symbol prefix, name prefix, any name-token prefix"""
+        query = (query or '').strip().lower()
+        if not query or limit <= 0:
+            return []
+
+        results = []
+        seen = set()
+
+        def take(candidates) -> bool:
+            # Candidates are positions; the smallest are the best within a tier
+            for i in heapq.nsmallest(limit, candidates):
+                if i not in seen:
+                    seen.add(i)
+                    results.append(i)
+                    if len(results) >= limit:
+                        return True
+            return False
+
+        exact = self._exact_symbols.get(query)
+        if exact is not None and take([exact]):
+            return self._resolve(results)
+
+        tokens = tokenize(query)
+        if tokens:
+            exact_name = self._intersect(
+                [self._first_postings.get(tokens[0], ())] + [self._postings.get(token, ()) for token in tokens[1:]]
+            )
+            if take(exact_name):
+                return self._resolve(results)
+
+        start, end = _prefix_range(self._symbol_keys, query)
+        if take(i for _, i in self._symbols[start:end]):
+            return self._resolve(results)
+
+        if tokens:
+            rest = [self._prefix_postings(self._token_keys, self._postings, token) for token in tokens[1:]]
+            first = self._prefix_postings(self._first_token_keys, self._first_postings, tokens[0])
+            if take(self._intersect([first] + rest)):
+                return self._resolve(results)
+            anywhere = self._prefix_postings(self._token_keys, self._postings, tokens[0])
+            take(self._intersect([anywhere] + rest))
+
+        return self._resolve(results)
+
+    def _resolve(self, positions: List[int]) -> List[Dict]:
+        return [dict(self.assets[i]) for i in positions]
+
+    @staticmethod
+    def _prefix_postings(keys: List[str], postings: Dict[str, List[int]], prefix: str) -> set:
+        start, end = _prefix_range(keys, prefix)
+        matches = set()
+        for key in keys[start:end]:
+            matches.update(postings[key])
+        return matches
+
+    @staticmethod
+    def _intersect(posting_sets) -> set:
+        result = None
+        for postings in sorted(posting_sets, key=len):
+            result = set(postings) if result is None else result.intersection(postings)
+            if not result:
+                return set()
+        return result or set()
+
+
+class AssetUniverse:
+    """
+    Asset list cached in memory and on disk, refreshed in the background
+    Searches never hit the network once an index exists: the first search
+    loads the disk cache (or fetches synchronously if there is none), and a
+    daemon thread refetches every ``refresh_interval`` seconds.
+    """
+
+    def __init__(self, fetch_assets: Callable[[], List[Dict]], cache_path: str = None,
+                 refresh_interval: float = None):
+        self.fetch_assets = fetch_assets
+        self.cache_path = cache_path
+        self.refresh_interval = (refresh_interval if refresh_interval is not None
+                                 else float(os.getenv('ASSET_UNIVERSE_REFRESH', 6 * 3600)))
+
+        self._index = None
+        self._initial_attempted = False
+        self._loaded_at = None
+        self._source = None
+        self._lock = threading.Lock()
+        self._refresh_now = threading.Event()
+        self._thread = None
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        index = self._index or self._load_initial()
+        return index.search(query, limit) if index else []
+
+    def refresh(self) -> bool:
+        """Refetch the asset list now and swap in a new index"""
+        try:
+            assets = self.fetch_assets()
+        except Exception as e:
+            logger.error(f"Error refreshing asset universe: {e}")
+            return False
+        if not assets:
+            logger.warning("Asset universe refresh returned no assets; keeping the current index")
+            return False
+
+        self._install(assets, 'alpaca')
+        self._save_cache(assets)
+        logger.info(f"✅ Asset universe refreshed: {len(assets)} assets")
+        return True
+
+    def request_refresh(self):
+        """Schedule a background refresh"""
+        self._start()
+        self._refresh_now.set()
+
+    def get_stats(self) -> Dict:
+        index = self._index
+        return {
+            'assets': len(index) if index else 0,
+            'source': self._source,
+            'loaded_at': datetime.fromtimestamp(self._loaded_at).isoformat() if self._loaded_at else None,
+            'age_seconds': round(time.time() - self._loaded_at, 1) if self._loaded_at else None,
+            'refresh_interval_seconds': self.refresh_interval
+        }
+
+    def _load_initial(self) -> Optional[AssetIndex]:
+        with self._lock:
+            if self._index is None and not self._initial_attempted:
+                # Only the first search may block on the network; later misses wait for the refresher
+                self._initial_attempted = True
+                cached = self._load_cache()
+                if cached is not None:
+                    assets, saved_at = cached
+                    self._install(assets, 'cache', saved_at)
+                    # Serve the cached list now; refresh right away if it is stale
+                    if time.time() - saved_at >= self.refresh_interval:
+                        self._refresh_now.set()
+                else:
+                    self.refresh()
+            self._start()
+            return self._index
+
+    def _install(self, assets: List[Dict], source: str, loaded_at: float = None):
+        index = AssetIndex(assets)
+        self._index = index
+        self._source = source
+        self._loaded_at = loaded_at or time.time()
+
+    def _start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='asset-universe-refresh', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            age = time.time() - (self._loaded_at or 0)
+            self._refresh_now.wait(timeout=max(1.0, self.refresh_interval - age))
+            self._refresh_now.clear()
+            if not self.refresh():
+                # Back off before retrying a failed refresh
+                self._refresh_now.wait(timeout=min(300.0, self.refresh_interval))
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+            return cached['assets'], cached['saved_at']
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable asset cache {self.cache_path}: {e}")
+            return None
+
+    def _save_cache(self, assets: List[Dict]):
+        if not self.cache_path:
+            return
+        try:
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'saved_at': time.time(), 'assets': assets}, f)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.warning(f"Could not write asset cache {self.cache_path}: {e}")
@@ -0,0 +1,359 @@
+"""
+Backtest Engine
+Runs a trained policy over precomputed feature arrays with scalar portfolio state and vectorized metrics
+"""
+
+import os
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import gymnasium as gym
+from gymnasium import spaces
+
+from metrics import span
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Observation layout shared with TradingEnvironment._get_observation
+OBS_SIZE = 9
+OBS_POSITION, OBS_BALANCE = 5, 6
+
+HOLD, BUY, SELL, BUY_CALL, BUY_PUT = range(5)
+
+
+def _column(df: pd.DataFrame, name: str, default: float = 0.0) -> np.ndarray:
+    for candidate in (name, name.lower()):
+        if candidate in df.columns:
+            return df[candidate].to_numpy(dtype=np.float64, na_value=default)
+    return np.full(len(df), default, dtype=np.float64)
+
+
+def _timestamps(df: pd.DataFrame) -> np.ndarray:
+    """Bar timestamps formatted once for the whole frame"""
+    if 'timestamp' in df.columns:
+        values = pd.to_datetime(df['timestamp'])
+    elif isinstance(df.index, pd.DatetimeIndex):
+        values = df.index.to_series()
+    else:
+        return df.index.astype(str).to_numpy()
+    return values.dt.strftime(TIMESTAMP_FORMAT).to_numpy()
+
+
+def annualized_volatility(close: np.ndarray) -> float:
+    """Annualized volatility of bar-to-bar returns, capped at 100% like the trading environment"""
+    if len(close) < 5:
+        return 0.0
+    prev = close[:-1]
+    returns = np.divide(np.diff(close), prev, out=np.zeros(len(prev)), where=prev != 0)
+    if len(returns) < 2:
+        return 0.0
+    return float(min(np.std(returns, ddof=1) * np.sqrt(252), 1.0))
+
+
+def make_policy(model) -> Callable[[np.ndarray], int]:
+    """
+    Deterministic action function for a Stable-Baselines3 model
+    Discrete-action policies are called directly through torch on a view of the
+    observation buffer, skipping ``model.predict``'s per-call input handling.
+    """
+    policy = getattr(model, 'policy', None)
+    if policy is not None and hasattr(getattr(model, 'action_space', None), 'n') and hasattr(policy, '_predict'):
+        try:
+            import torch
+
+            policy.set_training_mode(False)
+            device = policy.device
+
+            def predict(obs: np.ndarray) -> int:
+                with torch.no_grad():
+                    obs_tensor = torch.from_numpy(obs).to(device).unsqueeze(0)
+                    return int(policy._predict(obs_tensor, deterministic=True).reshape(-1)[0])
+
+            return predict
+        except Exception as e:
+            logger.debug(f"Falling back to model.predict: {e}")
+
+    def predict(obs: np.ndarray) -> int:
+        action, _ = model.predict(obs, deterministic=True)
+        return int(np.asarray(action).reshape(-1)[0])
+
+    return predict
+
+
+class SimulatedPortfolio:
+    """
+    Cash and one stock position under ``TradingEnvironment``'s trading rules
+    Buys are sized and limited like the risk manager does it, but against the
+    simulated portfolio instead of the broker account.
+    """
+
+    __slots__ = ('initial_balance', 'fee', 'max_position_size', 'max_concentration', 'size_adjustment',
+                 'volatility_penalty', 'rng', 'balance', 'position', 'entry_price')
+
+    def __init__(self, initial_balance: float, transaction_fee: float, max_position_size: float,
+                 max_concentration: float, volatility: float, volatility_penalty: float, seed: Optional[int] = 0):
+        self.initial_balance = initial_balance
+        self.fee = transaction_fee
+        self.max_position_size = max_position_size
+        self.max_concentration = max_concentration
+        self.size_adjustment = 0.5 if volatility > 0.5 else 0.75 if volatility > 0.3 else 1.0
+        self.volatility_penalty = volatility_penalty
+        self.rng = np.random.default_rng(seed)
+        self.balance = initial_balance
+        self.position = 0.0
+        self.entry_price = 0.0
+
+    def apply(self, action: int, price: float) -> Tuple[float, bool]:
+        """Execute ``action`` at ``price``; returns the environment's reward and whether a trade happened"""
+        fee = self.fee
+        reward = 0.0
+        executed = False
+
+        if action == BUY:
+            total_value = self.balance + self.position * price
+            quantity = max(1, int(total_value * self.max_position_size * self.size_adjustment / price))
+            trade_value = quantity * price
+            cost = trade_value * (1 + fee)
+            if self.balance < price * (1 + fee) or cost > self.balance:
+                reward = -0.1
+            elif (trade_value > total_value * self.max_position_size or
+                  self.position * price + trade_value > total_value * self.max_concentration):
+                # Rejected by the risk manager's position size and concentration limits
+                reward = -0.2
+            else:
+                self.balance -= cost
+                self.position += quantity
+                self.entry_price = price
+                executed = True
+                reward = 0.01
+        elif action == SELL:
+            if self.position <= 0:
+                reward = -0.1
+            else:
+                revenue = self.position * price * (1 - fee)
+                reward = (revenue - self.position * self.entry_price) / 1000.0
+                self.balance += revenue
+                self.position = 0.0
+                executed = True
+        elif action in (BUY_CALL, BUY_PUT):
+            if self.balance < price * 0.1:
+                reward = -0.1
+            else:
+                self.balance -= price * 0.05
+                executed = True
+                move = self.rng.normal(0, 0.02) * 2
+                reward = move if action == BUY_CALL else -move
+        elif self.position > 0 and self.entry_price > 0:
+            reward = (price - self.entry_price) / self.entry_price * 0.1
+
+        if self.position > 0:
+            position_value = self.position * price
+            concentration = position_value / (self.balance + position_value)
+            if concentration > 0.2:
+                reward -= (concentration - 0.2) * 0.1
+
+        return reward - self.volatility_penalty, executed
+
+
+class BacktestEngine:
+    """
+    Array-based replacement for stepping a live ``TradingEnvironment`` in simulations
+    Market features are computed once into an observation matrix; each step only
+    writes position and balance into the row, asks the policy for an action and
+    applies it to a ``SimulatedPortfolio``. News sentiment is held neutral, so
+    no network calls happen during a run.
+    """
+
+    def __init__(self, initial_balance: float = 100000.0, transaction_fee: float = 0.001,
+                 max_position_size: float = None, max_concentration: float = None,
+                 sentiment: float = 0.5, seed: Optional[int] = 0):
+        self.initial_balance = float(initial_balance)
+        self.transaction_fee = transaction_fee
+        self.max_position_size = max_position_size or float(os.getenv('MAX_POSITION_SIZE', 0.01))
+        self.max_concentration = max_concentration or float(os.getenv('MAX_PORTFOLIO_CONCENTRATION', 0.20))
+        self.sentiment = sentiment
+        self.seed = seed
+
+    def build_observations(self, df: pd.DataFrame) -> np.ndarray:
+        """Observation matrix with market columns filled and state columns left for the run"""
+        close = _column(df, 'Close')
+        volatility = annualized_volatility(close)
+
+        obs = np.zeros((len(df), OBS_SIZE), dtype=np.float32)
+        obs[:, 0] = close / 100.0
+        obs[:, 1] = _column(df, 'Volume') / 1000.0
+        obs[:, 2] = _column(df, 'RSI', 50.0) / 100.0
+        obs[:, 3] = np.tanh(_column(df, 'MACD'))
+        obs[:, 4] = self.sentiment
+        obs[:, 7] = volatility
+        return obs
+
+    def new_portfolio(self, close: np.ndarray) -> 'SimulatedPortfolio':
+        """Fresh portfolio state with the data-dependent environment rules fixed for ``close``"""
+        return SimulatedPortfolio(
+            initial_balance=self.initial_balance,
+            transaction_fee=self.transaction_fee,
+            max_position_size=self.max_position_size,
+            max_concentration=self.max_concentration,
+            volatility=annualized_volatility(close),
+            volatility_penalty=0.01 if len(close) > 5 and np.std(close[-5:], ddof=1) > 5 else 0.0,
+            seed=self.seed
+        )
+
+    def run(self, model, df: pd.DataFrame, symbol: str) -> Dict:
+        """Simulate the policy over every bar and return columnar series, trades and metrics"""
+        n = len(df)
+        if n < 2:
+            return {'success': False, 'error': f'Not enough data to simulate {symbol}'}
+
+        close = _column(df, 'Close')
+        volume = _column(df, 'Volume')
+        obs = self.build_observations(df)
+        predict = make_policy(model)
+        portfolio = self.new_portfolio(close)
+
+        steps = n - 1
+        actions = np.zeros(steps, dtype=np.int8)
+        rewards = np.zeros(steps)
+        positions = np.zeros(steps)
+        balances = np.zeros(steps)
+        executed = np.zeros(steps, dtype=bool)
+
+        # Python floats keep the per-step arithmetic off numpy scalar overhead
+        prices = close.tolist()
+
+        with span('backtest.run'):
+            for step in range(steps):
+                row = obs[step]
+                row[OBS_POSITION] = portfolio.position / 100.0
+                row[OBS_BALANCE] = portfolio.balance / self.initial_balance
+                action = predict(row)
+
+                rewards[step], executed[step] = portfolio.apply(action, prices[step])
+                actions[step] = action
+                positions[step] = portfolio.position
+                balances[step] = portfolio.balance
+
+                if portfolio.balance <= 0:
+                    steps = step + 1
+                    break
+
+        return self._build_result(symbol, _timestamps(df)[:steps], close[:steps], volume[:steps],
+                                  actions[:steps], rewards[:steps], positions[:steps], balances[:steps],
+                                  executed[:steps])
+
+    def _build_result(self, symbol: str, timestamps, close, volume, actions, rewards,
+                      positions, balances, executed) -> Dict:
+        portfolio_values = balances + positions * close
+
+        trade_steps = np.flatnonzero(np.isin(actions, (BUY, SELL)) & executed)
+        previous_positions = np.concatenate(([0.0], positions[:-1]))
+        trades = [{
+            'step': int(step),
+            'timestamp': str(timestamps[step]),
+            'action': 'buy' if actions[step] == BUY else 'sell',
+            'price': float(close[step]),
+            'reward': float(rewards[step]),
+            'position_before': float(previous_positions[step]),
+            'position_after': float(positions[step]),
+            'balance': float(balances[step]),
+            'portfolio_value': float(portfolio_values[step])
+        } for step in trade_steps]
+
+        trade_rewards = rewards[trade_steps]
+        wins = trade_rewards[trade_rewards > 0]
+        losses = trade_rewards[trade_rewards < 0]
+
+        initial_value = float(portfolio_values[0])
+        final_value = float(portfolio_values[-1])
+        total_return = (final_value - initial_value) / initial_value * 100 if initial_value > 0 else 0.0
+
+        peaks = np.maximum.accumulate(portfolio_values)
+        drawdowns = np.divide(peaks - portfolio_values, peaks, out=np.zeros_like(peaks), where=peaks > 0)
+
+        sharpe_ratio = 0.0
+        if len(portfolio_values) > 1:
+            returns = np.diff(portfolio_values) / portfolio_values[:-1]
+            std = returns.std()
+            sharpe_ratio = float(returns.mean() / std) if std > 0 else 0.0
+
+        return {
+            'success': True,
+            'symbol': symbol,
+            'total_reward': float(rewards.sum()),
+            'total_return_pct': float(total_return),
+            'initial_value': initial_value,
+            'final_value': final_value,
+            'total_trades': len(trades),
+            'win_rate': float(len(wins) / len(trades) * 100) if trades else 0.0,
+            'winning_trades': int(len(wins)),
+            'losing_trades': int(len(losses)),
+            'avg_win_pct': float(wins.mean()) if len(wins) else 0.0,
+            'avg_loss_pct': float(losses.mean()) if len(losses) else 0.0,
+            'max_drawdown_pct': float(drawdowns.max() * 100),
+            'sharpe_ratio': sharpe_ratio,
+            'trades': trades,
+            'chart_data': {
+                'timestamp': timestamps,
+                'price': close,
+                'portfolio_value': portfolio_values,
+                'position': positions,
+                'balance': balances,
+                'action': actions,
+                'reward': rewards,
+                'volume': volume
+            },
+            'simulation_period': {
+                'start_date': str(timestamps[0]),
+                'end_date': str(timestamps[-1]),
+                'total_steps': int(len(timestamps))
+            }
+        }
+
+
+class ArrayTradingEnv(gym.Env):
+    """
+    Offline training environment over a prepared price frame
+    Observations and rewards match ``BacktestEngine``, so a model trained here
+    is evaluated under the same rules; nothing is fetched from the network.
+    """
+
+    def __init__(self, df: pd.DataFrame, engine: BacktestEngine = None):
+        super().__init__()
+        self.engine = engine or BacktestEngine()
+        self.close = _column(df, 'Close')
+        self.prices = self.close.tolist()
+        self.observations = self.engine.build_observations(df)
+
+        self.action_space = spaces.Discrete(5)
+        self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(OBS_SIZE,), dtype=np.float32)
+
+        self.step_index = 0
+        self.portfolio = self.engine.new_portfolio(self.close)
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        self.step_index = 0
+        self.portfolio = self.engine.new_portfolio(self.close)
+        return self._observation(), {}
+
+    def step(self, action):
+        reward, executed = self.portfolio.apply(int(action), self.prices[self.step_index])
+        self.step_index += 1
+        terminated = self.step_index >= len(self.prices) - 1 or self.portfolio.balance <= 0
+        info = {
+            'balance': self.portfolio.balance,
+            'position': self.portfolio.position,
+            'executed': executed
+        }
+        return self._observation(), reward, terminated, False, info
+
+    def _observation(self) -> np.ndarray:
+        row = self.observations[self.step_index].copy()
+        row[OBS_POSITION] = self.portfolio.position / 100.0
+        row[OBS_BALANCE] = self.portfolio.balance / self.engine.initial_balance
+        return row
@@ -0,0 +1,362 @@
+"""
+Bar Feeds
+Event-driven delivery of closed bars to trading agents, from Alpaca's live stream or a local replay of imported data
+
+Subscribers register a callback and receive one dict per closed bar:
+``{'symbol', 'timestamp', 'Open', 'High', 'Low', 'Close', 'Volume'}``, the
+shape ``TradingEnvironment.append_bar`` takes. Callbacks run on the feed's
+thread; ``BarDispatcher`` moves the work to a thread of its own. A feed
+whose thread dies reports it to its failure handlers, so callers can fall
+back to polling instead of silently receiving nothing.
+"""
+
+import os
+import queue
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import list_datasets, load_columns, migrate_csv_datasets
+
+logger = logging.getLogger(__name__)
+
+BAR_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+class BarFeed:
+    """
+    Fans closed bars out to subscribers
+    Subclasses implement ``start`` and ``stop`` and call ``publish`` for
+    every bar, and ``fail`` when their thread ends before ``stop``; a failing
+    subscriber is logged and does not stop the feed.
+    """
+
+    def __init__(self):
+        self._handlers = []
+        self._failure_handlers = []
+        self._lock = threading.Lock()
+        self.bars_published = 0
+        self.error = None
+
+    def subscribe(self, handler: Callable[[Dict], None]) -> Callable[[], None]:
+        """Register ``handler``; returns a function that removes it"""
+        with self._lock:
+            self._handlers.append(handler)
+
+        def unsubscribe():
+            with self._lock:
+                if handler in self._handlers:
+                    self._handlers.remove(handler)
+        return unsubscribe
+
+    def subscribe_failures(self, handler: Callable[[Exception], None]) -> Callable[[], None]:
+        """Register ``handler`` for the error that stops the feed; returns a function that removes it"""
+        with self._lock:
+            self._failure_handlers.append(handler)
+
+        def unsubscribe():
+            with self._lock:
+                if handler in self._failure_handlers:
+                    self._failure_handlers.remove(handler)
+        return unsubscribe
+
+    def fail(self, error: Exception):
+        """Report that the feed stopped delivering bars on its own"""
+        logger.error(f"{type(self).__name__} stopped: {error}")
+        with self._lock:
+            self.error = error
+            handlers = list(self._failure_handlers)
+        for handler in handlers:
+            try:
+                handler(error)
+            except Exception as e:
+                logger.error(f"Error handling bar feed failure: {e}")
+
+    def publish(self, bar: Dict):
+        with self._lock:
+            handlers = list(self._handlers)
+            self.bars_published += 1
+        for handler in handlers:
+            try:
+                handler(bar)
+            except Exception as e:
+                logger.error(f"Error handling bar for {bar.get('symbol')}: {e}")
+
+    def start(self, symbols: Iterable[str]):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict:
+        return {'feed': type(self).__name__, 'bars_published': self.bars_published,
+                'error': str(self.error) if self.error else None}
+
+
+class BarDispatcher:
+    """
+    Runs a handler for a feed's bars on its own thread, off the feed's thread
+    Bars that arrive while the handler is busy are delivered together, so
+    ``on_bars`` receives every pending bar in arrival order and a slow
+    decision never holds up the stream. ``on_failure`` is called, on the
+    feed's thread, if the feed dies after starting; an error starting it is
+    raised from ``start`` with the dispatcher already stopped.
+    """
+
+    def __init__(self, feed: BarFeed, on_bars: Callable[[List[Dict]], None], name: str = 'bar-dispatcher',
+                 on_failure: Callable[[Exception], None] = None):
+        self.feed = feed
+        self.on_bars = on_bars
+        self.on_failure = on_failure
+        self.name = name
+        self.queue = queue.Queue()
+        self.thread = None
+        self._running = False
+        self._unsubscribe = []
+
+    def start(self, symbols: Iterable[str]):
+        self._running = True
+        self._unsubscribe = [self.feed.subscribe(self.queue.put)]
+        if self.on_failure is not None:
+            self._unsubscribe.append(self.feed.subscribe_failures(self.on_failure))
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+        try:
+            self.feed.start(symbols)
+        except Exception:
+            self.stop()
+            raise
+
+    def stop(self):
+        self._running = False
+        for unsubscribe in self._unsubscribe:
+            unsubscribe()
+        self._unsubscribe = []
+        try:
+            self.feed.stop()
+        except Exception as e:
+            logger.warning(f"Error stopping {type(self.feed).__name__}: {e}")
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5)
+
+    def _run(self):
+        while self._running:
+            try:
+                bars = [self.queue.get(timeout=1)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    bars.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.on_bars(bars)
+            except Exception as e:
+                logger.error(f"Error handling {len(bars)} bars: {e}")
+
+
+class BarAggregator:
+    """
+    Rolls 1-minute bars up into ``minutes``-minute bars, per symbol
+    A bar is complete when its last minute arrives, or when a minute from a
+    later bucket shows that the market skipped the rest of it.
+    """
+
+    def __init__(self, minutes: int):
+        self.bucket = pd.Timedelta(minutes=minutes)
+        self._open = {}
+
+    def add(self, bar: Dict) -> List[Dict]:
+        """Feed one minute bar; returns the bars it completed (zero, one or two)"""
+        symbol = bar['symbol']
+        timestamp = pd.Timestamp(bar['timestamp'])
+        start = timestamp.floor(self.bucket)
+        closed = []
+
+        current = self._open.get(symbol)
+        if current is not None and current['timestamp'] != start:
+            closed.append(self._open.pop(symbol))
+            current = None
+
+        if current is None:
+            current = self._open[symbol] = dict(bar, timestamp=start)
+        else:
+            current['High'] = max(current['High'], bar['High'])
+            current['Low'] = min(current['Low'], bar['Low'])
+            current['Close'] = bar['Close']
+            current['Volume'] += bar['Volume']
+
+        if timestamp + pd.Timedelta(minutes=1) >= start + self.bucket:
+            closed.append(self._open.pop(symbol))
+        return closed
+
+
+class AlpacaBarFeed(BarFeed):
+    """
+    Minute bars from Alpaca's market data websocket, rolled up to ``minutes``
+    The stream runs its own event loop on a background thread; bars arrive
+    about a second after they close instead of on the next poll.
+    """
+
+    def __init__(self, api_key: str, secret_key: str, minutes: int = 5, data_feed: str = None):
+        super().__init__()
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.aggregator = BarAggregator(minutes)
+        self.data_feed = data_feed or os.getenv('ALPACA_DATA_FEED', 'iex')
+        self.stream = None
+        self.thread = None
+        self._stopping = False
+
+    def start(self, symbols: Iterable[str]):
+        if not self.api_key or not self.secret_key:
+            raise ValueError('Alpaca API key and secret are required for the bar stream')
+        from alpaca.data.enums import DataFeed
+        from alpaca.data.live import StockDataStream
+
+        symbols = list(symbols)
+        self._stopping = False
+        self.stream = StockDataStream(self.api_key, self.secret_key, feed=DataFeed(self.data_feed))
+        self.stream.subscribe_bars(self._on_minute_bar, *symbols)
+        self.thread = threading.Thread(target=self._run, name='alpaca-bar-feed', daemon=True)
+        self.thread.start()
+        logger.info(f"📡 Streaming bars for {len(symbols)} symbols from Alpaca ({self.data_feed})")
+
+    def _run(self):
+        # The stream gives up on rejected credentials or subscriptions by returning or raising
+        try:
+            self.stream.run()
+            error = RuntimeError('Alpaca stream closed')
+        except Exception as e:
+            error = e
+        if not self._stopping:
+            self.fail(error)
+
+    async def _on_minute_bar(self, bar):
+        minute = {
+            'symbol': bar.symbol,
+            'timestamp': bar.timestamp,
+            'Open': float(bar.open),
+            'High': float(bar.high),
+            'Low': float(bar.low),
+            'Close': float(bar.close),
+            'Volume': float(bar.volume)
+        }
+        for closed in self.aggregator.add(minute):
+            self.publish(closed)
+
+    def stop(self):
+        self._stopping = True
+        if self.stream is not None:
+            self.stream.stop()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5)
+
+
+class ReplayBarFeed(BarFeed):
+    """
+    Replays imported datasets as if they were live, for offline load tests
+    Bars of all symbols are merged in time order and published ``speed``
+    times faster than real time (``0`` replays as fast as subscribers keep
+    up). Gaps longer than the usual bar spacing, such as nights and weekends,
+    are shortened to one bar so a replay never stalls.
+    """
+
+    def __init__(self, data_dir: str = 'advanced_models', speed: float = None, loop: bool = False):
+        super().__init__()
+        self.data_dir = data_dir
+        self.speed = speed if speed is not None else float(os.getenv('BAR_REPLAY_SPEED', 60))
+        self.loop = loop
+        self.thread = None
+        self._stop = threading.Event()
+
+    def load(self, symbols: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Merged columns of the latest dataset per symbol, sorted by timestamp"""
+        if not any(list_datasets(self.data_dir, symbol) for symbol in symbols):
+            migrate_csv_datasets(self.data_dir)
+
+        parts = []
+        for symbol in symbols:
+            paths = list_datasets(self.data_dir, symbol)
+            if not paths:
+                logger.warning(f"No imported data to replay for {symbol}")
+                continue
+            columns = load_columns(paths[-1], ('timestamp',) + BAR_FIELDS)
+            columns['symbol'] = np.full(len(columns['timestamp']), symbol, dtype=object)
+            parts.append(columns)
+        if not parts:
+            raise ValueError(f'No imported data to replay in {self.data_dir}')
+
+        merged = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        order = np.argsort(merged['timestamp'], kind='stable')
+        return {name: values[order] for name, values in merged.items()}
+
+    def start(self, symbols: Iterable[str]):
+        data = self.load(list(symbols))
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._replay, args=(data,), name='replay-bar-feed', daemon=True)
+        self.thread.start()
+        logger.info(f"▶️ Replaying {len(data['timestamp'])} bars at {self.speed or 'max'}x")
+
+    def _replay(self, data: Dict[str, np.ndarray]):
+        try:
+            self._run(data)
+        except Exception as e:
+            self.fail(e)
+
+    def _run(self, data: Dict[str, np.ndarray]):
+        timestamps = data['timestamp']
+        spacing = np.diff(np.unique(timestamps))
+        max_gap = float(np.median(spacing) / np.timedelta64(1, 's')) if len(spacing) else 0.0
+        columns = {name: data[name].tolist() for name in BAR_FIELDS}
+        symbols = data['symbol']
+
+        while True:
+            previous = None
+            for i, timestamp in enumerate(timestamps):
+                if self._stop.is_set():
+                    return
+                if self.speed and previous is not None and timestamp != previous:
+                    gap = min(float((timestamp - previous) / np.timedelta64(1, 's')), max_gap)
+                    self._stop.wait(gap / self.speed)
+                previous = timestamp
+                bar = {name: columns[name][i] for name in BAR_FIELDS}
+                bar['symbol'] = symbols[i]
+                bar['timestamp'] = pd.Timestamp(timestamp, tz='UTC')
+                self.publish(bar)
+            if not self.loop:
+                logger.info("Replay finished")
+                return
+
+    def stop(self):
+        self._stop.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5)
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the replay has published every bar; returns False on timeout"""
+        if self.thread is not None:
+            self.thread.join(timeout)
+            return not self.thread.is_alive()
+        return True
+
+
+def create_bar_feed(mode: str = 'paper') -> Optional[BarFeed]:
+    """
+    Feed selected by ``BAR_FEED``: ``poll`` (default), ``alpaca`` or ``replay``
+    ``poll`` returns ``None`` and callers use their polling loop.
+    """
+    kind = os.getenv('BAR_FEED', 'poll').lower()
+    if kind == 'poll':
+        return None
+    if kind == 'replay':
+        return ReplayBarFeed(os.getenv('BAR_REPLAY_DIR', 'advanced_models'),
+                             loop=os.getenv('BAR_REPLAY_LOOP', 'false').lower() == 'true')
+    if kind == 'alpaca':
+        return AlpacaBarFeed(os.getenv(f'ALPACA_{mode.upper()}_KEY'), os.getenv(f'ALPACA_{mode.upper()}_SECRET'),
+                             minutes=int(os.getenv('BAR_FEED_MINUTES', 5)))
+    raise ValueError(f'Unknown BAR_FEED: {kind} (choose from alpaca, replay, poll)')
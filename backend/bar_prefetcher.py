@@ -0,0 +1,137 @@
+"""
+Bar Prefetcher
+Batches the recent-bar requests of many TradingEnvironment resets into multi-symbol StockBarsRequests
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+from alpaca.data.requests import StockBarsRequest
+from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
+
+from metrics import span
+
+logger = logging.getLogger(__name__)
+
+
+class BarPrefetcher:
+    """
+    Shared source of recent bars for a watchlist of trading environments
+    ``StockBarsRequest`` takes a list of symbols, so resets arriving within
+    ``batch_window`` seconds of each other are answered by one request and the
+    frame is split per symbol. ``prefetch`` loads a whole watchlist up front,
+    and frames are reused for ``ttl`` seconds, so a cold start of N
+    environments costs a few requests instead of N.
+    """
+
+    def __init__(self, data_client, timeframe: TimeFrame = None, lookback_days: int = 7,
+                 ttl: float = None, batch_window: float = None, max_symbols: int = None):
+        self.data_client = data_client
+        self.timeframe = timeframe or TimeFrame(5, TimeFrameUnit.Minute)
+        self.lookback_days = lookback_days
+        self.ttl = ttl if ttl is not None else float(os.getenv('BAR_PREFETCH_TTL', 60))
+        self.batch_window = batch_window if batch_window is not None else float(os.getenv('BAR_BATCH_WINDOW', 0.05))
+        self.max_symbols = max_symbols or int(os.getenv('BAR_BATCH_MAX_SYMBOLS', 50))
+
+        self._cache = {}
+        self._pending = {}
+        self._timer = None
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'symbols_fetched': 0, 'cache_hits': 0, 'batched_calls': 0}
+
+    def get_bars(self, symbol: str) -> Optional[pd.DataFrame]:
+        """
+        Recent bars for ``symbol``, indexed by ``(symbol, timestamp)`` like a single-symbol response
+        Blocks until the batch holding ``symbol`` is fetched; ``None`` when
+        Alpaca returned no bars for it.
+        """
+        with self._lock:
+            cached = self._fresh(symbol)
+            if cached is not None:
+                self._stats['cache_hits'] += 1
+                return cached[1]
+
+            future = self._pending.get(symbol)
+            if future is None:
+                future = self._pending[symbol] = Future()
+                if self._timer is None:
+                    self._timer = threading.Timer(self.batch_window, self._flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+            self._stats['batched_calls'] += 1
+        return future.result()
+
+    def prefetch(self, symbols: Iterable[str]) -> Dict[str, int]:
+        """Fetch every symbol without fresh bars now; returns the number of bars per symbol"""
+        with self._lock:
+            missing = [symbol for symbol in dict.fromkeys(symbols) if self._fresh(symbol) is None]
+        frames = self._fetch(missing) if missing else {}
+        return {symbol: 0 if frame is None else len(frame) for symbol, frame in frames.items()}
+
+    def invalidate(self, symbol: str = None):
+        """Drop cached bars for ``symbol`` (every symbol when omitted)"""
+        with self._lock:
+            if symbol is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(symbol, None)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats, cached_symbols=len(self._cache))
+
+    def _fresh(self, symbol: str):
+        cached = self._cache.get(symbol)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            return cached
+        return None
+
+    def _flush(self):
+        with self._lock:
+            batch, self._pending, self._timer = self._pending, {}, None
+        try:
+            frames = self._fetch(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                future.set_exception(e)
+            return
+        for symbol, future in batch.items():
+            future.set_result(frames.get(symbol))
+
+    def _fetch(self, symbols: List[str]) -> Dict[str, Optional[pd.DataFrame]]:
+        """One request per ``max_symbols`` symbols; results are split per symbol and cached"""
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=self.lookback_days)
+        frames = {}
+
+        for lo in range(0, len(symbols), self.max_symbols):
+            group = symbols[lo:lo + self.max_symbols]
+            request = StockBarsRequest(
+                symbol_or_symbols=group,
+                timeframe=self.timeframe,
+                start=start_date,
+                end=end_date
+            )
+            with span('alpaca.get_stock_bars'):
+                bars = self.data_client.get_stock_bars(request)
+
+            df = bars.df if bars and hasattr(bars, 'df') else None
+            found = set(df.index.get_level_values('symbol')) if df is not None and len(df) else set()
+            for symbol in group:
+                frames[symbol] = df.xs(symbol, level='symbol', drop_level=False) if symbol in found else None
+
+            with self._lock:
+                self._stats['requests'] += 1
+                self._stats['symbols_fetched'] += len(group)
+                now = time.monotonic()
+                for symbol in group:
+                    self._cache[symbol] = (now, frames[symbol])
+
+        logger.info(f"Fetched bars for {len(symbols)} symbols in {-(-len(symbols) // self.max_symbols)} request(s)")
+        return frames
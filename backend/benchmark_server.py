@@ -0,0 +1,199 @@
+"""
+Server Benchmark
+Measures memory per process and requests per second of serve.py for several worker counts
+
+Each configuration starts ``serve.py`` on a free port, waits for /health,
+samples memory of the master and every child from /proc (Linux), then drives
+keep-alive GET requests from concurrent client threads for a fixed duration.
+
+Usage:
+    python benchmark_server.py --workers 0,2,4 --duration 15 --concurrency 32 --path /status
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import subprocess
+import http.client
+from typing import Dict, List
+
+SERVE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'serve.py')
+
+
+def find_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of ``pid`` from /proc"""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            if int(fields[1]) == pid:
+                children.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return children
+
+
+def process_memory(pid: int) -> Dict[str, float]:
+    """
+    RSS, PSS and USS in MB
+    PSS splits shared copy-on-write pages between the processes mapping them;
+    USS is memory private to the process.
+    """
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        'rss_mb': round(values.get('Rss', 0) / 1024, 1),
+        'pss_mb': round(values.get('Pss', 0) / 1024, 1),
+        'uss_mb': round((values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)) / 1024, 1)
+    }
+
+
+def wait_until_ready(port: int, timeout: float) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                conn.close()
+                return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def run_load(port: int, path: str, duration: float, concurrency: int) -> Dict:
+    """Drive GET ``path`` from ``concurrency`` keep-alive clients for ``duration`` seconds"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        local = []
+        local_errors = 0
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    local_errors += 1
+                local.append(time.perf_counter() - start)
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2) if latencies else None
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'latency_p50_ms': pick(0.50),
+        'latency_p95_ms': pick(0.95),
+        'latency_p99_ms': pick(0.99)
+    }
+
+
+def benchmark(workers: int, args) -> Dict:
+    port = find_free_port()
+    command = [sys.executable, SERVE_SCRIPT, '--app', args.app, '--host', '127.0.0.1',
+               '--port', str(port), '--primary-port', str(find_free_port()), '--workers', str(workers)]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    try:
+        if not wait_until_ready(port, args.startup_timeout):
+            return {'workers': workers, 'error': 'server did not become ready'}
+
+        # Let the status snapshot settle before measuring
+        time.sleep(args.warmup)
+        load = run_load(port, args.path, args.duration, args.concurrency)
+
+        processes = {'master': process_memory(server.pid)}
+        for index, pid in enumerate(sorted(child_pids(server.pid))):
+            processes[f'child-{index}'] = process_memory(pid)
+        children = [m for name, m in processes.items() if name != 'master']
+
+        return {
+            'workers': workers,
+            'processes': processes,
+            'total_pss_mb': round(sum(m['pss_mb'] for m in processes.values()), 1),
+            'avg_child_uss_mb': round(sum(m['uss_mb'] for m in children) / len(children), 1) if children else None,
+            **load
+        }
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark serve.py memory and throughput')
+    parser.add_argument('--app', default='app', help='Module exposing the Flask app (default: app)')
+    parser.add_argument('--workers', default='0,2,4',
+                        help='Comma-separated read worker counts (0 = single process)')
+    parser.add_argument('--path', default='/status', help='Endpoint to load (default: /status)')
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--startup-timeout', type=float, default=300)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = []
+    for workers in [int(w) for w in args.workers.split(',')]:
+        print(f"Benchmarking {workers} read workers...", flush=True)
+        results.append(benchmark(workers, args))
+
+    print(f"\n{'workers':>8} {'req/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'total PSS MB':>13} {'child USS MB':>13}")
+    for result in results:
+        if 'error' in result:
+            print(f"{result['workers']:>8} {result['error']}")
+            continue
+        print(f"{result['workers']:>8} {result['requests_per_second']:>10} {result['latency_p50_ms']:>8} "
+              f"{result['latency_p95_ms']:>8} {result['total_pss_mb']:>13} {str(result['avg_child_uss_mb']):>13}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'config': vars(args), 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
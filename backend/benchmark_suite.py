@@ -0,0 +1,478 @@
+"""
+Benchmark Suite
+Reproducible throughput and latency benchmarks over the bundled market data, with JSON baselines
+
+Alpaca, the news APIs and FinBERT are replaced by offline stubs: bars come from
+the CSVs in ``advanced_models/``, headlines are a fixed list and sentiment is a
+constant pipeline. Runs need no API keys or network and use fixed seeds, so two
+runs on the same machine are comparable. Each benchmark reports the median of
+``--repeat`` runs.
+
+Results are compared with a saved baseline; a metric that is worse than the
+baseline by more than ``--tolerance`` is flagged as a regression and the script
+exits with status 1.
+
+Usage:
+    python benchmark_suite.py --save-baseline
+    python benchmark_suite.py --only env,simulation --tolerance 0.2
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import contextlib
+from datetime import datetime
+from typing import Callable, Dict, List
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BACKEND_DIR, 'advanced_models')
+BASELINE_PATH = os.path.join(BACKEND_DIR, 'benchmark_baseline.json')
+SEED = 42
+
+
+def load_bars(symbol: str) -> pd.DataFrame:
+    """Most recent bundled CSV for ``symbol`` (the longest history when several exist)"""
+    files = sorted(f for f in os.listdir(DATA_DIR) if f.startswith(f'{symbol}_data_') and f.endswith('.csv'))
+    if not files:
+        raise FileNotFoundError(f'No bundled data for {symbol} in {DATA_DIR}')
+    paths = [os.path.join(DATA_DIR, f) for f in files]
+    return pd.read_csv(max(paths, key=os.path.getsize))
+
+
+class CsvBarsClient:
+    """Stand-in for ``StockHistoricalDataClient`` that serves bars from the bundled CSVs"""
+
+    def __init__(self, *args, **kwargs):
+        self._frames = {}
+
+    def get_stock_bars(self, request):
+        symbol = getattr(request, 'symbol_or_symbols', 'AAPL')
+        if isinstance(symbol, (list, tuple)):
+            symbol = symbol[0]
+        if symbol not in self._frames:
+            df = load_bars(symbol).rename(columns={
+                'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
+            })
+            df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+            columns = ['symbol', 'timestamp', 'open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap']
+            self._frames[symbol] = df[[c for c in columns if c in df.columns]].set_index(['symbol', 'timestamp'])
+        return mock.Mock(df=self._frames[symbol].copy())
+
+
+class StubTradingClient:
+    """Stand-in for ``TradingClient``: no assets, no account calls"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def get_all_assets(self, *args, **kwargs):
+        return []
+
+
+class StubSentimentPipeline:
+    """Stand-in for the FinBERT pipeline with a fixed label per call"""
+
+    def __call__(self, text):
+        return [{'label': 'positive' if len(text) % 2 else 'negative', 'score': 0.75}]
+
+
+def stub_pipeline(*args, **kwargs):
+    return StubSentimentPipeline()
+
+
+STUB_HEADLINES = [
+    {'title': f'Market update {i}: shares move on earnings outlook', 'source': 'Stub', 'publishedAt': ''}
+    for i in range(12)
+]
+
+
+@contextlib.contextmanager
+def offline_stubs():
+    """Patch Alpaca, news and FinBERT at their source modules, before the backend imports them"""
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(mock.patch('alpaca.data.historical.StockHistoricalDataClient', CsvBarsClient))
+        stack.enter_context(mock.patch('alpaca.trading.client.TradingClient', StubTradingClient))
+        stack.enter_context(mock.patch('transformers.pipeline', stub_pipeline))
+        stack.enter_context(mock.patch('transformers.AutoTokenizer.from_pretrained', lambda *a, **k: None))
+        stack.enter_context(mock.patch('transformers.AutoModelForSequenceClassification.from_pretrained',
+                                       lambda *a, **k: None))
+
+        from news_analyzer import NewsAnalyzer
+        stack.enter_context(mock.patch.object(NewsAnalyzer, '_fetch_news_api', lambda self, s, h: list(STUB_HEADLINES)))
+        stack.enter_context(mock.patch.object(NewsAnalyzer, '_fetch_polygon_news', lambda self, s, h: []))
+        yield
+
+
+def median_of(repeat: int, fn: Callable[[], float]) -> float:
+    np.random.seed(SEED)
+    return statistics.median(fn() for _ in range(repeat))
+
+
+def metric(value: float, unit: str, higher_is_better: bool) -> Dict:
+    return {'value': round(float(value), 4), 'unit': unit, 'higher_is_better': higher_is_better}
+
+
+def bench_env(args) -> Dict:
+    """TradingEnvironment reset time and steps per second"""
+    from trading_env import TradingEnvironment
+
+    env = TradingEnvironment(args.symbol, max_steps=args.steps)
+    rng = np.random.default_rng(SEED)
+    actions = rng.integers(0, 5, size=args.steps).tolist()
+
+    def reset_ms():
+        start = time.perf_counter()
+        env.reset(seed=SEED)
+        return (time.perf_counter() - start) * 1000
+
+    def steps_per_second():
+        env.reset(seed=SEED)
+        start = time.perf_counter()
+        done, steps = False, 0
+        while not done and steps < len(actions):
+            _, _, done, _, _ = env.step(actions[steps])
+            steps += 1
+        return steps / (time.perf_counter() - start)
+
+    return {
+        'env.reset_ms': metric(median_of(args.repeat, reset_ms), 'ms', False),
+        'env.steps_per_second': metric(median_of(args.repeat, steps_per_second), 'steps/s', True)
+    }
+
+
+def legacy_ta_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """The ``ta``-based indicators TradingEnvironment used before the shared engine (reference only)"""
+    import ta
+
+    df['RSI'] = ta.momentum.RSIIndicator(df['Close']).rsi()
+    macd_indicator = ta.trend.MACD(df['Close'])
+    df['MACD'] = macd_indicator.macd()
+    df['Signal'] = macd_indicator.macd_signal()
+    df['MA_20'] = ta.trend.SMAIndicator(df['Close'], window=20).sma_indicator()
+    return df.bfill().fillna(0)
+
+
+def legacy_pandas_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """The pandas rolling indicators AdvancedTrainingSystem used before the shared engine (reference only)"""
+    close = df['Close']
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    df['RSI'] = 100 - (100 / (1 + gain / loss))
+    df['MACD'] = close.ewm(span=12).mean() - close.ewm(span=26).mean()
+    df['Signal'] = df['MACD'].ewm(span=9).mean()
+    df['MA_20'] = close.rolling(window=20).mean()
+    df['MA_50'] = close.rolling(window=50).mean()
+    std = close.rolling(window=20).std()
+    df['BB_upper'] = df['MA_20'] + std * 2
+    df['BB_lower'] = df['MA_20'] - std * 2
+    df['Volume_MA'] = df['Volume'].rolling(window=20).mean()
+    df['Volume_Ratio'] = df['Volume'] / df['Volume_MA']
+    return df.bfill().fillna(0)
+
+
+def bench_indicators(args) -> Dict:
+    """Rows per second through the shared indicator engine and the two implementations it replaced"""
+    from indicators import IndicatorEngine
+
+    bars = load_bars(args.symbol)[['timestamp', 'Open', 'High', 'Low', 'Close', 'Volume']]
+    engine = IndicatorEngine()
+
+    def rows_per_second(fn):
+        def run():
+            df = bars.copy()
+            start = time.perf_counter()
+            fn(df)
+            return len(bars) / (time.perf_counter() - start)
+        return median_of(args.repeat, run)
+
+    def streaming_update_us():
+        # Prime on all but the last 1000 bars, then stream those one at a time
+        close, volume = bars['Close'].to_numpy(), bars['Volume'].to_numpy()
+        stream = engine.streaming()
+        stream.prime(close[:-1000], volume[:-1000])
+        start = time.perf_counter()
+        for c, v in zip(close[-1000:].tolist(), volume[-1000:].tolist()):
+            stream.update(c, v)
+        return (time.perf_counter() - start) / 1000 * 1e6
+
+    engine_rows = rows_per_second(engine.apply)
+    pandas_rows = rows_per_second(legacy_pandas_indicators)
+    results = {
+        'indicators.engine_rows_per_second': metric(engine_rows, 'rows/s', True),
+        'indicators.streaming_update_us': metric(median_of(args.repeat, streaming_update_us), 'us', False),
+        'indicators.legacy_pandas_rows_per_second': metric(pandas_rows, 'rows/s', True),
+        'indicators.engine_speedup_vs_pandas': metric(engine_rows / pandas_rows, 'x', True)
+    }
+    try:
+        ta_rows = rows_per_second(legacy_ta_indicators)
+    except ImportError:
+        # The ta reference only runs where the library is installed
+        return results
+    results['indicators.legacy_ta_rows_per_second'] = metric(ta_rows, 'rows/s', True)
+    results['indicators.engine_speedup_vs_ta'] = metric(engine_rows / ta_rows, 'x', True)
+    return results
+
+
+def _untrained_model(bars: pd.DataFrame):
+    from stable_baselines3 import PPO
+    from backtest import ArrayTradingEnv
+
+    return PPO('MlpPolicy', ArrayTradingEnv(bars), seed=SEED, verbose=0)
+
+
+def bench_predict(args) -> Dict:
+    """Single-observation policy latency, through SB3 ``predict`` and the backtest fast path"""
+    from backtest import BacktestEngine, make_policy
+
+    bars = load_bars(args.symbol)
+    model = _untrained_model(bars)
+    obs = BacktestEngine().build_observations(bars)[:args.calls]
+    fast_predict = make_policy(model)
+
+    def latencies(fn):
+        samples = []
+        for row in obs:
+            start = time.perf_counter()
+            fn(row)
+            samples.append((time.perf_counter() - start) * 1e6)
+        return np.percentile(samples, [50, 95])
+
+    sb3 = np.median([latencies(lambda row: model.predict(row, deterministic=True)) for _ in range(args.repeat)], axis=0)
+    fast = np.median([latencies(fast_predict) for _ in range(args.repeat)], axis=0)
+    return {
+        'predict.sb3_p50_us': metric(sb3[0], 'us', False),
+        'predict.sb3_p95_us': metric(sb3[1], 'us', False),
+        'predict.fast_path_p50_us': metric(fast[0], 'us', False),
+        'predict.fast_path_p95_us': metric(fast[1], 'us', False)
+    }
+
+
+def bench_simulation(args) -> Dict:
+    """Wall time of a full backtest over the bundled history"""
+    from backtest import BacktestEngine
+
+    bars = load_bars(args.symbol)
+    model = _untrained_model(bars)
+
+    def wall_seconds():
+        start = time.perf_counter()
+        result = BacktestEngine(seed=SEED).run(model, bars, args.symbol)
+        if not result.get('success'):
+            raise RuntimeError(result.get('error', 'Simulation failed'))
+        return time.perf_counter() - start
+
+    seconds = median_of(args.repeat, wall_seconds)
+    return {
+        'simulation.wall_seconds': metric(seconds, 's', False),
+        'simulation.bars_per_second': metric(len(bars) / seconds, 'bars/s', True)
+    }
+
+
+def bench_database(args) -> Dict:
+    """``log_trade`` inserts per second against the scratch SQLite database"""
+    import database
+
+    database.create_tables()
+
+    def inserts_per_second():
+        start = time.perf_counter()
+        for i in range(args.inserts):
+            database.log_trade(args.symbol, 'buy' if i % 2 else 'sell', 10, 100.0 + i % 7, 'paper',
+                               0.1, 100000.0, 99000.0, 0, 10)
+        return args.inserts / (time.perf_counter() - start)
+
+    return {'db.inserts_per_second': metric(median_of(args.repeat, inserts_per_second), 'rows/s', True)}
+
+
+def bench_trading_logger(args) -> Dict:
+    """AdvancedTradingLogger append rate and query latency"""
+    from simple_app import AdvancedTradingLogger
+
+    def appends_per_second():
+        log_dir = tempfile.mkdtemp(dir=args.scratch_dir)
+        trading_logger = AdvancedTradingLogger(base_log_dir=log_dir)
+        start = time.perf_counter()
+        for i in range(args.log_entries):
+            trading_logger.log_trading_activity(args.symbol, 'PPO', 'buy' if i % 2 else 'sell',
+                                                {'quantity': 10, 'price': 100.0 + i % 7})
+        return args.log_entries / (time.perf_counter() - start)
+
+    log_dir = tempfile.mkdtemp(dir=args.scratch_dir)
+    trading_logger = AdvancedTradingLogger(base_log_dir=log_dir)
+    for i in range(args.log_entries):
+        trading_logger.log_trading_activity(args.symbol, 'PPO', 'hold', {'step': i})
+
+    def query_ms():
+        start = time.perf_counter()
+        logs = trading_logger.get_logs('stock', args.symbol)
+        if len(logs) != args.log_entries:
+            raise RuntimeError(f'Expected {args.log_entries} log entries, got {len(logs)}')
+        return (time.perf_counter() - start) * 1000
+
+    return {
+        'trading_logger.appends_per_second': metric(median_of(args.repeat, appends_per_second), 'entries/s', True),
+        'trading_logger.query_ms': metric(median_of(args.repeat, query_ms), 'ms', False)
+    }
+
+
+def bench_storage(args) -> Dict:
+    """Time to load a dataset for training: CSV parsing versus the memory-mapped columnar store"""
+    from columnar_store import load_columns, load_frame, write_dataset
+
+    files = sorted(f for f in os.listdir(DATA_DIR) if f.startswith(f'{args.symbol}_data_') and f.endswith('.csv'))
+    csv_path = max((os.path.join(DATA_DIR, f) for f in files), key=os.path.getsize)
+    dataset_path = os.path.join(args.scratch_dir, 'dataset')
+    write_dataset(pd.read_csv(csv_path), dataset_path)
+
+    def load_ms(fn):
+        def run():
+            start = time.perf_counter()
+            fn()
+            return (time.perf_counter() - start) * 1000
+        return median_of(args.repeat, run)
+
+    def read_csv():
+        df = pd.read_csv(csv_path)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+
+    csv_ms = load_ms(read_csv)
+    frame_ms = load_ms(lambda: load_frame(dataset_path))
+    return {
+        'storage.csv_load_ms': metric(csv_ms, 'ms', False),
+        'storage.columnar_frame_load_ms': metric(frame_ms, 'ms', False),
+        'storage.columnar_mmap_load_ms': metric(load_ms(lambda: load_columns(dataset_path)), 'ms', False),
+        'storage.frame_speedup_vs_csv': metric(csv_ms / frame_ms, 'x', True)
+    }
+
+
+BENCHMARKS = {
+    'env': bench_env,
+    'indicators': bench_indicators,
+    'predict': bench_predict,
+    'simulation': bench_simulation,
+    'database': bench_database,
+    'trading_logger': bench_trading_logger,
+    'storage': bench_storage
+}
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """Per-metric change against the baseline; ``regression`` when worse by more than ``tolerance``"""
+    rows = []
+    for name, current in results['metrics'].items():
+        previous = baseline.get('metrics', {}).get(name)
+        if not previous or not previous['value']:
+            continue
+        change = (current['value'] - previous['value']) / abs(previous['value'])
+        worse = -change if current['higher_is_better'] else change
+        rows.append({
+            'metric': name,
+            'baseline': previous['value'],
+            'current': current['value'],
+            'unit': current['unit'],
+            'change_pct': round(change * 100, 1),
+            'regression': worse > tolerance
+        })
+    return rows
+
+
+def run(args) -> Dict:
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise SystemExit(f'Unknown benchmarks: {", ".join(unknown)} (choose from {", ".join(BENCHMARKS)})')
+
+    args.scratch_dir = tempfile.mkdtemp(prefix='tradingbot-bench-')
+    # database.py reads DB_URL at import time
+    os.environ['DB_URL'] = f"sqlite:///{os.path.join(args.scratch_dir, 'bench.db')}"
+    os.environ.setdefault('POLYGON_API_KEY', '')
+
+    metrics, errors = {}, {}
+    try:
+        with offline_stubs():
+            for name in names:
+                print(f'Running {name}...', file=sys.stderr)
+                try:
+                    metrics.update(BENCHMARKS[name](args))
+                except Exception as e:
+                    errors[name] = f'{type(e).__name__}: {e}'
+    finally:
+        shutil.rmtree(args.scratch_dir, ignore_errors=True)
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'config': {key: value for key, value in vars(args).items() if key not in ('save_baseline', 'output', 'scratch_dir')},
+        'metrics': metrics,
+        'errors': errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the trading backend over the bundled market data')
+    parser.add_argument('--only', help='Comma-separated benchmarks: ' + ', '.join(BENCHMARKS))
+    parser.add_argument('--symbol', default='AAPL')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per benchmark; the median is reported')
+    parser.add_argument('--steps', type=int, default=1000, help='Environment steps per run')
+    parser.add_argument('--calls', type=int, default=500, help='predict() calls per run')
+    parser.add_argument('--inserts', type=int, default=200, help='Database inserts per run')
+    parser.add_argument('--log-entries', type=int, default=200, help='Trading logger entries per run')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown per metric')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    results = run(args)
+
+    for name, value in results['metrics'].items():
+        print(f"{name:48s} {value['value']:>14,.2f} {value['unit']}")
+    for name, error in results['errors'].items():
+        print(f'{name:48s} failed: {error}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    exit_code = 0
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nBaseline written to {args.baseline}')
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.tolerance)
+        print(f"\nCompared with baseline from {baseline.get('timestamp')} (tolerance {args.tolerance:.0%}):")
+        for row in rows:
+            flag = 'REGRESSION' if row['regression'] else 'ok'
+            print(f"{row['metric']:48s} {row['baseline']:>14,.2f} -> {row['current']:>14,.2f} "
+                  f"{row['change_pct']:+7.1f}%  {flag}")
+        if any(row['regression'] for row in rows):
+            exit_code = 1
+    else:
+        print(f'\nNo baseline at {args.baseline}; run with --save-baseline to create one')
+
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+Broadcast Queue
+Non-blocking, coalescing delivery of real-time updates to Pusher from a background sender
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastQueue:
+    """
+    Bounded queue of pending broadcasts drained by a background sender thread
+    Request handlers only enqueue. Repeated events for the same channel and
+    event name within ``coalesce_window`` seconds are merged into one delivery
+    carrying the latest payload. Due events are sent with ``trigger_batch``
+    when the client supports it, otherwise one ``trigger`` call per event.
+    """
+
+    # Pusher accepts at most 10 events per batch trigger
+    MAX_BATCH_SIZE = 10
+
+    def __init__(self, client, maxsize: int = None, coalesce_window: float = None,
+                 batch_size: int = None, latency_samples: int = 500):
+        self.client = client
+        self.maxsize = maxsize or int(os.getenv('BROADCAST_QUEUE_SIZE', 1000))
+        self.coalesce_window = (coalesce_window if coalesce_window is not None
+                                else float(os.getenv('BROADCAST_COALESCE_WINDOW', 0.25)))
+        self.batch_size = min(batch_size or self.MAX_BATCH_SIZE, self.MAX_BATCH_SIZE)
+        self.supports_batch = callable(getattr(client, 'trigger_batch', None))
+
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+        self._latencies = deque(maxlen=latency_samples)
+        self._stats = {
+            'submitted': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'delivered': 0,
+            'failed': 0,
+            'requests': 0
+        }
+
+    def submit(self, channel: str, event: str, data) -> bool:
+        """
+        Queue an event for delivery without blocking
+        Returns False when the queue was full and the oldest pending event was dropped.
+        """
+        self.start()
+        key = (channel, event)
+        accepted = True
+
+        with self._cond:
+            self._stats['submitted'] += 1
+            entry = self._pending.get(key)
+            if entry is not None:
+                # Keep the original enqueue time so latency covers the whole wait
+                entry['data'] = data
+                entry['count'] += 1
+                self._stats['coalesced'] += 1
+                return True
+
+            if len(self._pending) >= self.maxsize:
+                self._pending.popitem(last=False)
+                self._stats['dropped'] += 1
+                accepted = False
+
+            self._pending[key] = {
+                'channel': channel,
+                'event': event,
+                'data': data,
+                'count': 1,
+                'enqueued_at': time.monotonic()
+            }
+            self._cond.notify()
+
+        return accepted
+
+    def start(self):
+        """Start the background sender (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='broadcast-sender', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        """Flush pending events and stop the sender"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def get_stats(self) -> Dict:
+        """Get queue depth, delivery counters and delivery latency percentiles (ms)"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['queue_depth'] = len(self._pending)
+            latencies = sorted(self._latencies)
+
+        stats.update({
+            'queue_size': self.maxsize,
+            'coalesce_window_seconds': self.coalesce_window,
+            'batch_trigger': self.supports_batch,
+            'latency_avg_ms': sum(latencies) / len(latencies) if latencies else None,
+            'latency_p50_ms': self._percentile(latencies, 0.50),
+            'latency_p95_ms': self._percentile(latencies, 0.95),
+            'latency_max_ms': latencies[-1] if latencies else None
+        })
+        return stats
+
+    def _take_due(self):
+        """Wait for events whose coalesce window has elapsed and remove them from the queue"""
+        with self._cond:
+            while True:
+                if not self._pending:
+                    if self._stopping:
+                        return None
+                    self._cond.wait()
+                    continue
+
+                now = time.monotonic()
+                oldest = next(iter(self._pending.values()))
+                delay = oldest['enqueued_at'] + self.coalesce_window - now
+                if delay > 0 and not self._stopping:
+                    self._cond.wait(timeout=delay)
+                    continue
+
+                # Entries are ordered by first enqueue time, so the due ones form a prefix
+                due = []
+                while self._pending:
+                    key, entry = next(iter(self._pending.items()))
+                    if not self._stopping and entry['enqueued_at'] + self.coalesce_window > now:
+                        break
+                    del self._pending[key]
+                    due.append(entry)
+                return due
+
+    def _run(self):
+        while True:
+            due = self._take_due()
+            if due is None:
+                return
+            for i in range(0, len(due), self.batch_size):
+                self._deliver(due[i:i + self.batch_size])
+
+    def _deliver(self, entries):
+        if self.supports_batch and len(entries) > 1:
+            batch = [{'channel': e['channel'], 'name': e['event'], 'data': e['data']} for e in entries]
+            try:
+                self.client.trigger_batch(batch)
+                self._record(entries, delivered=True, requests=1)
+            except Exception as e:
+                logger.error(f"Error broadcasting batch of {len(entries)} updates: {e}")
+                self._record(entries, delivered=False, requests=1)
+            return
+
+        for entry in entries:
+            try:
+                self.client.trigger(entry['channel'], entry['event'], entry['data'])
+                self._record([entry], delivered=True, requests=1)
+            except Exception as e:
+                logger.error(f"Error broadcasting update {entry['channel']}/{entry['event']}: {e}")
+                self._record([entry], delivered=False, requests=1)
+
+    def _record(self, entries, delivered: bool, requests: int):
+        now = time.monotonic()
+        with self._cond:
+            self._stats['requests'] += requests
+            if delivered:
+                self._stats['delivered'] += len(entries)
+                for entry in entries:
+                    self._latencies.append((now - entry['enqueued_at']) * 1000)
+            else:
+                self._stats['failed'] += len(entries)
+
+    @staticmethod
+    def _percentile(sorted_samples, fraction: float) -> Optional[float]:
+        if not sorted_samples:
+            return None
+        index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+        return sorted_samples[index]
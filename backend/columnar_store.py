@@ -0,0 +1,217 @@
+"""
+Columnar Dataset Store
+Imported bar datasets as one typed ``.npy`` file per column plus a JSON manifest, loaded memory-mapped
+
+A dataset is a directory such as ``advanced_models/AAPL_data_3m/``. Timestamps
+are int64 nanoseconds (UTC), share counts are int64 and every other numeric
+column is float32. Readers map the column files instead of parsing text, so
+training jobs and worker processes reading the same dataset share one copy in
+the page cache. CSVs written by earlier versions are converted on start-up.
+"""
+
+import os
+import re
+import glob
+import json
+import shutil
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+
+# Stored as int64 when every value is whole; otherwise they fall back to float32
+INTEGER_COLUMNS = ('Volume', 'trade_count')
+
+
+def dataset_name(symbol: str, months: int, timeframe: str = None) -> str:
+    # Datasets at the default 5-minute bar size keep the name earlier imports used
+    return f'{symbol}_data_{months}m' + (f'_{timeframe}' if timeframe else '')
+
+
+def _column_file(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', name) + '.npy'
+
+
+def _encode(name: str, series: pd.Series) -> np.ndarray:
+    """Typed array for one column: int64 ns timestamps, int64 counts, float32 numbers, fixed-width text"""
+    if name == 'timestamp':
+        timestamps = pd.to_datetime(series, utc=True).dt.tz_localize(None)
+        return timestamps.to_numpy(dtype='datetime64[ns]').view(np.int64)
+    if pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+        return series.astype(str).to_numpy(dtype=str)
+
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    if (name in INTEGER_COLUMNS or pd.api.types.is_integer_dtype(series)) \
+            and np.isfinite(values).all() and (values == np.round(values)).all():
+        return values.astype(np.int64)
+    return values.astype(np.float32)
+
+
+class DatasetWriter:
+    """
+    Builds a dataset one column at a time, so a long history never has to be held as one frame
+    Columns go into a temporary directory that replaces the old dataset in one
+    rename on ``commit``, so readers never see a half-written dataset.
+    """
+
+    def __init__(self, path: str, rows: int):
+        self.path = path
+        self.rows = rows
+        self.columns = []
+        self.tmp_path = f'{path}.tmp-{os.getpid()}'
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+        os.makedirs(self.tmp_path)
+
+    def add(self, name: str, values) -> np.ndarray:
+        """Encode and save one column of ``rows`` values; returns the stored array"""
+        series = values if isinstance(values, pd.Series) else pd.Series(values)
+        if len(series) != self.rows:
+            raise ValueError(f'Column {name} has {len(series)} rows, expected {self.rows}')
+        encoded = _encode(name, series)
+        file_name = _column_file(name)
+        np.save(os.path.join(self.tmp_path, file_name), encoded, allow_pickle=False)
+        self.columns.append({
+            'name': name,
+            'dtype': 'datetime64[ns]' if name == 'timestamp' else encoded.dtype.str,
+            'file': file_name
+        })
+        return encoded
+
+    def commit(self, symbol: str = None, source: str = None, **extra) -> Dict:
+        """Write the manifest, swap the dataset into place and return the manifest"""
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'rows': self.rows,
+            'columns': self.columns,
+            'symbol': symbol,
+            'created': datetime.now().isoformat()
+        }
+        if self.rows and any(column['name'] == 'timestamp' for column in self.columns):
+            timestamps = np.load(os.path.join(self.tmp_path, _column_file('timestamp'))).view('datetime64[ns]')
+            manifest['start'] = str(pd.Timestamp(timestamps.min()))
+            manifest['end'] = str(pd.Timestamp(timestamps.max()))
+        if source:
+            stat = os.stat(source)
+            manifest['source'] = {'path': os.path.abspath(source), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        manifest.update(extra)
+
+        with open(os.path.join(self.tmp_path, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        old_path = f'{self.path}.old-{os.getpid()}'
+        if os.path.exists(self.path):
+            os.replace(self.path, old_path)
+        os.replace(self.tmp_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        return manifest
+
+    def discard(self):
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+
+def write_dataset(df: pd.DataFrame, path: str, source: Optional[str] = None, **extra) -> Dict:
+    """Write ``df`` as a columnar dataset at ``path`` and return its manifest"""
+    if 'timestamp' not in df.columns and isinstance(df.index, pd.DatetimeIndex):
+        df = df.reset_index(names='timestamp')
+
+    writer = DatasetWriter(path, len(df))
+    try:
+        for name in df.columns:
+            writer.add(str(name), df[name])
+        symbol = str(df['symbol'].iloc[0]) if 'symbol' in df.columns and len(df) else None
+        return writer.commit(symbol=symbol, source=source, **extra)
+    except Exception:
+        writer.discard()
+        raise
+
+
+def read_manifest(path: str) -> Dict:
+    with open(os.path.join(path, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported dataset format {manifest.get('format_version')} in {path}")
+    return manifest
+
+
+def is_dataset(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, MANIFEST_NAME))
+
+
+def load_columns(path: str, columns: Iterable[str] = None, mmap: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Column arrays of a dataset, read-only and memory-mapped unless ``mmap`` is off
+    Timestamps come back as naive UTC ``datetime64[ns]``. Requested columns the
+    dataset does not have are left out.
+    """
+    wanted = set(columns) if columns is not None else None
+    data = {}
+    for column in read_manifest(path)['columns']:
+        if wanted is not None and column['name'] not in wanted:
+            continue
+        values = np.load(os.path.join(path, column['file']), mmap_mode='r' if mmap else None, allow_pickle=False)
+        data[column['name']] = values.view('datetime64[ns]') if column['name'] == 'timestamp' else values
+    return data
+
+
+def load_frame(path: str, columns: Iterable[str] = None) -> pd.DataFrame:
+    """In-memory frame of a dataset, with ``timestamp`` as UTC-aware datetimes like the old CSV reader"""
+    df = pd.DataFrame(load_columns(path, columns))
+    if 'timestamp' in df.columns:
+        df['timestamp'] = df['timestamp'].dt.tz_localize('UTC')
+    return df
+
+
+def convert_csv(csv_path: str, path: str = None) -> Dict:
+    """Convert an imported CSV into a dataset next to it (same name without ``.csv``)"""
+    path = path or csv_path[:-len('.csv')]
+    return write_dataset(pd.read_csv(csv_path), path, source=csv_path)
+
+
+def _is_current(path: str, csv_path: str) -> bool:
+    try:
+        source = read_manifest(path).get('source')
+    except (OSError, ValueError):
+        return False
+    if source is None:
+        # Written by an import, which supersedes any CSV of the same name
+        return True
+    stat = os.stat(csv_path)
+    return source.get('mtime_ns') == stat.st_mtime_ns and source.get('size') == stat.st_size
+
+
+def migrate_csv_datasets(directory: str) -> List[str]:
+    """
+    Convert every ``{symbol}_data_{months}m.csv`` in ``directory`` that has no up-to-date dataset
+    The CSVs are left in place; a CSV that changes later is converted again
+    unless its dataset has since been re-imported.
+    Returns the paths of the datasets written.
+    """
+    converted = []
+    for csv_path in sorted(glob.glob(os.path.join(directory, '*_data_*.csv'))):
+        path = csv_path[:-len('.csv')]
+        if _is_current(path, csv_path):
+            continue
+        try:
+            manifest = convert_csv(csv_path, path)
+            converted.append(path)
+            logger.info(f"📦 Converted {os.path.basename(csv_path)} to columnar storage ({manifest['rows']} rows)")
+        except Exception as e:
+            logger.error(f"Error converting {csv_path}: {e}")
+    return converted
+
+
+def list_datasets(directory: str, symbol: str = None) -> List[str]:
+    """Dataset paths in ``directory`` sorted by name, optionally for one symbol"""
+    prefix = f'{symbol}_data_' if symbol else ''
+    return [
+        os.path.join(directory, name) for name in sorted(os.listdir(directory))
+        if '_data_' in name and '.' not in name and name.startswith(prefix)
+        and is_dataset(os.path.join(directory, name))
+    ]
@@ -3,13 +3,15 @@ Database Models and Connection Management
 Handles trade logging, configuration storage, and performance tracking
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, DateTime, Boolean, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from datetime import datetime
 import os
+import time
 import logging
 from dotenv import load_dotenv
+from metrics import metrics
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -22,6 +24,27 @@ Base = declarative_base()
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Statement timings for /metrics (db.write for INSERT/UPDATE/DELETE, db.read otherwise)
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+def _statement_span(statement: str) -> str:
+    return 'db.write' if statement.lstrip()[:6].upper() in WRITE_STATEMENTS else 'db.read'
+
+@event.listens_for(engine, 'before_cursor_execute')
+def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('statement_start', []).append(time.perf_counter())
+
+@event.listens_for(engine, 'after_cursor_execute')
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info['statement_start'].pop()
+    metrics.observe_span(_statement_span(statement), time.perf_counter() - start)
+
+@event.listens_for(engine, 'handle_error')
+def _record_statement_error(context):
+    starts = context.connection.info.get('statement_start') if context.connection is not None else None
+    if starts:
+        metrics.observe_span(_statement_span(context.statement or ''), time.perf_counter() - starts.pop(), error=True)
+
 # Database Models
 
 class Trade(Base):
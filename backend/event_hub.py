@@ -0,0 +1,275 @@
+"""
+In-Process Event Hub
+Publish/subscribe bus for trading and training updates, with Server-Sent Event streaming
+"""
+
+import json
+import queue
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """A subscriber's bounded event queue"""
+
+    def __init__(self, hub: 'EventHub', channels: Optional[Iterable[str]], maxsize: int):
+        self.hub = hub
+        self.channels = set(channels) if channels else None
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def wants(self, channel: str) -> bool:
+        return self.channels is None or channel in self.channels
+
+    def offer(self, event: Dict):
+        """Enqueue without blocking the publisher; the oldest event is dropped when full"""
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float = None) -> Optional[Dict]:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class EventHub:
+    """
+    Thread-safe publish/subscribe hub
+    Publishers never block: each subscriber has its own bounded queue. Recent
+    events are kept so reconnecting SSE clients can resume from Last-Event-ID.
+    """
+
+    def __init__(self, history_size: int = 500, subscriber_queue_size: int = 1000):
+        self.subscriber_queue_size = subscriber_queue_size
+        self._history = deque(maxlen=history_size)
+        self._subscribers = []
+        self._listeners = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, event: str, data) -> Dict:
+        """Publish an event to every subscriber of ``channel``"""
+        with self._lock:
+            message = {
+                'id': self._next_id,
+                'channel': channel,
+                'event': event,
+                'data': data,
+                'timestamp': datetime.now().isoformat()
+            }
+            self._next_id += 1
+            self._history.append(message)
+            subscribers = [s for s in self._subscribers if s.wants(channel)]
+            listeners = list(self._listeners)
+
+        for subscription in subscribers:
+            subscription.offer(message)
+
+        for listener in listeners:
+            try:
+                listener(message)
+            except Exception as e:
+                logger.error(f"Event listener error for {channel}/{event}: {e}")
+
+        return message
+
+    def subscribe(self, channels: Iterable[str] = None, last_event_id: int = None) -> Subscription:
+        """Subscribe to channels (all when None), replaying events after ``last_event_id``"""
+        subscription = Subscription(self, channels, self.subscriber_queue_size)
+        with self._lock:
+            if last_event_id is not None:
+                for message in self._history:
+                    if message['id'] > last_event_id and subscription.wants(message['channel']):
+                        subscription.offer(message)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def add_listener(self, listener: Callable[[Dict], None]):
+        """Register a synchronous callback invoked for every published event"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'last_event_id': self._next_id - 1,
+                'history_size': len(self._history),
+                'dropped_events': sum(s.dropped for s in self._subscribers)
+            }
+
+
+def merge_patch(old, new):
+    """
+    Build an RFC 7396 JSON merge patch that turns ``old`` into ``new``
+    Returns None when nothing changed.
+    """
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return None if old == new else new
+
+    patch = {}
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+        elif isinstance(value, dict) and isinstance(old[key], dict):
+            child = merge_patch(old[key], value)
+            if child is not None:
+                patch[key] = child
+        elif old[key] != value:
+            patch[key] = value
+    return patch or None
+
+
+class LiveState:
+    """
+    Cached snapshot of an expensive computation (e.g. /status)
+    The snapshot is recomputed once per change: when an event arrives on one of
+    ``invalidate_on`` channels, or after ``refresh_interval`` seconds. Changes
+    are published on ``channel`` as merge-patch ``delta`` events.
+    """
+
+    def __init__(self, hub: EventHub, compute: Callable[[], Dict], channel: str = 'status',
+                 invalidate_on: Iterable[str] = ('trading', 'training'),
+                 refresh_interval: float = 30, min_interval: float = 1.0):
+        self.hub = hub
+        self.compute = compute
+        self.channel = channel
+        self.invalidate_on = set(invalidate_on)
+        self.refresh_interval = refresh_interval
+        self.min_interval = min_interval
+
+        self._snapshot = None
+        self._computed_at = 0.0
+        self._dirty = threading.Event()
+        self._lock = threading.Lock()
+        self._compute_lock = threading.Lock()
+        self._thread = None
+        self._observers = []
+        self.compute_count = 0
+
+        hub.add_listener(self._on_event)
+
+    def start(self):
+        """Start the background recompute loop (idempotent)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=f'live-state-{self.channel}', daemon=True)
+            self._thread.start()
+
+    def add_observer(self, observer: Callable[[Dict], None]):
+        """Register a callback invoked with every recomputed snapshot"""
+        self._observers.append(observer)
+
+    def invalidate(self):
+        """Mark the snapshot stale; it is recomputed in the background"""
+        self._dirty.set()
+
+    def get(self) -> Dict:
+        """Get the current snapshot, computing it on first use"""
+        if self._snapshot is None:
+            self.refresh()
+        return self._snapshot
+
+    def refresh(self) -> Dict:
+        """Recompute now and publish a delta if anything changed"""
+        with self._compute_lock:
+            snapshot = self.compute()
+            self.compute_count += 1
+            with self._lock:
+                previous = self._snapshot
+                self._snapshot = snapshot
+                self._computed_at = time.monotonic()
+
+        patch = merge_patch(previous, snapshot) if previous is not None else None
+        if patch is not None:
+            self.hub.publish(self.channel, 'delta', patch)
+
+        for observer in list(self._observers):
+            try:
+                observer(snapshot)
+            except Exception as e:
+                logger.error(f"{self.channel} state observer error: {e}")
+        return snapshot
+
+    def _on_event(self, message: Dict):
+        if message['channel'] in self.invalidate_on:
+            self.invalidate()
+
+    def _run(self):
+        while True:
+            age = time.monotonic() - self._computed_at
+            self._dirty.wait(timeout=max(0.0, self.refresh_interval - age))
+            # Coalesce bursts of changes into one recomputation
+            since_last = time.monotonic() - self._computed_at
+            if since_last < self.min_interval:
+                time.sleep(self.min_interval - since_last)
+            self._dirty.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error recomputing {self.channel} state: {e}")
+                time.sleep(self.min_interval)
+
+
+def format_sse(message: Dict) -> str:
+    """Format a hub message as a Server-Sent Event frame"""
+    payload = json.dumps({
+        'channel': message['channel'],
+        'data': message['data'],
+        'timestamp': message['timestamp']
+    }, default=str)
+    frame = ''
+    if message.get('id') is not None:
+        frame += f"id: {message['id']}\n"
+    frame += f"event: {message['event']}\n"
+    frame += f"data: {payload}\n\n"
+    return frame
+
+
+def stream_events(hub: EventHub, channels: List[str] = None, last_event_id: int = None,
+                  initial: List[Dict] = None, heartbeat: float = 15):
+    """
+    Generator yielding SSE frames for a subscriber
+    ``initial`` messages (e.g. a full status snapshot) are sent first; a comment
+    heartbeat keeps idle connections open through proxies.
+    """
+    subscription = hub.subscribe(channels, last_event_id)
+    try:
+        yield "retry: 3000\n\n"
+        for message in initial or []:
+            yield format_sse(message)
+        while True:
+            message = subscription.get(timeout=heartbeat)
+            if message is None:
+                yield ": heartbeat\n\n"
+            else:
+                yield format_sse(message)
+    finally:
+        subscription.close()
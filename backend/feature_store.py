@@ -0,0 +1,243 @@
+"""
+Feature Store
+Process-wide registry of read-only feature arrays in shared memory, keyed by symbol, timeframe and range
+
+Environments of the same symbol - a training run's environment, its
+evaluation environment and the live agent's - reference one copy of a
+feature set instead of each holding a DataFrame of its own. Each set lives in
+one ``multiprocessing.shared_memory`` block; worker processes attach to it by
+its descriptor, a small picklable dict, without copying the arrays.
+"""
+
+import atexit
+import logging
+import threading
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Column offsets are aligned so every view starts on a cache line
+ALIGNMENT = 64
+
+
+def feature_key(symbol: str, timeframe: str, start, end) -> str:
+    return f'{symbol}:{timeframe}:{start}:{end}'
+
+
+def _open_block(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers attached blocks with the resource tracker
+        return shared_memory.SharedMemory(name=name)
+
+
+class FeatureSet:
+    """
+    Read-only columns of one symbol, timeframe and range in a shared memory block
+    ``columns`` are numpy views into the block. A text column with a single
+    value (such as ``symbol``) is stored as a constant, and timestamps with a
+    time zone are stored as UTC and localized again by ``frame``.
+    """
+
+    def __init__(self, key: str, block: shared_memory.SharedMemory, layout: Dict, owner: bool):
+        self.key = key
+        self.block = block
+        self.layout = layout
+        self.owner = owner
+        self.columns = {}
+        for column in layout['columns']:
+            values = np.ndarray((layout['rows'],), dtype=np.dtype(column['dtype']),
+                                buffer=block.buf, offset=column['offset'])
+            values.flags.writeable = False
+            self.columns[column['name']] = values
+
+    @classmethod
+    def create(cls, key: str, df: pd.DataFrame) -> 'FeatureSet':
+        """Copy ``df`` into a new block owned by this process"""
+        rows = len(df)
+        encoded, layout, offset = [], {'rows': rows, 'columns': [], 'constants': {}, 'order': []}, 0
+        for name in df.columns:
+            series = df[name]
+            layout['order'].append(name)
+            if isinstance(series.dtype, pd.DatetimeTZDtype):
+                values = series.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy()
+                tz = str(series.dt.tz)
+            elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_dtype(series):
+                values, tz = series.to_numpy(), None
+            elif rows and series.nunique(dropna=False) == 1:
+                layout['constants'][name] = series.iloc[0]
+                continue
+            else:
+                raise ValueError(f'Column {name} cannot be shared: {series.dtype}')
+
+            values = np.ascontiguousarray(values)
+            if values.dtype == object:
+                raise ValueError(f'Column {name} cannot be shared: {series.dtype}')
+            offset = -(-offset // ALIGNMENT) * ALIGNMENT
+            layout['columns'].append({'name': name, 'dtype': values.dtype.str, 'offset': offset, 'tz': tz})
+            encoded.append((offset, values))
+            offset += values.nbytes
+
+        block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for start, values in encoded:
+            block.buf[start:start + values.nbytes] = values.view(np.uint8)
+        return cls(key, block, layout, owner=True)
+
+    @classmethod
+    def attach(cls, descriptor: Dict) -> 'FeatureSet':
+        """Map a set created by another process"""
+        return cls(descriptor['key'], _open_block(descriptor['block']), descriptor['layout'], owner=False)
+
+    @property
+    def descriptor(self) -> Dict:
+        return {'key': self.key, 'block': self.block.name, 'layout': self.layout}
+
+    @property
+    def rows(self) -> int:
+        return self.layout['rows']
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self.columns.values())
+
+    def frame(self) -> pd.DataFrame:
+        """DataFrame over the shared columns; only zoned timestamps are copied"""
+        tz = {column['name']: column['tz'] for column in self.layout['columns']}
+        data = {}
+        for name in self.layout['order']:
+            if name in self.layout['constants']:
+                data[name] = pd.Series(self.layout['constants'][name], index=range(self.rows))
+            elif tz[name]:
+                data[name] = pd.Series(self.columns[name]).dt.tz_localize('UTC').dt.tz_convert(tz[name])
+            else:
+                data[name] = self.columns[name]
+        return pd.DataFrame(data, copy=False)
+
+    def close(self):
+        self.columns = {}
+        try:
+            self.block.close()
+        except BufferError:
+            # Frames handed out earlier still view the block; the mapping goes away with them
+            pass
+        if self.owner:
+            self.block.unlink()
+
+
+class FeatureRegistry:
+    """
+    Feature sets of this process, with a reference count per user
+    ``acquire`` returns the set for a key, building it only the first time;
+    every ``acquire`` is paired with a ``release`` and the block is freed
+    with its last reference. Sets attached from another process are
+    counted the same way but never unlinked here.
+    """
+
+    def __init__(self):
+        self._sets = {}
+        self._refs = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, build: Callable[[], pd.DataFrame]) -> FeatureSet:
+        with self._lock:
+            feature_set = self._sets.get(key)
+            if feature_set is not None:
+                self._refs[key] += 1
+                return feature_set
+
+        # Built outside the lock; a set published meanwhile by another thread wins
+        created = FeatureSet.create(key, build())
+        with self._lock:
+            feature_set = self._sets.get(key)
+            if feature_set is None:
+                feature_set = self._sets[key] = created
+                self._refs[key] = 0
+            self._refs[key] += 1
+        if feature_set is not created:
+            created.close()
+        return feature_set
+
+    def publish(self, key: str, df: pd.DataFrame) -> FeatureSet:
+        """``acquire`` for data that is already loaded"""
+        return self.acquire(key, lambda: df)
+
+    def attach(self, descriptor: Dict) -> FeatureSet:
+        """``acquire`` a set another process published, by its descriptor"""
+        key = descriptor['key']
+        with self._lock:
+            feature_set = self._sets.get(key)
+            if feature_set is None:
+                feature_set = self._sets[key] = FeatureSet.attach(descriptor)
+                self._refs[key] = 0
+            self._refs[key] += 1
+            return feature_set
+
+    def release(self, key: str):
+        with self._lock:
+            if key not in self._refs:
+                return
+            self._refs[key] -= 1
+            if self._refs[key] > 0:
+                return
+            del self._refs[key]
+            feature_set = self._sets.pop(key)
+        feature_set.close()
+
+    def get(self, key: str) -> Optional[FeatureSet]:
+        with self._lock:
+            return self._sets.get(key)
+
+    def memory_report(self) -> Dict:
+        """
+        Bytes held in shared memory and what separate copies would have cost
+        ``saved_bytes`` counts every reference after the first to a set as a
+        copy that did not have to be made.
+        """
+        with self._lock:
+            sets = [(key, feature_set, self._refs[key]) for key, feature_set in self._sets.items()]
+        rows = [{
+            'key': key,
+            'rows': feature_set.rows,
+            'columns': len(feature_set.columns),
+            'bytes': feature_set.nbytes,
+            'references': references,
+            'saved_bytes': feature_set.nbytes * max(references - 1, 0),
+            'owner': feature_set.owner
+        } for key, feature_set, references in sets]
+        shared = sum(row['bytes'] for row in rows)
+        saved = sum(row['saved_bytes'] for row in rows)
+        return {
+            'feature_sets': rows,
+            'references': sum(row['references'] for row in rows),
+            'shared_bytes': shared,
+            'saved_bytes': saved,
+            'unshared_bytes': shared + saved
+        }
+
+    def clear(self):
+        with self._lock:
+            sets, self._sets, self._refs = list(self._sets.values()), {}, {}
+        for feature_set in sets:
+            try:
+                feature_set.close()
+            except Exception as e:
+                logger.warning(f"Error freeing feature set {feature_set.key}: {e}")
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_feature_registry() -> FeatureRegistry:
+    """Process-wide registry; owned blocks are freed when the process exits"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = FeatureRegistry()
+            atexit.register(_registry.clear)
+    return _registry
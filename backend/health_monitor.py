@@ -0,0 +1,173 @@
+"""
+Integration Health Monitor
+Probes each external integration in the background on its own schedule and caches the results
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """
+    Runs registered health probes concurrently in background threads
+    Endpoints read the cached state via ``get_snapshot()`` instead of
+    making live external calls on every request.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self._probes = {}
+        self._results = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._executor = None
+        self._thread = None
+
+    def register(self, key: str, name: str, probe: Callable[[], Tuple[str, str]],
+                 interval: float = 30, error_message: str = 'Connection failed'):
+        """
+        Register a probe
+        ``probe`` returns ``(status, message)`` where status is connected, warning or error.
+        Exceptions are recorded as errors prefixed with ``error_message``.
+        """
+        with self._lock:
+            self._probes[key] = {
+                'name': name,
+                'probe': probe,
+                'interval': interval,
+                'error_message': error_message,
+                'next_run': 0.0,
+                'running': False
+            }
+            self._results[key] = {
+                'name': name,
+                'status': 'pending',
+                'message': 'Health check scheduled',
+                'last_check': None,
+                'latency_ms': None,
+                'last_success': None,
+                'last_success_monotonic': None,
+                'consecutive_failures': 0
+            }
+        self._wakeup.set()
+
+    def start(self):
+        """Start the background scheduler (idempotent)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='health-probe')
+            self._thread = threading.Thread(target=self._run, name='health-monitor', daemon=True)
+            self._thread.start()
+        logger.info(f"Health monitor started with {len(self._probes)} probes")
+
+    def stop(self, timeout: float = 5):
+        """Stop the scheduler and wait up to ``timeout`` seconds for in-flight probes"""
+        deadline = time.monotonic() + timeout
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        if self._executor is not None:
+            # shutdown(wait=True) has no timeout, and a probe can hang on the network
+            self._executor.shutdown(wait=False)
+            while time.monotonic() < deadline:
+                with self._lock:
+                    if not any(probe['running'] for probe in self._probes.values()):
+                        break
+                time.sleep(0.05)
+        self._thread = None
+        self._executor = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def refresh(self, key: str = None):
+        """Schedule one probe (or all probes) to run as soon as possible"""
+        with self._lock:
+            for probe_key, probe in self._probes.items():
+                if key is None or probe_key == key:
+                    probe['next_run'] = 0.0
+        self._wakeup.set()
+
+    def get_snapshot(self) -> Dict[str, Dict]:
+        """Get the cached state of every integration"""
+        now = time.monotonic()
+        with self._lock:
+            snapshot = {}
+            for key, result in self._results.items():
+                entry = dict(result)
+                success_at = entry.pop('last_success_monotonic')
+                entry['seconds_since_success'] = round(now - success_at, 3) if success_at is not None else None
+                snapshot[key] = entry
+            return snapshot
+
+    def _run(self):
+        executor = self._executor
+        while not self._stop.is_set():
+            self._wakeup.clear()
+            now = time.monotonic()
+            next_due = now + 60
+            due = []
+
+            with self._lock:
+                for key, probe in self._probes.items():
+                    if probe['running']:
+                        continue
+                    if probe['next_run'] <= now:
+                        probe['running'] = True
+                        due.append(key)
+                    else:
+                        next_due = min(next_due, probe['next_run'])
+
+            for key in due:
+                try:
+                    executor.submit(self._run_probe, key)
+                except RuntimeError:
+                    # Executor shut down while stopping
+                    return
+
+            # Sleep until the next probe is due; registrations and finished probes wake us early
+            self._wakeup.wait(timeout=max(0.0, next_due - time.monotonic()))
+
+    def _run_probe(self, key: str):
+        with self._lock:
+            probe = self._probes[key]
+            probe_fn = probe['probe']
+            error_message = probe['error_message']
+
+        start = time.perf_counter()
+        try:
+            status, message = probe_fn()
+        except Exception as e:
+            status, message = 'error', f'{error_message}: {str(e)}'
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            result = self._results[key]
+            result['status'] = status
+            result['message'] = message
+            result['last_check'] = datetime.now().isoformat()
+            result['latency_ms'] = round(latency_ms, 3)
+            if status == 'error':
+                result['consecutive_failures'] += 1
+            else:
+                result['consecutive_failures'] = 0
+                result['last_success'] = result['last_check']
+                result['last_success_monotonic'] = time.monotonic()
+
+            probe['running'] = False
+            probe['next_run'] = time.monotonic() + probe['interval']
+
+        self._wakeup.set()
+
@@ -0,0 +1,246 @@
+"""
+Historical Import
+Month-sized bar requests fetched concurrently under a shared rate limit, checkpointed to disk and resumable
+
+An import plans one chunk per calendar month of the requested range. Chunks are
+fetched by a small thread pool; each one is written to the checkpoint directory
+as a columnar dataset as soon as it arrives and is then dropped from memory. An
+import that fails or is interrupted keeps its finished chunks, and the next
+import of the same dataset fetches only the missing ones. The chunks are then
+joined column by column into the final dataset with indicators added.
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import DatasetWriter, is_dataset, load_columns, read_manifest, write_dataset
+from indicators import IndicatorEngine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEFRAME = '5Min'
+STATE_NAME = 'state.json'
+
+
+def plan_chunks(start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+    """``[start, end)`` split at calendar month boundaries"""
+    chunks = []
+    lo = start
+    while lo < end:
+        next_month = (lo.replace(day=1, hour=0, minute=0, second=0, microsecond=0) + pd.DateOffset(months=1)).to_pydatetime()
+        hi = min(end, next_month)
+        chunks.append((lo, hi))
+        lo = hi
+    return chunks
+
+
+class RateLimiter:
+    """
+    Allows at most ``max_calls`` calls in any ``period`` seconds across threads
+    ``acquire`` blocks until a slot is free. Alpaca's limit is per account, so
+    all imports share one limiter (see ``get_rate_limiter``).
+    """
+
+    def __init__(self, max_calls: int, period: float = 60.0):
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
+
+
+_rate_limiter = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter for historical bar requests (``IMPORT_REQUESTS_PER_MINUTE``)"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(int(os.getenv('IMPORT_REQUESTS_PER_MINUTE', 180)))
+    return _rate_limiter
+
+
+class ChunkedImport:
+    """
+    One resumable import: the chunk plan, the fetched chunks and their progress
+    ``fetch(start, end)`` returns the bars of one chunk as a frame with a
+    ``timestamp`` column (``None`` or empty when there are none). The plan is
+    saved with the checkpoint, so a resumed import keeps its original range
+    even when it is restarted on a later day.
+    """
+
+    def __init__(self, checkpoint_dir: str, fetch: Callable[[datetime, datetime], Optional[pd.DataFrame]],
+                 start: datetime, end: datetime, resume: bool = True, workers: int = None,
+                 rate_limiter: RateLimiter = None, retries: int = None):
+        self.checkpoint_dir = checkpoint_dir
+        self.fetch = fetch
+        self.workers = workers or int(os.getenv('IMPORT_WORKERS', 4))
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.retries = retries if retries is not None else int(os.getenv('IMPORT_RETRIES', 3))
+        self._lock = threading.Lock()
+
+        if not resume:
+            shutil.rmtree(checkpoint_dir, ignore_errors=True)
+        state_path = os.path.join(checkpoint_dir, STATE_NAME)
+        self.resumed = os.path.exists(state_path)
+        if self.resumed:
+            with open(state_path) as f:
+                self.state = json.load(f)
+            logger.info(f"Resuming import from {checkpoint_dir}: {self.chunks_done}/{len(self.state['chunks'])} chunks done")
+        else:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+            self.state = {
+                'start': start.isoformat(),
+                'end': end.isoformat(),
+                'chunks': [{'index': i, 'start': lo.isoformat(), 'end': hi.isoformat(), 'rows': None}
+                           for i, (lo, hi) in enumerate(plan_chunks(start, end))]
+            }
+            self._save_state()
+
+    @property
+    def start(self) -> datetime:
+        return datetime.fromisoformat(self.state['start'])
+
+    @property
+    def end(self) -> datetime:
+        return datetime.fromisoformat(self.state['end'])
+
+    @property
+    def chunks_done(self) -> int:
+        return sum(chunk['rows'] is not None for chunk in self.state['chunks'])
+
+    def progress(self) -> Dict:
+        with self._lock:
+            return {
+                'chunks_total': len(self.state['chunks']),
+                'chunks_done': self.chunks_done,
+                'rows': sum(chunk['rows'] or 0 for chunk in self.state['chunks'])
+            }
+
+    def fetch_all(self, on_progress: Callable[[int, int], None] = None) -> Dict:
+        """
+        Fetch every chunk that is not checkpointed yet
+        Raises ``RuntimeError`` when chunks still fail after the retries; the
+        finished ones stay on disk for the next attempt.
+        """
+        pending = [chunk for chunk in self.state['chunks'] if chunk['rows'] is None]
+        from_checkpoint = len(self.state['chunks']) - len(pending)
+        errors = []
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(pending) or 1)),
+                                thread_name_prefix='import') as executor:
+            futures = {executor.submit(self._fetch_chunk, chunk): chunk for chunk in pending}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Import chunk {chunk['start']} - {chunk['end']} failed: {e}")
+                    errors.append(str(e))
+                if on_progress:
+                    on_progress(self.chunks_done, len(self.state['chunks']))
+
+        if errors:
+            raise RuntimeError(f"{len(errors)} of {len(self.state['chunks'])} chunks failed ({errors[0]}). "
+                               f"Finished chunks are checkpointed; import again to resume.")
+        return {'chunks_total': len(self.state['chunks']), 'chunks_fetched': len(pending),
+                'chunks_from_checkpoint': from_checkpoint}
+
+    def _chunk_path(self, chunk: Dict) -> str:
+        return os.path.join(self.checkpoint_dir, f"chunk_{chunk['index']:04d}")
+
+    def _fetch_chunk(self, chunk: Dict):
+        lo, hi = datetime.fromisoformat(chunk['start']), datetime.fromisoformat(chunk['end'])
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                df = self.fetch(lo, hi)
+                break
+            except Exception as e:
+                if attempt == self.retries or 'subscription does not permit' in str(e):
+                    raise
+                time.sleep(2 ** attempt)
+
+        rows = 0 if df is None else len(df)
+        if rows:
+            write_dataset(df, self._chunk_path(chunk))
+        with self._lock:
+            chunk['rows'] = rows
+            self._save_state()
+
+    def _save_state(self):
+        state_path = os.path.join(self.checkpoint_dir, STATE_NAME)
+        with open(f'{state_path}.tmp', 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(f'{state_path}.tmp', state_path)
+
+    def assemble(self, path: str, engine: IndicatorEngine, **extra) -> Optional[Dict]:
+        """
+        Join the chunks into the dataset at ``path`` and add the indicator columns
+        Works one column at a time over memory-mapped chunks; bars repeated at a
+        chunk boundary are kept once. Returns the manifest, or ``None`` when the
+        range has no bars.
+        """
+        paths = [self._chunk_path(chunk) for chunk in self.state['chunks'] if chunk['rows']]
+        paths = [chunk_path for chunk_path in paths if is_dataset(chunk_path)]
+        if not paths:
+            return None
+
+        # Keep each bar once, in time order, even where chunk ranges touch
+        keep, last = [], None
+        for chunk_path in paths:
+            timestamps = load_columns(chunk_path, ('timestamp',))['timestamp']
+            mask = np.ones(len(timestamps), dtype=bool) if last is None else timestamps > last
+            keep.append(mask)
+            if mask.any():
+                last = timestamps[mask].max()
+        rows = int(sum(mask.sum() for mask in keep))
+
+        names = [column['name'] for column in read_manifest(paths[0])['columns']]
+        writer = DatasetWriter(path, rows)
+        try:
+            # Only the indicator inputs are kept once written
+            inputs = {}
+            for name in names:
+                parts = [load_columns(chunk_path, (name,)).get(name) for chunk_path in paths]
+                if any(part is None for part in parts):
+                    continue
+                values = writer.add(name, np.concatenate([part[mask] for part, mask in zip(parts, keep)]))
+                if name in ('Close', 'Volume', 'symbol'):
+                    inputs[name] = values
+
+            volume = inputs['Volume'].astype(np.float64) if 'Volume' in inputs else None
+            for name, values in engine.compute(inputs['Close'].astype(np.float64), volume).items():
+                writer.add(name, values)
+
+            symbol = str(inputs['symbol'][0]) if 'symbol' in inputs and rows else None
+            return writer.commit(symbol=symbol, **extra)
+        except Exception:
+            writer.discard()
+            raise
+
+    def discard(self):
+        """Remove the checkpoint once the dataset is written"""
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
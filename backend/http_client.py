@@ -0,0 +1,188 @@
+"""
+Pooled HTTP Client
+Shared keep-alive sessions with per-host connection pools, retries and latency stats
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PooledHTTPClient:
+    """
+    Thread-safe HTTP client that keeps one pooled session per host
+    Connections are reused across calls, so repeated Alpaca requests skip the
+    TCP and TLS handshake. Latency is recorded per logical endpoint.
+    """
+
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+    def __init__(self, pool_maxsize: int = None, retries: int = None,
+                 backoff_factor: float = None, host_pool_sizes: Dict[str, int] = None,
+                 latency_samples: int = 500):
+        self.pool_maxsize = pool_maxsize or int(os.getenv('HTTP_POOL_MAXSIZE', 10))
+        self.retries = retries if retries is not None else int(os.getenv('HTTP_RETRIES', 2))
+        self.backoff_factor = backoff_factor if backoff_factor is not None else float(os.getenv('HTTP_BACKOFF_FACTOR', 0.3))
+        self.host_pool_sizes = dict(host_pool_sizes or {})
+        self.latency_samples = latency_samples
+
+        self._sessions = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, endpoint: str = None, **kwargs) -> requests.Response:
+        """Issue a GET request through the pooled session for the URL's host"""
+        return self.request('GET', url, endpoint=endpoint, **kwargs)
+
+    def post(self, url: str, endpoint: str = None, **kwargs) -> requests.Response:
+        """Issue a POST request through the pooled session for the URL's host"""
+        return self.request('POST', url, endpoint=endpoint, **kwargs)
+
+    def request(self, method: str, url: str, endpoint: str = None, **kwargs) -> requests.Response:
+        """
+        Send a request and record its latency under ``endpoint``
+        ``endpoint`` is a stable label (e.g. ``alpaca.account``); the URL path is
+        used when it is omitted.
+        """
+        parts = urlsplit(url)
+        session = self._get_session(parts.scheme, parts.netloc)
+        label = endpoint or f"{method} {parts.netloc}{parts.path}"
+
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except Exception:
+            self._record(label, endpoint, time.perf_counter() - start, error=True)
+            raise
+
+        self._record(label, endpoint, time.perf_counter() - start, error=response.status_code >= 400)
+        return response
+
+    def set_host_pool_size(self, host: str, pool_maxsize: int):
+        """Override the connection pool size for one host; its session is recreated on next use"""
+        with self._lock:
+            self.host_pool_sizes[host] = pool_maxsize
+            stale = [key for key in self._sessions if key[1] == host]
+            for key in stale:
+                self._sessions.pop(key).close()
+
+    def get_latency_stats(self) -> Dict[str, Dict]:
+        """Return per-endpoint request counts, error counts and latency percentiles (ms)"""
+        with self._lock:
+            snapshot = {label: (dict(stat), list(stat['samples'])) for label, stat in self._stats.items()}
+
+        stats = {}
+        for label, (stat, samples) in snapshot.items():
+            samples.sort()
+            stats[label] = {
+                'count': stat['count'],
+                'errors': stat['errors'],
+                'avg_ms': stat['total_ms'] / stat['count'] if stat['count'] else 0.0,
+                'max_ms': stat['max_ms'],
+                'last_ms': stat['last_ms'],
+                'p50_ms': self._percentile(samples, 0.50),
+                'p95_ms': self._percentile(samples, 0.95)
+            }
+        return stats
+
+    def reset_stats(self):
+        """Clear all recorded latency statistics"""
+        with self._lock:
+            self._stats.clear()
+
+    def close(self):
+        """Close every pooled session"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def _get_session(self, scheme: str, host: str) -> requests.Session:
+        key = (scheme, host)
+        session = self._sessions.get(key)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._create_session(scheme, host)
+                self._sessions[key] = session
+            return session
+
+    def _create_session(self, scheme: str, host: str) -> requests.Session:
+        pool_size = self.host_pool_sizes.get(host, self.pool_maxsize)
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.RETRY_STATUS_CODES,
+            allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              max_retries=retry, pool_block=False)
+
+        session = requests.Session()
+        session.mount(f"{scheme}://{host}", adapter)
+        logger.info(f"Created pooled HTTP session for {host} (pool size {pool_size})")
+        return session
+
+    def _record(self, label: str, endpoint: Optional[str], elapsed: float, error: bool = False):
+        # Only explicit endpoint labels become metric series; raw URLs would explode cardinality
+        metrics.observe_span(endpoint or 'http.unlabelled', elapsed, error)
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            stat = self._stats.get(label)
+            if stat is None:
+                stat = {
+                    'count': 0,
+                    'errors': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'last_ms': 0.0,
+                    'samples': deque(maxlen=self.latency_samples)
+                }
+                self._stats[label] = stat
+            stat['count'] += 1
+            stat['errors'] += 1 if error else 0
+            stat['total_ms'] += elapsed_ms
+            stat['max_ms'] = max(stat['max_ms'], elapsed_ms)
+            stat['last_ms'] = elapsed_ms
+            stat['samples'].append(elapsed_ms)
+
+    @staticmethod
+    def _percentile(sorted_samples, fraction: float) -> Optional[float]:
+        if not sorted_samples:
+            return None
+        index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+        return sorted_samples[index]
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> PooledHTTPClient:
+    """Get the process-wide pooled HTTP client shared by all modules"""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = PooledHTTPClient()
+    return _default_client
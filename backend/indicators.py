@@ -0,0 +1,372 @@
+"""
+Technical Indicators
+Vectorized NumPy indicator engine shared by the trading environment, training data import and simulations
+"""
+
+import os
+import re
+import math
+import logging
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEATURES = ('RSI', 'MACD', 'Signal', 'MA_20', 'MA_50', 'BB_upper', 'BB_lower', 'Volume_MA', 'Volume_Ratio')
+
+# Value of a feature when there are too few bars to compute it (RSI 50 is neutral)
+NEUTRAL_VALUES = {'RSI': 50.0}
+
+# Moving averages of any window: MA_5, MA_200, ...
+MA_FEATURE = re.compile(r'MA_(\d+)')
+
+# Largest (1 - alpha) ** -k inside one EMA chunk; well short of float64 overflow
+EMA_CHUNK_GROWTH = 1e100
+
+
+def ema(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Exponential moving average ``y[t] = (1 - alpha) * y[t-1] + alpha * x[t]`` with ``y[0] = x[0]``
+    Same as pandas ``ewm(alpha=alpha, adjust=False).mean()``. The recursion is
+    solved in closed form over chunks short enough that ``(1 - alpha) ** -k``
+    stays finite, so each chunk is a cumulative sum rather than a Python loop.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty_like(values)
+    if len(values) == 0:
+        return out
+    decay = 1.0 - alpha
+    if decay <= 0:
+        out[:] = values
+        return out
+
+    chunk = max(1, int(np.log(EMA_CHUNK_GROWTH) / -np.log(decay)))
+    powers = decay ** np.arange(1, chunk + 1)
+    out[0] = previous = values[0]
+    for start in range(1, len(values), chunk):
+        segment = values[start:start + chunk]
+        scale = powers[:len(segment)]
+        out[start:start + len(segment)] = scale * (previous + alpha * np.cumsum(segment / scale))
+        previous = out[start + len(segment) - 1]
+    return out
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over ``window`` values; NaN until the window is full"""
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        cumulative = np.concatenate(([0.0], np.cumsum(values)))
+        out[window - 1:] = (cumulative[window:] - cumulative[:-window]) / window
+    return out
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing sample standard deviation (ddof=1) over ``window`` values; NaN until the window is full"""
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window).std(axis=1, ddof=1)
+    return out
+
+
+def backfill(values: np.ndarray, default: float = 0.0) -> np.ndarray:
+    """Fill the warm-up period with the first valid value (``default`` if there is none), like ``bfill().fillna()``"""
+    valid = np.isfinite(values)
+    if valid.all():
+        return values
+    if not valid.any():
+        return np.full_like(values, default)
+    # Warm-up NaNs take the next valid value; any later gap is carried backwards the same way
+    index = np.where(valid, np.arange(len(values)), len(values))
+    next_valid = np.minimum.accumulate(index[::-1])[::-1]
+    filled = values[np.minimum(next_valid, len(values) - 1)]
+    return np.where(next_valid < len(values), filled, default)
+
+
+class IndicatorEngine:
+    """
+    Computes a configurable set of indicator columns from close and volume arrays
+    Definitions follow the ``ta`` library: Wilder-smoothed RSI, MACD from
+    ``adjust=False`` EMAs, simple moving averages and Bollinger Bands from the
+    sample standard deviation. Intermediates shared by several features (price
+    differences, EMAs, the Bollinger mean) are computed once per call. Warm-up
+    values are back-filled so every feature is defined from the first bar.
+    """
+
+    def __init__(self, features: Iterable[str] = None, rsi_period: int = 14, macd_fast: int = 12,
+                 macd_slow: int = 26, macd_signal: int = 9, bb_period: int = 20, bb_std: float = 2.0,
+                 volume_period: int = 20):
+        self.features = tuple(features or DEFAULT_FEATURES)
+        self.rsi_period = rsi_period
+        self.macd_fast = macd_fast
+        self.macd_slow = macd_slow
+        self.macd_signal = macd_signal
+        self.bb_period = bb_period
+        self.bb_std = bb_std
+        self.volume_period = volume_period
+
+        known = set(DEFAULT_FEATURES)
+        unknown = [name for name in self.features if name not in known and not MA_FEATURE.fullmatch(name)]
+        if unknown:
+            raise ValueError(f'Unknown indicator features: {", ".join(unknown)}')
+
+    def compute(self, close: np.ndarray, volume: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """Feature arrays keyed by column name, all of ``len(close)``"""
+        close = np.asarray(close, dtype=np.float64)
+        volume = np.zeros_like(close) if volume is None else np.asarray(volume, dtype=np.float64)
+        cache = {}
+
+        def shared(key, fn):
+            if key not in cache:
+                cache[key] = fn()
+            return cache[key]
+
+        features = {}
+        for name in self.features:
+            if name == 'RSI':
+                features[name] = self._rsi(close)
+            elif name in ('MACD', 'Signal'):
+                macd = shared('macd', lambda: self._macd(close))
+                features[name] = macd if name == 'MACD' else shared('signal', lambda: self._signal(macd))
+            elif name in ('BB_upper', 'BB_lower'):
+                mean = shared('bb_mean', lambda: rolling_mean(close, self.bb_period))
+                width = shared('bb_width', lambda: self.bb_std * rolling_std(close, self.bb_period))
+                features[name] = mean + width if name == 'BB_upper' else mean - width
+            elif name in ('Volume_MA', 'Volume_Ratio'):
+                volume_ma = shared('volume_ma', lambda: rolling_mean(volume, self.volume_period))
+                if name == 'Volume_MA':
+                    features[name] = volume_ma
+                else:
+                    features[name] = np.divide(volume, volume_ma, out=np.full_like(volume, np.nan),
+                                               where=volume_ma > 0)
+            else:
+                features[name] = rolling_mean(close, int(MA_FEATURE.fullmatch(name).group(1)))
+
+        return {name: backfill(values, NEUTRAL_VALUES.get(name, 0.0)) for name, values in features.items()}
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add the feature columns to ``df`` (in place) and return it"""
+        volume = df['Volume'].to_numpy(dtype=np.float64) if 'Volume' in df.columns else None
+        for name, values in self.compute(df['Close'].to_numpy(dtype=np.float64), volume).items():
+            df[name] = values
+        return df
+
+    def streaming(self) -> 'StreamingIndicators':
+        """Incremental counterpart with the same features and parameters"""
+        return StreamingIndicators(self)
+
+    def _rsi(self, close: np.ndarray) -> np.ndarray:
+        rsi = np.full(len(close), np.nan)
+        if len(close) < self.rsi_period:
+            return rsi
+        # Bar 0 has no change and counts as zero gain and zero loss, as in ta
+        delta = np.concatenate(([0.0], np.diff(close)))
+        alpha = 1.0 / self.rsi_period
+        gain = ema(np.maximum(delta, 0.0), alpha)
+        loss = ema(np.maximum(-delta, 0.0), alpha)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+        rsi[self.rsi_period - 1:] = values[self.rsi_period - 1:]
+        return rsi
+
+    def _macd(self, close: np.ndarray) -> np.ndarray:
+        macd = ema(close, 2.0 / (self.macd_fast + 1)) - ema(close, 2.0 / (self.macd_slow + 1))
+        macd[:self.macd_slow - 1] = np.nan
+        return macd
+
+    def _signal(self, macd: np.ndarray) -> np.ndarray:
+        signal = np.full(len(macd), np.nan)
+        start = self.macd_slow - 1
+        if len(macd) > start:
+            signal[start:] = ema(macd[start:], 2.0 / (self.macd_signal + 1))
+            signal[:start + self.macd_signal - 1] = np.nan
+        return signal
+
+
+class RollingWindow:
+    """
+    Mean and sample standard deviation of the last ``size`` values, updated in O(1)
+    Running sums are kept relative to a shift near the data (so squares stay
+    small) and re-summed from the window every ``RESYNC_INTERVAL`` updates to
+    stop rounding drift from accumulating.
+    """
+
+    RESYNC_INTERVAL = 1024
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._updates = 0
+
+    def push(self, value: float):
+        if len(self.values) == self.size:
+            old = self.values[0] - self._shift
+            self._sum -= old
+            self._sum_sq -= old * old
+        self.values.append(value)
+        self._updates += 1
+        if self._updates % self.RESYNC_INTERVAL == 0 or len(self.values) == 1:
+            self._resync()
+        else:
+            new = value - self._shift
+            self._sum += new
+            self._sum_sq += new * new
+
+    def extend(self, values: np.ndarray):
+        """Seed from history: only the last ``size`` values matter"""
+        self.values.extend(float(v) for v in values[-self.size:])
+        self._resync()
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def mean(self) -> float:
+        return self._shift + self._sum / len(self.values) if self.full else math.nan
+
+    def std(self) -> float:
+        if not self.full or self.size < 2:
+            return math.nan
+        variance = (self._sum_sq - self._sum * self._sum / self.size) / (self.size - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def _resync(self):
+        self._shift = sum(self.values) / len(self.values) if self.values else 0.0
+        self._sum = sum(v - self._shift for v in self.values)
+        self._sum_sq = sum((v - self._shift) ** 2 for v in self.values)
+
+
+class StreamingIndicators:
+    """
+    Stateful indicators that advance one bar at a time in constant time
+    ``prime`` catches up on history with the vectorized functions above, then
+    each ``update`` applies the EMA recursions and rolling windows to one new
+    bar. After the warm-up period values match ``IndicatorEngine.compute`` on
+    the same bars to floating-point tolerance; during warm-up, where the batch
+    engine back-fills from later bars, a feature reports its neutral value.
+    """
+
+    def __init__(self, engine: IndicatorEngine):
+        self.engine = engine
+        self.features = engine.features
+        self.reset()
+
+    def reset(self):
+        engine = self.engine
+        self.count = 0
+        self.last_close = None
+        self.gain = self.loss = None
+        self.fast = self.slow = None
+        self.signal = None
+        self.signal_count = 0
+        # One window per distinct (series, size); Bollinger and MA_20 share the close window
+        self.close_windows = {size: RollingWindow(size) for size in self._close_window_sizes()}
+        self.volume_window = RollingWindow(engine.volume_period)
+        self.values = {}
+
+    def prime(self, close: np.ndarray, volume: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """Reset and load the state a full pass over ``close``/``volume`` would leave behind"""
+        engine = self.engine
+        close = np.asarray(close, dtype=np.float64)
+        volume = np.zeros_like(close) if volume is None else np.asarray(volume, dtype=np.float64)
+        self.reset()
+        if len(close) == 0:
+            return self.values
+
+        self.count = len(close)
+        self.last_close = float(close[-1])
+        delta = np.concatenate(([0.0], np.diff(close)))
+        self.gain = float(ema(np.maximum(delta, 0.0), 1.0 / engine.rsi_period)[-1])
+        self.loss = float(ema(np.maximum(-delta, 0.0), 1.0 / engine.rsi_period)[-1])
+        fast = ema(close, 2.0 / (engine.macd_fast + 1))
+        slow = ema(close, 2.0 / (engine.macd_slow + 1))
+        self.fast, self.slow = float(fast[-1]), float(slow[-1])
+        start = engine.macd_slow - 1
+        if len(close) > start:
+            self.signal = float(ema((fast - slow)[start:], 2.0 / (engine.macd_signal + 1))[-1])
+            self.signal_count = len(close) - start
+        for window in self.close_windows.values():
+            window.extend(close)
+        self.volume_window.extend(volume)
+
+        self.values = self._current(float(volume[-1]))
+        return self.values
+
+    def update(self, close: float, volume: float = 0.0) -> Dict[str, float]:
+        """Advance by one bar and return every feature's value at that bar"""
+        engine = self.engine
+        close, volume = float(close), float(volume)
+        delta = 0.0 if self.last_close is None else close - self.last_close
+        self.last_close = close
+        self.count += 1
+
+        self.gain = self._ema_step(self.gain, max(delta, 0.0), 1.0 / engine.rsi_period)
+        self.loss = self._ema_step(self.loss, max(-delta, 0.0), 1.0 / engine.rsi_period)
+        self.fast = self._ema_step(self.fast, close, 2.0 / (engine.macd_fast + 1))
+        self.slow = self._ema_step(self.slow, close, 2.0 / (engine.macd_slow + 1))
+        if self.count >= engine.macd_slow:
+            self.signal = self._ema_step(self.signal, self.fast - self.slow, 2.0 / (engine.macd_signal + 1))
+            self.signal_count += 1
+
+        for window in self.close_windows.values():
+            window.push(close)
+        self.volume_window.push(volume)
+
+        self.values = self._current(volume)
+        return self.values
+
+    @staticmethod
+    def _ema_step(previous: Optional[float], value: float, alpha: float) -> float:
+        return value if previous is None else previous + alpha * (value - previous)
+
+    def _close_window_sizes(self):
+        sizes = {self.engine.bb_period} if {'BB_upper', 'BB_lower'} & set(self.features) else set()
+        sizes.update(int(MA_FEATURE.fullmatch(name).group(1)) for name in self.features if MA_FEATURE.fullmatch(name))
+        return sizes
+
+    def _current(self, volume: float) -> Dict[str, float]:
+        engine = self.engine
+        values = {}
+        for name in self.features:
+            if name == 'RSI':
+                if self.count < engine.rsi_period:
+                    value = math.nan
+                else:
+                    value = 100.0 if self.loss == 0 else 100.0 - 100.0 / (1.0 + self.gain / self.loss)
+            elif name == 'MACD':
+                value = self.fast - self.slow if self.count >= engine.macd_slow else math.nan
+            elif name == 'Signal':
+                value = self.signal if self.signal_count >= engine.macd_signal else math.nan
+            elif name in ('BB_upper', 'BB_lower'):
+                window = self.close_windows[engine.bb_period]
+                width = engine.bb_std * window.std()
+                value = window.mean() + width if name == 'BB_upper' else window.mean() - width
+            elif name == 'Volume_MA':
+                value = self.volume_window.mean()
+            elif name == 'Volume_Ratio':
+                volume_ma = self.volume_window.mean()
+                value = volume / volume_ma if volume_ma > 0 else math.nan
+            else:
+                value = self.close_windows[int(MA_FEATURE.fullmatch(name).group(1))].mean()
+            values[name] = NEUTRAL_VALUES.get(name, 0.0) if math.isnan(value) else value
+        return values
+
+
+_engine = None
+
+
+def get_indicator_engine() -> IndicatorEngine:
+    """Process-wide engine; ``INDICATOR_FEATURES`` (comma-separated) overrides the default feature set"""
+    global _engine
+    if _engine is None:
+        configured = [name.strip() for name in os.getenv('INDICATOR_FEATURES', '').split(',') if name.strip()]
+        features = list(DEFAULT_FEATURES[:2]) + [name for name in configured if name not in DEFAULT_FEATURES[:2]]
+        # RSI and MACD feed the observation vector, so they are always computed
+        _engine = IndicatorEngine(features if configured else None)
+    return _engine
@@ -0,0 +1,145 @@
+"""
+Market Calendar
+Regular US equity sessions from a local holiday table, and the wake-up schedule trading loops follow
+
+The table (``market_calendar.csv``, or ``MARKET_CALENDAR_FILE``) lists every
+weekday the exchange is closed, with an empty ``close``, and every early close,
+with its closing time in New York. Days after the last year in the table are
+treated as regular weekdays until the next year's holidays are added.
+"""
+
+import os
+import csv
+import logging
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_TZ = ZoneInfo('America/New_York')
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+DEFAULT_CALENDAR_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'market_calendar.csv')
+
+
+class MarketCalendar:
+    """
+    Trading sessions of US equity markets
+    Times may be passed naive (local time, like ``datetime.now()``) or
+    timezone-aware, including bar timestamps in UTC; sessions are returned
+    as aware datetimes in New York time.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv('MARKET_CALENDAR_FILE', DEFAULT_CALENDAR_FILE)
+        self.holidays = set()
+        self.early_closes = {}
+
+        with open(self.path, newline='') as f:
+            for row in csv.DictReader(f):
+                day = date.fromisoformat(row['date'])
+                if row.get('close'):
+                    self.early_closes[day] = time.fromisoformat(row['close'])
+                else:
+                    self.holidays.add(day)
+        self.last_day = max(self.holidays | set(self.early_closes), default=date.min)
+        self._warned = False
+
+    @staticmethod
+    def to_exchange_time(now: datetime = None) -> datetime:
+        if now is None:
+            return datetime.now(EXCHANGE_TZ)
+        if hasattr(now, 'to_pydatetime'):
+            now = now.to_pydatetime()
+        return now.astimezone(EXCHANGE_TZ)
+
+    def session(self, day: date) -> Optional[Tuple[datetime, datetime]]:
+        """Open and close of ``day``, or ``None`` when the market does not trade"""
+        if day.weekday() >= 5 or day in self.holidays:
+            return None
+        if day.year > self.last_day.year and not self._warned:
+            self._warned = True
+            logger.warning(f"Market calendar {self.path} ends in {self.last_day.year}; "
+                           f"holidays after that are not known")
+        close = self.early_closes.get(day, REGULAR_CLOSE)
+        return (datetime.combine(day, REGULAR_OPEN, EXCHANGE_TZ),
+                datetime.combine(day, close, EXCHANGE_TZ))
+
+    def current_session(self, now: datetime = None) -> Optional[Tuple[datetime, datetime]]:
+        """The session in progress at ``now``, if any"""
+        now = self.to_exchange_time(now)
+        session = self.session(now.date())
+        if session is not None and session[0] <= now < session[1]:
+            return session
+        return None
+
+    def is_open(self, now: datetime = None) -> bool:
+        return self.current_session(now) is not None
+
+    def next_open(self, now: datetime = None) -> datetime:
+        """First session open after ``now``"""
+        now = self.to_exchange_time(now)
+        day = now.date()
+        # The longest US market closure on record is well under two weeks
+        for _ in range(14):
+            session = self.session(day)
+            if session is not None and session[0] > now:
+                return session[0]
+            day += timedelta(days=1)
+        raise ValueError(f'No market session within two weeks of {now}')
+
+
+_calendar = None
+
+
+def get_market_calendar() -> MarketCalendar:
+    """Process-wide calendar loaded from ``MARKET_CALENDAR_FILE``"""
+    global _calendar
+    if _calendar is None:
+        _calendar = MarketCalendar()
+    return _calendar
+
+
+class TradingScheduler:
+    """
+    Decides how long a trading loop sleeps between decisions
+    While the market is closed the loop sleeps until the next open. In the
+    first and last ``edge_minutes`` of a session, when prices move most, it
+    wakes every ``edge_interval`` seconds, otherwise every ``interval``
+    seconds, and never sleeps past the close. ``wake`` cuts a sleep short,
+    so stopping a loop does not wait for a weekend to end.
+    """
+
+    def __init__(self, calendar: MarketCalendar = None, interval: float = None,
+                 edge_interval: float = None, edge_minutes: float = None):
+        self.calendar = calendar or get_market_calendar()
+        self.interval = interval or float(os.getenv('POLLING_INTERVAL', 30))
+        self.edge_interval = edge_interval or float(os.getenv('SCHEDULER_EDGE_INTERVAL', 10))
+        self.edge_minutes = edge_minutes if edge_minutes is not None else float(os.getenv('SCHEDULER_EDGE_MINUTES', 15))
+        self._wake = threading.Event()
+
+    def next_delay(self, now: datetime = None) -> float:
+        """Seconds from ``now`` until the loop should run again"""
+        now = self.calendar.to_exchange_time(now)
+        session = self.calendar.current_session(now)
+        if session is None:
+            return (self.calendar.next_open(now) - now).total_seconds()
+
+        market_open, market_close = session
+        edge = timedelta(minutes=self.edge_minutes)
+        if now < market_open + edge or now >= market_close - edge:
+            interval = self.edge_interval
+        else:
+            interval = self.interval
+        return min(interval, (market_close - now).total_seconds())
+
+    def sleep(self, seconds: float = None) -> bool:
+        """Sleep ``seconds`` (default: ``next_delay()``); returns True when woken early"""
+        woken = self._wake.wait(self.next_delay() if seconds is None else seconds)
+        self._wake.clear()
+        return woken
+
+    def wake(self):
+        self._wake.set()
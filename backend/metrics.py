@@ -0,0 +1,330 @@
+"""
+Prometheus Metrics
+Request latency histograms per route and status, internal span timings, exposed in Prometheus text format
+"""
+
+import os
+import glob
+import json
+import time
+import logging
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers fast cache hits up to slow model inference and broker timeouts
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # Per-bucket counts plus an overflow slot; made cumulative when rendered
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[labelvalues] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> Dict[Tuple, list]:
+        """``{label values: [bucket counts, sum, count]}``"""
+        with self._lock:
+            return {labels: [list(series[0]), series[1], series[2]] for labels, series in self._series.items()}
+
+    def render(self, others: Iterable[Dict[Tuple, list]] = ()) -> List[str]:
+        """``others`` are snapshots of other processes, added to this one's series"""
+        merged = self.snapshot()
+        for other in others:
+            for labels, (counts, total, count) in other.items():
+                series = merged.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0, 0])
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+                series[2] += count
+
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total, count) in sorted(merged.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, labels)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, labels)} {count}')
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by label values"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def snapshot(self) -> Dict[Tuple, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self, others: Iterable[Dict[Tuple, float]] = ()) -> List[str]:
+        """``others`` are snapshots of other processes, added to this one's values"""
+        merged = self.snapshot()
+        for other in others:
+            for labels, value in other.items():
+                merged[labels] = merged.get(labels, 0) + value
+
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(merged.items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {value}')
+        return lines
+
+
+class Gauge:
+    """
+    Gauge read from a callback at scrape time
+    The callback returns a number, or a dict mapping label-value tuples to numbers.
+    """
+
+    metric_type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Union[float, Dict[Tuple, float]]],
+                 labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+        try:
+            value = self.callback()
+        except Exception as e:
+            logger.debug(f"Gauge {self.name} callback failed: {e}")
+            return []
+        if value is None:
+            return []
+
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        samples = value.items() if isinstance(value, dict) else [((), value)]
+        for labels, sample in samples:
+            if sample is not None:
+                lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {sample}')
+        return lines
+
+
+class CallbackCounter(Gauge):
+    """Counter kept by another component and read from a callback at scrape time"""
+
+    metric_type = 'counter'
+
+
+class _Span:
+    """Context manager recording a block's duration (and whether it raised) as a span"""
+
+    __slots__ = ('registry', 'name', 'start')
+
+    def __init__(self, registry: 'MetricsRegistry', name: str):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe_span(self.name, time.perf_counter() - self.start, exc_type is not None)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics
+    Request middleware records ``tradingbot_http_request_duration_seconds`` per
+    method, route rule and status; ``span()`` times internal calls (broker,
+    news, sentiment, model predict, database) into
+    ``tradingbot_span_duration_seconds``. Under a pre-forking server ``share``
+    merges these across processes.
+    """
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            'tradingbot_http_request_duration_seconds',
+            'HTTP request latency by method, route and status code',
+            ('method', 'route', 'status')
+        )
+        self.span_duration = Histogram(
+            'tradingbot_span_duration_seconds',
+            'Latency of internal operations (broker calls, news, sentiment, predict, database)',
+            ('span',)
+        )
+        self.span_errors = Counter(
+            'tradingbot_span_errors_total',
+            'Internal operations that raised an exception',
+            ('span',)
+        )
+        self._metrics = [self.request_duration, self.span_duration, self.span_errors]
+        self._lock = threading.Lock()
+        self._share_dir = None
+        self._share_path = None
+
+    def register_gauge(self, name: str, documentation: str, callback: Callable,
+                       labelnames: Sequence[str] = ()):
+        """Expose a value computed at scrape time (queue depths, cache sizes, ...)"""
+        self._register(Gauge(name, documentation, callback, labelnames))
+
+    def register_counter(self, name: str, documentation: str, callback: Callable,
+                         labelnames: Sequence[str] = ()):
+        """Expose a monotonic total another component keeps (deliveries, recomputations, ...)"""
+        self._register(CallbackCounter(name, documentation, callback, labelnames))
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics = [m for m in self._metrics if m.name != metric.name]
+            self._metrics.append(metric)
+
+    def share(self, directory: str, interval: float = None):
+        """
+        Merge request and span metrics across the processes of a pre-forked server
+        Every process calling this writes its histograms and counters to
+        ``directory`` every ``interval`` seconds (``METRICS_FLUSH_INTERVAL``),
+        and ``render`` adds the other processes' files to its own values.
+        Files of exited processes are kept, so totals never go backwards when
+        a worker is restarted. Gauges stay per process.
+        """
+        interval = interval or float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+        self._share_dir = directory
+        self._share_path = os.path.join(directory, f'metrics-{os.getpid()}.json')
+
+        def flush_loop():
+            while True:
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.warning(f"Error writing shared metrics: {e}")
+                time.sleep(interval)
+
+        threading.Thread(target=flush_loop, name='metrics-flush', daemon=True).start()
+
+    def flush(self):
+        """Write this process's histograms and counters for the other processes to merge"""
+        if self._share_path is None:
+            return
+        data = {metric.name: [[list(labels), value] for labels, value in metric.snapshot().items()]
+                for metric in self._metrics if hasattr(metric, 'snapshot')}
+        tmp_path = f"{self._share_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self._share_path)
+
+    def _shared_snapshots(self) -> Dict[str, List[Dict]]:
+        """Snapshots written by the other processes, by metric name"""
+        snapshots = {}
+        if self._share_dir is None:
+            return snapshots
+        for path in glob.glob(os.path.join(self._share_dir, 'metrics-*.json')):
+            if path == self._share_path:
+                continue
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, rows in data.items():
+                snapshots.setdefault(name, []).append({tuple(labels): value for labels, value in rows})
+        return snapshots
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        self.request_duration.observe(seconds, method, route, str(status))
+
+    def observe_span(self, name: str, seconds: float, error: bool = False):
+        self.span_duration.observe(seconds, name)
+        if error:
+            self.span_errors.inc(name)
+
+    def span(self, name: str) -> '_Span':
+        """Time a block: ``with metrics.span('alpaca.get_stock_bars'): ...``"""
+        return _Span(self, name)
+
+    def render(self) -> str:
+        """Render every metric in Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics)
+        shared = self._shared_snapshots()
+        lines = []
+        for metric in metrics:
+            if hasattr(metric, 'snapshot'):
+                lines.extend(metric.render(shared.get(metric.name, ())))
+            else:
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def install(self, app):
+        """Record the latency of every request handled by a Flask app"""
+        from flask import g, request
+
+        @app.before_request
+        def _start_request_timer():
+            g._metrics_start = time.perf_counter()
+
+        @app.after_request
+        def _record_request(response):
+            start = g.pop('_metrics_start', None)
+            if start is not None:
+                route = request.url_rule.rule if request.url_rule else 'unmatched'
+                self.observe_request(request.method, route, response.status_code, time.perf_counter() - start)
+            return response
+
+        @app.teardown_request
+        def _record_failed_request(exc):
+            # after_request is skipped for unhandled exceptions
+            start = g.pop('_metrics_start', None)
+            if start is not None and exc is not None:
+                route = request.url_rule.rule if request.url_rule else 'unmatched'
+                self.observe_request(request.method, route, 500, time.perf_counter() - start)
+
+
+metrics = MetricsRegistry()
+
+
+def span(name: str) -> _Span:
+    """Time a block against the process-wide registry"""
+    return metrics.span(name)
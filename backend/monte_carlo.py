@@ -0,0 +1,157 @@
+"""
+Monte Carlo Bootstrap
+Block-bootstrap confidence intervals for a simulation's return, drawdown, Sharpe ratio and win rate
+"""
+
+import os
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+BOOTSTRAP_METRICS = ('total_return_pct', 'max_drawdown_pct', 'sharpe_ratio', 'win_rate')
+MAX_RESAMPLES = 100000
+
+
+def block_table(log_returns: np.ndarray, simple_returns: np.ndarray, size: int) -> Dict[str, np.ndarray]:
+    """
+    Summary of every length-``size`` block of a return series, indexed by start bar
+    Per block: total log return, sum of simple returns and of their squares, the
+    highest and lowest point of its running log return and the largest drawdown
+    inside it. Resampled paths are built from these numbers alone, so a path costs
+    one array element per block rather than per bar.
+    """
+    starts = len(log_returns) - size + 1
+
+    # Running log return inside each block, starting from 0 at the block open
+    cumulative = np.concatenate(([0.0], np.cumsum(log_returns)))
+    windows = sliding_window_view(cumulative, size + 1) - cumulative[:starts, None]
+
+    simple_cumulative = np.concatenate(([0.0], np.cumsum(simple_returns)))
+    squared_cumulative = np.concatenate(([0.0], np.cumsum(simple_returns ** 2)))
+
+    return {
+        'total': windows[:, -1],
+        'high': windows.max(axis=1),
+        'low': windows.min(axis=1),
+        'drawdown': (np.maximum.accumulate(windows, axis=1) - windows).max(axis=1),
+        'sum': simple_cumulative[size:] - simple_cumulative[:starts],
+        'sum_sq': squared_cumulative[size:] - squared_cumulative[:starts]
+    }
+
+
+def default_block_size(n: int) -> int:
+    # n^(1/3) is the usual rule of thumb for the moving block bootstrap
+    return max(1, int(round(n ** (1 / 3))))
+
+
+def _path_metrics(table: Dict[str, np.ndarray], starts: np.ndarray, n: int) -> Dict[str, np.ndarray]:
+    """
+    Metrics of the resampled paths in one batch
+    ``starts`` is a ``(paths, blocks)`` array of block start indices; column ``k``
+    of every array below describes block ``k`` of each path.
+    """
+    levels = np.cumsum(table['total'][starts], axis=1)
+    opens = levels - table['total'][starts]
+
+    # Highest level reached before each block (paths start at 0)
+    peaks = np.maximum.accumulate(opens + table['high'][starts], axis=1)
+    peaks = np.maximum(np.concatenate((np.zeros((len(starts), 1)), peaks[:, :-1]), axis=1), 0.0)
+
+    # A drawdown either lies inside one block or runs from an earlier peak to a block's low
+    drawdown = np.maximum(table['drawdown'][starts], peaks - opens - table['low'][starts]).max(axis=1)
+
+    mean = table['sum'][starts].sum(axis=1) / n
+    variance = np.maximum(table['sum_sq'][starts].sum(axis=1) / n - mean ** 2, 0.0)
+    std = np.sqrt(variance)
+
+    return {
+        'total_return_pct': np.expm1(levels[:, -1]) * 100,
+        'max_drawdown_pct': -np.expm1(-drawdown) * 100,
+        'sharpe_ratio': np.divide(mean, std, out=np.zeros_like(mean), where=std > 0)
+    }
+
+
+def block_bootstrap(portfolio_values: np.ndarray, trade_rewards: np.ndarray = None,
+                    resamples: int = 10000, block_size: int = None, confidence: float = 0.95,
+                    batch_size: int = None, seed: Optional[int] = None) -> Dict:
+    """
+    Moving block bootstrap of a simulated portfolio path
+    Bar returns are resampled in blocks of ``block_size`` consecutive bars (which
+    keeps their short-term autocorrelation) into ``resamples`` paths of the
+    original length. Each batch of paths is one ``(paths, blocks)`` array of block
+    starts. Trade outcomes are resampled independently for the win rate.
+    Intervals are percentile intervals at ``confidence``.
+    """
+    values = np.asarray(portfolio_values, dtype=float)
+    if len(values) < 3 or np.any(values <= 0):
+        raise ValueError('Bootstrap needs at least 3 positive portfolio values')
+    if not 0 < confidence < 1:
+        raise ValueError('confidence must be between 0 and 1')
+    if not 1 <= resamples <= MAX_RESAMPLES:
+        raise ValueError(f'resamples must be between 1 and {MAX_RESAMPLES}')
+
+    simple_returns = np.diff(values) / values[:-1]
+    log_returns = np.log1p(simple_returns)
+    n = len(log_returns)
+    block_size = min(int(block_size or default_block_size(n)), n)
+    batch_size = batch_size or int(os.getenv('BOOTSTRAP_BATCH_SIZE', 2000))
+    rng = np.random.default_rng(seed)
+
+    # Full blocks, plus one shorter block so every path has exactly n bars. The
+    # shorter blocks are appended to the same table, after the full-size ones.
+    full_blocks, tail = divmod(n, block_size)
+    table = block_table(log_returns, simple_returns, block_size)
+    full_starts = len(table['total'])
+    if tail:
+        tail_table = block_table(log_returns, simple_returns, tail)
+        table = {name: np.concatenate((column, tail_table[name])) for name, column in table.items()}
+
+    samples = {}
+    for lo in range(0, resamples, batch_size):
+        paths = min(batch_size, resamples - lo)
+        starts = rng.integers(0, full_starts, size=(paths, full_blocks))
+        if tail:
+            tail_starts = full_starts + rng.integers(0, n - tail + 1, size=(paths, 1))
+            starts = np.concatenate((starts, tail_starts), axis=1)
+        for metric, batch in _path_metrics(table, starts, n).items():
+            samples.setdefault(metric, np.empty(resamples))[lo:lo + paths] = batch
+
+    trade_rewards = np.asarray(trade_rewards if trade_rewards is not None else [], dtype=float)
+    if len(trade_rewards):
+        # The mean of resampled win/loss flags is binomial, so draw it directly
+        wins = float((trade_rewards > 0).mean())
+        samples['win_rate'] = rng.binomial(len(trade_rewards), wins, size=resamples) / len(trade_rewards) * 100
+
+    observed = {
+        'total_return_pct': float(np.expm1(log_returns.sum()) * 100),
+        'max_drawdown_pct': float((1 - values / np.maximum.accumulate(values)).max() * 100),
+        'sharpe_ratio': float(simple_returns.mean() / simple_returns.std()) if simple_returns.std() > 0 else 0.0,
+        'win_rate': float((trade_rewards > 0).mean() * 100) if len(trade_rewards) else None
+    }
+
+    tail_pct = (1 - confidence) / 2 * 100
+    result = {
+        'resamples': resamples,
+        'block_size': block_size,
+        'confidence': confidence,
+        'bars': n + 1,
+        'trades': int(len(trade_rewards))
+    }
+    for metric in BOOTSTRAP_METRICS:
+        if metric not in samples:
+            continue
+        lower, median, upper = np.percentile(samples[metric], [tail_pct, 50, 100 - tail_pct])
+        result[metric] = {
+            'observed': observed[metric],
+            'mean': float(samples[metric].mean()),
+            'median': float(median),
+            'lower': float(lower),
+            'upper': float(upper)
+        }
+    result['probability_of_loss'] = float((samples['total_return_pct'] < 0).mean())
+    return result
+
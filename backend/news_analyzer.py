@@ -12,6 +12,7 @@ from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassifica
 import pandas as pd
 from polygon import RESTClient
 from dotenv import load_dotenv
+from metrics import span
 
 load_dotenv()
 
@@ -49,12 +50,31 @@ class NewsAnalyzer:
         else:
             self.polygon_client = None
             logger.warning("⚠️ Polygon API key not configured")
+        
+        # Last result per symbol, served while refreshes are paused
+        self.paused = False
+        self._latest = {}
+    
+    def pause(self):
+        """Stop fetching and scoring news; lookups return each symbol's last result"""
+        self.paused = True
+    
+    def resume(self):
+        self.paused = False
     
     def get_news_sentiment(self, symbol: str, hours_back: int = 24) -> Dict:
         """
         Get comprehensive news sentiment for a symbol
         Returns sentiment score, news count, and key headlines
         """
+        if self.paused:
+            return self._latest.get(symbol, {
+                'sentiment_score': 0.5,
+                'news_count': 0,
+                'headlines': [],
+                'confidence': 0.0
+            })
+        
         try:
             # Fetch news from NewsAPI
             news_data = self._fetch_news_api(symbol, hours_back)
@@ -96,13 +116,14 @@ class NewsAnalyzer:
                 avg_sentiment = 0.5
                 confidence = 0.0
             
-            return {
+            self._latest[symbol] = {
                 'sentiment_score': avg_sentiment,
                 'news_count': len(all_news),
                 'headlines': headlines[:5],  # Top 5 headlines
                 'confidence': confidence,
                 'timestamp': datetime.now().isoformat()
             }
+            return self._latest[symbol]
             
         except Exception as e:
             logger.error(f"Error getting news sentiment for {symbol}: {e}")
@@ -135,7 +156,8 @@ class NewsAnalyzer:
                 'apiKey': self.news_api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            with span('news.newsapi'):
+                response = requests.get(url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -152,7 +174,8 @@ class NewsAnalyzer:
         
         try:
             # Get news from Polygon
-            news = self.polygon_client.get_news(symbol, limit=20)
+            with span('news.polygon'):
+                news = list(self.polygon_client.get_news(symbol, limit=20))
             
             return [
                 {
@@ -174,7 +197,8 @@ class NewsAnalyzer:
             return {'score': 0.5, 'label': 'neutral'}
         
         try:
-            result = self.sentiment_pipeline(text)[0]
+            with span('sentiment.finbert'):
+                result = self.sentiment_pipeline(text)[0]
             
             # Convert to numerical score
             if result['label'] == 'positive':
@@ -14,6 +14,7 @@ from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
 from dotenv import load_dotenv
+from metrics import span
 
 load_dotenv()
 
@@ -145,7 +146,8 @@ class OptionsTrader:
             total_cost = premium * quantity * 100  # Options are for 100 shares
             
             # Check if we have enough capital (simplified)
-            account = self.trading_client.get_account()
+            with span('alpaca.get_account'):
+                account = self.trading_client.get_account()
             available_cash = float(account.cash)
             
             if total_cost > available_cash:
@@ -209,7 +211,8 @@ class OptionsTrader:
                 timeframe=TimeFrame.Minute,
                 start=datetime.now() - timedelta(minutes=5)
             )
-            bars = self.data_client.get_stock_bars(request)
+            with span('alpaca.get_stock_bars'):
+                bars = self.data_client.get_stock_bars(request)
             
             if bars and len(bars) > 0:
                 return float(bars[-1].close)
@@ -325,7 +328,8 @@ class OptionsTrader:
                 timeframe=TimeFrame.Day,
                 start=datetime.now() - timedelta(days=30)
             )
-            bars = self.data_client.get_stock_bars(request)
+            with span('alpaca.get_stock_bars'):
+                bars = self.data_client.get_stock_bars(request)
             
             if bars and len(bars) > 1:
                 prices = [float(bar.close) for bar in bars]
@@ -0,0 +1,145 @@
+"""
+Batched Quote Cache
+Resolves latest trade prices for a whole watchlist in one Alpaca request behind a short TTL cache
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from http_client import PooledHTTPClient, get_default_client
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class BatchQuoteFetcher:
+    """
+    Fetches latest trades for many symbols via Alpaca's multi-symbol endpoint
+    Lists longer than ``chunk_size`` are split into chunks that are requested concurrently.
+    """
+
+    def __init__(self, mode: str = 'paper', http_client: PooledHTTPClient = None,
+                 data_url: str = None, chunk_size: int = None, timeout: float = 5):
+        self.mode = mode
+        self.http_client = http_client or get_default_client()
+        self.data_url = (data_url or os.getenv('ALPACA_DATA_URL', 'https://data.alpaca.markets')).rstrip('/')
+        self.chunk_size = chunk_size or int(os.getenv('QUOTE_BATCH_SIZE', 100))
+        self.feed = os.getenv('ALPACA_DATA_FEED')
+        self.timeout = timeout
+
+    def _get_headers(self) -> Optional[Dict]:
+        api_key = os.getenv(f'ALPACA_{self.mode.upper()}_KEY')
+        secret_key = os.getenv(f'ALPACA_{self.mode.upper()}_SECRET')
+        if not api_key or not secret_key:
+            return None
+        return {
+            'APCA-API-KEY-ID': api_key,
+            'APCA-API-SECRET-KEY': secret_key
+        }
+
+    def fetch(self, symbols: List[str]) -> Dict[str, float]:
+        """Fetch latest trade prices; symbols without a price are omitted"""
+        headers = self._get_headers()
+        if not headers or not symbols:
+            return {}
+
+        chunks = [symbols[i:i + self.chunk_size] for i in range(0, len(symbols), self.chunk_size)]
+        if len(chunks) == 1:
+            return self._fetch_chunk(chunks[0], headers)
+
+        prices = {}
+        with ThreadPoolExecutor(max_workers=min(len(chunks), 8)) as executor:
+            for chunk_prices in executor.map(lambda chunk: self._fetch_chunk(chunk, headers), chunks):
+                prices.update(chunk_prices)
+        return prices
+
+    def _fetch_chunk(self, symbols: List[str], headers: Dict) -> Dict[str, float]:
+        params = {'symbols': ','.join(symbols)}
+        if self.feed:
+            params['feed'] = self.feed
+
+        try:
+            response = self.http_client.get(
+                f'{self.data_url}/v2/stocks/trades/latest',
+                endpoint='alpaca.latest_trades',
+                headers=headers,
+                params=params,
+                timeout=self.timeout
+            )
+            if response.status_code != 200:
+                logger.warning(f"Batch quote request failed: {response.status_code} - {response.text[:200]}")
+                return {}
+
+            trades = response.json().get('trades', {}) or {}
+            prices = {}
+            for symbol, trade in trades.items():
+                price = (trade or {}).get('p')
+                if price:
+                    prices[symbol] = float(price)
+            return prices
+
+        except Exception as e:
+            logger.warning(f"Error fetching batch quotes for {len(symbols)} symbols: {e}")
+            return {}
+
+
+class QuoteCache:
+    """
+    Short-TTL cache of latest prices shared by the status, stock info and risk code
+    Misses for a request are resolved together with a single batched fetch, and
+    concurrent misses for a symbol share one fetch (``TTLCache``). Symbols the
+    fetch returns no price for are cached as ``None`` for ``miss_ttl`` seconds.
+    """
+
+    def __init__(self, fetcher: BatchQuoteFetcher, ttl: float = None, miss_ttl: float = None):
+        self.fetcher = fetcher
+        self.ttl = ttl if ttl is not None else float(os.getenv('QUOTE_CACHE_TTL', 5))
+        self.miss_ttl = miss_ttl if miss_ttl is not None else float(os.getenv('QUOTE_CACHE_MISS_TTL', 1))
+        self._cache = TTLCache(self.ttl, maxsize=20000, name='quote', negative_ttl=self.miss_ttl)
+
+    def get_prices(self, symbols: Iterable[str]) -> Dict[str, Optional[float]]:
+        """Get prices for all symbols, fetching every stale or missing one in one batch"""
+        symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+        return self._cache.get_many_or_load(symbols, self.fetcher.fetch)
+
+    def get_price(self, symbol: str) -> Optional[float]:
+        """Get a single cached price (None if unavailable)"""
+        return self.get_prices([symbol]).get(symbol.strip().upper())
+
+    def invalidate(self, symbols: Iterable[str] = None):
+        """Drop cached prices for the given symbols, or for all symbols"""
+        if symbols is None:
+            self._cache.invalidate()
+        else:
+            for symbol in symbols:
+                self._cache.invalidate(symbol.strip().upper())
+
+    def get_stats(self) -> Dict:
+        """Get cache size and hit/miss counters"""
+        stats = self._cache.get_stats()
+        return {
+            'cached_symbols': stats['entries'],
+            'hits': stats['hits'],
+            'misses': stats['misses'],
+            'ttl_seconds': self.ttl,
+            'miss_ttl_seconds': self.miss_ttl
+        }
+
+
+_quote_caches = {}
+_quote_caches_lock = threading.Lock()
+
+
+def get_quote_cache(mode: str = 'paper') -> QuoteCache:
+    """Get the process-wide quote cache for a trading mode"""
+    cache = _quote_caches.get(mode)
+    if cache is None:
+        with _quote_caches_lock:
+            cache = _quote_caches.get(mode)
+            if cache is None:
+                cache = QuoteCache(BatchQuoteFetcher(mode=mode))
+                _quote_caches[mode] = cache
+    return cache
@@ -14,6 +14,9 @@ from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
 from dotenv import load_dotenv
+from quote_cache import get_quote_cache
+from market_calendar import get_market_calendar
+from metrics import span
 
 load_dotenv()
 
@@ -59,7 +62,8 @@ class RiskManager:
         """
         try:
             # Get account information
-            account = self.trading_client.get_account()
+            with span('alpaca.get_account'):
+                account = self.trading_client.get_account()
             total_value = float(account.portfolio_value)
             
             # Base position size (percentage of portfolio)
@@ -203,6 +207,11 @@ class RiskManager:
         stop_losses = []
         
         try:
+            # Warm the quote cache for every open position with one batched request
+            open_symbols = [symbol for symbol, position in self.positions.items() if position['quantity'] > 0]
+            if open_symbols:
+                get_quote_cache(self.mode).get_prices(open_symbols)
+            
             for symbol, position in self.positions.items():
                 if position['quantity'] <= 0:
                     continue
@@ -288,8 +297,10 @@ class RiskManager:
     def _get_portfolio_state(self) -> Dict:
         """Get current portfolio state"""
         try:
-            account = self.trading_client.get_account()
-            positions = self.trading_client.get_all_positions()
+            with span('alpaca.get_account'):
+                account = self.trading_client.get_account()
+            with span('alpaca.get_all_positions'):
+                positions = self.trading_client.get_all_positions()
             
             portfolio = {
                 'total_value': float(account.portfolio_value),
@@ -335,7 +346,8 @@ class RiskManager:
                 timeframe=TimeFrame.Day,
                 start=datetime.now() - timedelta(days=20)
             )
-            bars = self.data_client.get_stock_bars(request)
+            with span('alpaca.get_stock_bars'):
+                bars = self.data_client.get_stock_bars(request)
             
             # Fix: Handle BarSet object properly
             if bars and hasattr(bars, '__len__') and len(bars) > 1:
@@ -397,12 +409,18 @@ class RiskManager:
     def _get_current_price(self, symbol: str) -> Optional[float]:
         """Get current stock price"""
         try:
+            # Shared short-TTL quote cache avoids one request per position
+            price = get_quote_cache(self.mode).get_price(symbol)
+            if price:
+                return price
+            
             request = StockBarsRequest(
                 symbol_or_symbols=symbol,
                 timeframe=TimeFrame.Minute,
                 start=datetime.now() - timedelta(minutes=5)
             )
-            bars = self.data_client.get_stock_bars(request)
+            with span('alpaca.get_stock_bars'):
+                bars = self.data_client.get_stock_bars(request)
             
             if bars and len(bars) > 0:
                 return float(bars[-1].close)
@@ -415,20 +433,8 @@ class RiskManager:
     def _is_market_open(self) -> bool:
         """Check if market is currently open"""
         try:
-            # Simplified market hours check
-            now = datetime.now()
-            
-            # Check if it's a weekday
-            if now.weekday() >= 5:  # Saturday or Sunday
-                return False
-            
-            # Check if it's between 9:30 AM and 4:00 PM ET
-            # This is a simplified check - in production, use Alpaca's calendar API
-            hour = now.hour
-            if 9 <= hour < 16:
-                return True
-            
-            return False
+            # Regular session hours, holidays and early closes from the local calendar
+            return get_market_calendar().is_open()
             
         except Exception as e:
             logger.error(f"Error checking market hours: {e}")
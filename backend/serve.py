@@ -0,0 +1,349 @@
+"""
+Production Server
+Pre-forking multi-worker entry point for app.py with one designated trading process
+
+The master imports the app and initializes the heavy components (RL agents,
+FinBERT, training system) once, then forks:
+
+- one primary process that owns trading and training threads and serves every
+  mutating or live-state endpoint on an internal port
+- N read workers that share the preloaded components copy-on-write and serve
+  read endpoints from the public port, forwarding everything else to the primary
+
+The primary writes each recomputed /status snapshot to a shared state file, so
+read workers answer /status without touching the trading process.
+
+Usage:
+    python serve.py --workers 4 --port 5000
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import errno
+import signal
+import socket
+import shutil
+import logging
+import argparse
+import tempfile
+import importlib
+from typing import Dict, Optional
+from urllib.parse import quote
+
+from werkzeug.serving import make_server
+
+from http_client import PooledHTTPClient
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# GET routes read workers answer themselves; everything else goes to the primary
+LOCAL_ROUTES = ('/', '/status', '/health', '/logs')
+LOCAL_ROUTE_PREFIXES = (
+    '/news/',
+    '/options/',
+    '/training/search-stocks',
+    '/training/stock-info/',
+    '/training/stocks-info',
+    '/training/models'
+)
+
+# Headers that describe a single connection and must not be forwarded
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailer', 'transfer-encoding', 'upgrade', 'content-length', 'content-encoding'
+}
+
+
+class SharedStatusFile:
+    """
+    Status snapshot shared between the primary and read workers
+    The primary replaces the file atomically on every recompute; readers only
+    re-parse it when its modification time changes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._snapshot = None
+        self._mtime = None
+
+    def write(self, snapshot: Dict):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f, default=str)
+        os.replace(tmp_path, self.path)
+
+    def start(self):
+        """No-op; matches the LiveState interface used by the /status route"""
+
+    def get(self) -> Dict:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return {
+                'trading_active': False,
+                'message': 'Trading process starting'
+            }
+
+        if mtime != self._mtime:
+            with open(self.path) as f:
+                self._snapshot = json.load(f)
+            self._mtime = mtime
+        return self._snapshot
+
+
+class PrimaryForwarder:
+    """WSGI middleware that forwards non-local requests to the primary process"""
+
+    def __init__(self, app, primary_url: str, http_client: PooledHTTPClient = None):
+        self.app = app
+        self.primary_url = primary_url.rstrip('/')
+        self.http_client = http_client or PooledHTTPClient(retries=0)
+
+    @staticmethod
+    def is_local(method: str, path: str) -> bool:
+        if method not in ('GET', 'HEAD'):
+            return False
+        return path in LOCAL_ROUTES or path.startswith(LOCAL_ROUTE_PREFIXES)
+
+    def __call__(self, environ, start_response):
+        if self.is_local(environ['REQUEST_METHOD'], environ.get('PATH_INFO', '/')):
+            return self.app(environ, start_response)
+        return self._forward(environ, start_response)
+
+    def _forward(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        url = self.primary_url + quote(environ.get('PATH_INFO', '/'))
+        if environ.get('QUERY_STRING'):
+            url += '?' + environ['QUERY_STRING']
+
+        headers = {
+            key[5:].replace('_', '-').title(): value
+            for key, value in environ.items()
+            if key.startswith('HTTP_') and key[5:] not in ('HOST', 'CONNECTION')
+        }
+        if environ.get('CONTENT_TYPE'):
+            headers['Content-Type'] = environ['CONTENT_TYPE']
+
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        body = environ['wsgi.input'].read(length) if length else None
+
+        try:
+            # No read timeout: /events is a long-lived stream
+            response = self.http_client.request(
+                method, url, endpoint='primary.forward',
+                headers=headers, data=body, stream=True, timeout=(5, None)
+            )
+        except Exception as e:
+            logger.error(f"Error forwarding {method} {environ.get('PATH_INFO')} to trading process: {e}")
+            start_response('502 Bad Gateway', [('Content-Type', 'application/json')])
+            return [json.dumps({'error': f'Trading process unavailable: {e}'}).encode()]
+
+        start_response(f"{response.status_code} {response.reason}", [
+            (key, value) for key, value in response.headers.items()
+            if key.lower() not in HOP_BY_HOP_HEADERS
+        ])
+        return self._stream(response)
+
+    @staticmethod
+    def _stream(response):
+        try:
+            for chunk in response.iter_content(chunk_size=None):
+                if chunk:
+                    yield chunk
+        finally:
+            response.close()
+
+
+class PreforkServer:
+    """Master process: preloads the app, forks the primary and read workers, and restarts crashed children"""
+
+    def __init__(self, app_module: str = 'app', host: str = '0.0.0.0', port: int = 5000,
+                 workers: int = None, primary_port: int = None, state_dir: str = None):
+        self.app_module = app_module
+        self.host = host
+        self.port = port
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.primary_port = primary_port or port + 1
+        self.state_dir = state_dir or tempfile.mkdtemp(prefix='tradingbot-serve-')
+        self.status_file = os.path.join(self.state_dir, 'status.json')
+
+        self.module = None
+        self.wsgi_app = None
+        self.listener = None
+        self.children = {}
+        self.stopping = False
+
+    def preload(self):
+        """Import the app and build shared components before forking"""
+        start = time.time()
+        self.module = importlib.import_module(self.app_module)
+        create_app = getattr(self.module, 'create_app', None)
+        self.wsgi_app = create_app() if create_app else self.module.app
+
+        initialize = getattr(self.module, 'initialize_components', None)
+        if initialize:
+            initialize()
+
+        # Move preloaded objects out of the GC's generations so collections in
+        # the children do not touch (and copy) their pages
+        gc.collect()
+        gc.freeze()
+        logger.info(f"✅ Preloaded {self.app_module} in {time.time() - start:.1f}s")
+
+    def run(self):
+        """Preload, fork the children and supervise them until SIGTERM/SIGINT"""
+        self.preload()
+
+        if self.workers > 0:
+            self.listener = socket.create_server((self.host, self.port), backlog=2048)
+            self.listener.set_inheritable(True)
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        self._spawn('primary')
+        for index in range(self.workers):
+            self._spawn(f'worker-{index}')
+
+        logger.info(f"🚀 Serving {self.app_module} on {self.host}:{self.port} "
+                    f"with {self.workers} read workers (primary on 127.0.0.1:{self.primary_port})")
+
+        try:
+            self._supervise()
+        finally:
+            self._shutdown()
+
+    def _spawn(self, role: str):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            try:
+                if role == 'primary':
+                    self._run_primary()
+                else:
+                    self._run_worker()
+            except Exception as e:
+                logger.error(f"{role} ({os.getpid()}) crashed: {e}")
+            finally:
+                os._exit(1)
+
+        self.children[pid] = role
+        logger.info(f"Started {role} (pid {pid})")
+
+    def _run_primary(self):
+        """Trading process: owns trading/training threads and the live status snapshot"""
+        # /metrics is answered here and merges the read workers' request histograms
+        metrics.share(self.state_dir)
+        shared = SharedStatusFile(self.status_file)
+        status_state = getattr(self.module, 'status_state', None)
+        if status_state is not None:
+            status_state.add_observer(shared.write)
+            status_state.start()
+            try:
+                shared.write(status_state.get())
+            except Exception as e:
+                logger.error(f"Error computing initial status snapshot: {e}")
+
+        if self.workers == 0:
+            # Single-process mode: the primary serves the public port directly
+            server = make_server(self.host, self.port, self.wsgi_app, threaded=True)
+        else:
+            server = make_server('127.0.0.1', self.primary_port, self.wsgi_app, threaded=True)
+        server.serve_forever()
+
+    def _run_worker(self):
+        """Read worker: serves read routes from shared state, forwards the rest to the primary"""
+        if hasattr(self.module, 'status_state'):
+            self.module.status_state = SharedStatusFile(self.status_file)
+        metrics.share(self.state_dir)
+
+        app = PrimaryForwarder(self.wsgi_app, f"http://127.0.0.1:{self.primary_port}")
+        server = make_server(self.host, self.port, app, threaded=True, fd=self.listener.fileno())
+        server.serve_forever()
+
+    def _supervise(self):
+        while not self.stopping:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                # Poll so a stop signal is noticed promptly
+                time.sleep(0.5)
+                continue
+
+            role = self.children.pop(pid, None)
+            if role is None or self.stopping:
+                continue
+
+            logger.error(f"{role} (pid {pid}) exited with status {status}; restarting")
+            if role == 'primary':
+                logger.warning("Trading and training state was lost with the primary process")
+            time.sleep(1)
+            self._spawn(role)
+
+    def _handle_stop(self, signum, frame):
+        self.stopping = True
+
+    def _shutdown(self):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError as e:
+                if e.errno != errno.ESRCH:
+                    raise
+
+        deadline = time.time() + 10
+        while self.children and time.time() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.1)
+            else:
+                self.children.pop(pid, None)
+
+        for pid in self.children:
+            os.kill(pid, signal.SIGKILL)
+
+        if self.listener is not None:
+            self.listener.close()
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+        logger.info("Server stopped")
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description='Pre-forking production server for the trading bot API')
+    parser.add_argument('--app', default=os.getenv('SERVE_APP', 'app'),
+                        help='Module exposing the Flask app (default: app)')
+    parser.add_argument('--host', default=os.getenv('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', 5000)))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_CONCURRENCY', os.cpu_count() or 1)),
+                        help='Read worker processes; 0 serves everything from the primary process')
+    parser.add_argument('--primary-port', type=int, default=int(os.getenv('PRIMARY_PORT', 0)) or None,
+                        help='Internal port of the trading process (default: port + 1)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    PreforkServer(
+        app_module=args.app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        primary_port=args.primary_port
+    ).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,7 @@
 Simplified Trading Bot Backend for Testing Alpaca Connection
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
 import os
 import logging
@@ -10,10 +10,16 @@ import time
 import json
 import glob
 import gzip
+import io
 from pathlib import Path
 from datetime import datetime, timedelta
-import requests
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
+from http_client import get_default_client
+from quote_cache import get_quote_cache
+from health_monitor import HealthMonitor
+from event_hub import EventHub, LiveState, stream_events
+from metrics import metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 # Load environment variables
 load_dotenv()
@@ -22,9 +28,31 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class _BoundedReader(io.RawIOBase):
+    """Read-only view over ``length`` bytes of a file, starting at its current position"""
+    
+    def __init__(self, raw, length):
+        self._raw = raw
+        self._remaining = length
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        if self._remaining <= 0:
+            return 0
+        view = memoryview(buffer)[:self._remaining]
+        n = self._raw.readinto(view)
+        self._remaining -= n or 0
+        return n
+
 class AdvancedTradingLogger:
     """Advanced logging system for trading bot activities"""
     
+    # Archive tuning: read/write granularity and size at which a new segment is started
+    ARCHIVE_CHUNK_SIZE = 64 * 1024
+    ARCHIVE_SEGMENT_MAX_BYTES = 8 * 1024 * 1024
+    
     def __init__(self, base_log_dir="logs/trading"):
         self.base_log_dir = Path(base_log_dir)
         self.base_log_dir.mkdir(parents=True, exist_ok=True)
@@ -123,75 +151,141 @@ class AdvancedTradingLogger:
     
     def _get_daily_logs(self, start_date, end_date):
         """Get daily logs within date range"""
-        logs = []
-        current_date = start_date
-        
-        while current_date <= end_date:
-            date_str = current_date.strftime("%Y-%m-%d")
-            log_file = self.daily_logs_dir / f"trading_{date_str}.json"
-            
-            if log_file.exists():
-                try:
-                    with open(log_file, 'r') as f:
-                        daily_logs = json.load(f)
-                        logs.extend(daily_logs)
-                except Exception as e:
-                    logger.error(f"Error reading daily log {log_file}: {e}")
-            
-            current_date += timedelta(days=1)
-        
-        return sorted(logs, key=lambda x: x['timestamp'], reverse=True)
+        return self._collect_logs(self.daily_logs_dir, "trading", "daily", start_date, end_date)
     
     def _get_stock_logs(self, stock_symbol, start_date, end_date):
         """Get stock-specific logs within date range"""
-        logs = []
         stock_dir = self.stock_logs_dir / stock_symbol
-        
-        if not stock_dir.exists():
-            return logs
-        
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.strftime("%Y-%m-%d")
-            log_file = stock_dir / f"{stock_symbol}_{date_str}.json"
-            
-            if log_file.exists():
-                try:
-                    with open(log_file, 'r') as f:
-                        daily_logs = json.load(f)
-                        logs.extend(daily_logs)
-                except Exception as e:
-                    logger.error(f"Error reading stock log {log_file}: {e}")
-            
-            current_date += timedelta(days=1)
-        
-        return sorted(logs, key=lambda x: x['timestamp'], reverse=True)
+        return self._collect_logs(stock_dir, stock_symbol, f"stock_{stock_symbol}", start_date, end_date)
     
     def _get_bot_logs(self, bot_type, start_date, end_date):
         """Get bot-specific logs within date range"""
-        logs = []
         bot_dir = self.bot_logs_dir / bot_type
-        
-        if not bot_dir.exists():
-            return logs
+        return self._collect_logs(bot_dir, bot_type, f"bot_{bot_type}", start_date, end_date)
+    
+    def _collect_logs(self, log_dir, file_prefix, archive_prefix, start_date, end_date):
+        """Collect hot and archived entries for every day in the date range"""
+        logs = []
+        archive_index = self._load_archive_index(archive_prefix)
         
         current_date = start_date
         while current_date <= end_date:
             date_str = current_date.strftime("%Y-%m-%d")
-            log_file = bot_dir / f"{bot_type}_{date_str}.json"
             
+            # Hot (not yet archived) log file
+            log_file = log_dir / f"{file_prefix}_{date_str}.json"
             if log_file.exists():
                 try:
                     with open(log_file, 'r') as f:
-                        daily_logs = json.load(f)
-                        logs.extend(daily_logs)
+                        logs.extend(self._iter_json_array(f))
+                except Exception as e:
+                    logger.error(f"Error reading log {log_file}: {e}")
+            
+            # Archive segments written by archive_old_logs
+            for member in archive_index.get(date_str, []):
+                try:
+                    logs.extend(self._iter_segment_member(member))
+                except Exception as e:
+                    logger.error(f"Error reading archive segment {member.get('segment')}: {e}")
+            
+            # Legacy single-file archives ({prefix}_{date}.json.gz)
+            legacy_archive = self.archived_logs_dir / f"{archive_prefix}_{date_str}.json.gz"
+            if legacy_archive.exists():
+                try:
+                    with gzip.open(legacy_archive, 'rt') as f:
+                        logs.extend(self._iter_json_array(f))
                 except Exception as e:
-                    logger.error(f"Error reading bot log {log_file}: {e}")
+                    logger.error(f"Error reading archived log {legacy_archive}: {e}")
             
             current_date += timedelta(days=1)
         
         return sorted(logs, key=lambda x: x['timestamp'], reverse=True)
     
+    def _iter_json_array(self, text_stream):
+        """Yield the elements of a JSON array from a text stream, one chunk at a time"""
+        decoder = json.JSONDecoder()
+        buffer = ""
+        started = False
+        eof = False
+        
+        while True:
+            if not eof and len(buffer) < self.ARCHIVE_CHUNK_SIZE:
+                chunk = text_stream.read(self.ARCHIVE_CHUNK_SIZE)
+                if chunk:
+                    buffer += chunk
+                else:
+                    eof = True
+            
+            buffer = buffer.lstrip()
+            if not started:
+                if not buffer:
+                    if eof:
+                        return
+                    continue
+                if buffer[0] != '[':
+                    raise ValueError("Log file does not contain a JSON array")
+                buffer = buffer[1:]
+                started = True
+                continue
+            
+            buffer = buffer.lstrip(', \n\r\t')
+            if buffer.startswith(']'):
+                return
+            if not buffer:
+                if eof:
+                    return
+                continue
+            
+            try:
+                entry, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Element is split across chunks, read more before decoding
+                chunk = text_stream.read(self.ARCHIVE_CHUNK_SIZE)
+                if chunk:
+                    buffer += chunk
+                else:
+                    eof = True
+                continue
+            
+            yield entry
+            buffer = buffer[end:]
+    
+    def _iter_segment_member(self, member):
+        """Stream-decompress one gzip member of an archive segment as JSON lines"""
+        segment_path = self.archived_logs_dir / member['segment']
+        with open(segment_path, 'rb') as raw:
+            raw.seek(member['offset'])
+            bounded = io.BufferedReader(_BoundedReader(raw, member['length']), self.ARCHIVE_CHUNK_SIZE)
+            with gzip.GzipFile(fileobj=bounded, mode='rb') as gz:
+                for line in io.TextIOWrapper(gz, encoding='utf-8'):
+                    if line.strip():
+                        yield json.loads(line)
+    
+    def _archive_index_path(self, archive_prefix):
+        return self.archived_logs_dir / f"{archive_prefix}.index.json"
+    
+    def _load_archive_index(self, archive_prefix):
+        """Load the day -> segment member index for an archive prefix"""
+        index_path = self._archive_index_path(archive_prefix)
+        if not index_path.exists():
+            return {}
+        try:
+            with open(index_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading archive index {index_path}: {e}")
+            return {}
+    
+    def _save_archive_index(self, archive_prefix, index):
+        """Atomically replace the archive index for a prefix"""
+        index_path = self._archive_index_path(archive_prefix)
+        tmp_path = index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, index_path)
+    
     def archive_old_logs(self, days_to_keep=90):
         """Archive logs older than specified days"""
         cutoff_date = datetime.now() - timedelta(days=days_to_keep)
@@ -210,29 +304,60 @@ class AdvancedTradingLogger:
                 self._archive_logs_in_directory(bot_dir, cutoff_date, f"bot_{bot_dir.name}")
     
     def _archive_logs_in_directory(self, log_dir, cutoff_date, archive_prefix):
-        """Archive logs in a specific directory"""
-        for log_file in log_dir.glob("*.json"):
+        """Stream old log files in a directory into compressed archive segments"""
+        index = self._load_archive_index(archive_prefix)
+        
+        for log_file in sorted(log_dir.glob("*.json")):
             try:
                 # Extract date from filename
                 file_date_str = log_file.stem.split('_')[-1]
                 file_date = datetime.strptime(file_date_str, "%Y-%m-%d")
                 
                 if file_date < cutoff_date:
-                    # Compress and move to archive
-                    archive_name = f"{archive_prefix}_{file_date_str}.json.gz"
-                    archive_path = self.archived_logs_dir / archive_name
+                    member = self._append_to_segment(log_file, archive_prefix, file_date_str)
+                    index.setdefault(file_date_str, []).append(member)
+                    self._save_archive_index(archive_prefix, index)
                     
-                    with open(log_file, 'rb') as f_in:
-                        with gzip.open(archive_path, 'wb') as f_out:
-                            f_out.write(f_in.read())
-                    
-                    # Remove original file
+                    # Remove original file only once the index points at the segment
                     log_file.unlink()
-                    logger.info(f"Archived log file: {log_file} -> {archive_path}")
+                    logger.info(f"Archived log file: {log_file} -> {member['segment']}")
                     
             except Exception as e:
                 logger.error(f"Error archiving log file {log_file}: {e}")
     
+    def _append_to_segment(self, log_file, archive_prefix, file_date_str):
+        """Append one day's log file to the current monthly segment as a gzip member"""
+        month_str = file_date_str[:7]
+        sequence = 0
+        while True:
+            segment_name = f"{archive_prefix}_{month_str}_{sequence:03d}.jsonl.gz"
+            segment_path = self.archived_logs_dir / segment_name
+            if not segment_path.exists() or segment_path.stat().st_size < self.ARCHIVE_SEGMENT_MAX_BYTES:
+                break
+            sequence += 1
+        
+        entries = 0
+        with open(segment_path, 'ab') as raw:
+            offset = raw.tell()
+            try:
+                with gzip.GzipFile(filename='', fileobj=raw, mode='wb') as gz:
+                    with open(log_file, 'r') as f_in:
+                        for entry in self._iter_json_array(f_in):
+                            gz.write((json.dumps(entry) + "\n").encode('utf-8'))
+                            entries += 1
+            except Exception:
+                # Drop the partial member so the segment stays readable
+                raw.truncate(offset)
+                raise
+            length = raw.tell() - offset
+        
+        return {
+            'segment': segment_name,
+            'offset': offset,
+            'length': length,
+            'entries': entries
+        }
+    
     def get_available_stocks(self):
         """Get list of stocks with logs"""
         stocks = []
@@ -374,27 +499,57 @@ def initialize_sample_logs():
 
 app = Flask(__name__)
 CORS(app)
+metrics.install(app)
 
 # Global variables
 trading_active = False
 
+# In-process event hub for SSE subscribers (/events)
+event_hub = EventHub()
+
+# Alpaca REST endpoints (overridable for local stub servers)
+ALPACA_TRADING_URL = os.getenv('ALPACA_TRADING_URL', 'https://paper-api.alpaca.markets').rstrip('/')
+ALPACA_DATA_URL = os.getenv('ALPACA_DATA_URL', 'https://data.alpaca.markets').rstrip('/')
+
+# Shared keep-alive HTTP client; the data host gets a larger pool for quote lookups
+http_client = get_default_client()
+http_client.set_host_pool_size(urlsplit(ALPACA_DATA_URL).netloc, int(os.getenv('ALPACA_DATA_POOL_MAXSIZE', 20)))
+
+# Short-TTL latest-trade cache shared with the training system and risk manager
+quote_cache = get_quote_cache('paper')
+
+# Fallback prices used when no API keys are configured or a quote is unavailable
+MOCK_PRICES = {
+    'AAPL': 150.50, 'TSLA': 245.30, 'GOOGL': 128.75,
+    'MSFT': 342.80, 'NVDA': 478.90, 'META': 315.25,
+    'AMZN': 142.65, 'NFLX': 425.10
+}
+
+def get_alpaca_headers():
+    """Get Alpaca auth headers, or None if API keys are not configured"""
+    api_key = os.getenv('ALPACA_PAPER_KEY')
+    secret_key = os.getenv('ALPACA_PAPER_SECRET')
+    
+    if not api_key or not secret_key:
+        return None
+    
+    return {
+        'APCA-API-KEY-ID': api_key,
+        'APCA-API-SECRET-KEY': secret_key
+    }
+
 def test_alpaca_connection():
     """Test connection to Alpaca API"""
     try:
-        api_key = os.getenv('ALPACA_PAPER_KEY')
-        secret_key = os.getenv('ALPACA_PAPER_SECRET')
+        headers = get_alpaca_headers()
         
-        if not api_key or not secret_key:
+        if not headers:
             return False, "API keys not configured"
         
-        headers = {
-            'APCA-API-KEY-ID': api_key,
-            'APCA-API-SECRET-KEY': secret_key
-        }
-        
         # Test account endpoint
-        response = requests.get(
-            'https://paper-api.alpaca.markets/v2/account',
+        response = http_client.get(
+            f'{ALPACA_TRADING_URL}/v2/account',
+            endpoint='alpaca.account',
             headers=headers,
             timeout=10
         )
@@ -410,52 +565,25 @@ def test_alpaca_connection():
 
 def get_current_price(symbol):
     """Get current stock price from Alpaca API"""
+    return get_current_prices([symbol])[symbol]
+
+def get_current_prices(symbols):
+    """Get current prices for many stocks with one batched, cached Alpaca request"""
     try:
-        api_key = os.getenv('ALPACA_PAPER_KEY')
-        secret_key = os.getenv('ALPACA_PAPER_SECRET')
-        
-        if not api_key or not secret_key:
-            # Return mock price if no API keys
-            mock_prices = {
-                'AAPL': 150.50, 'TSLA': 245.30, 'GOOGL': 128.75,
-                'MSFT': 342.80, 'NVDA': 478.90, 'META': 315.25,
-                'AMZN': 142.65, 'NFLX': 425.10
-            }
-            return mock_prices.get(symbol, 100.00 + (hash(symbol) % 200))
-        
-        headers = {
-            'APCA-API-KEY-ID': api_key,
-            'APCA-API-SECRET-KEY': secret_key
-        }
-        
-        # Get latest trade data
-        response = requests.get(
-            f'https://data.alpaca.markets/v2/stocks/{symbol}/trades/latest',
-            headers=headers,
-            timeout=5
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            return float(data.get('trade', {}).get('p', 0))
-        else:
-            # Fallback to mock price if API fails
-            mock_prices = {
-                'AAPL': 150.50, 'TSLA': 245.30, 'GOOGL': 128.75,
-                'MSFT': 342.80, 'NVDA': 478.90, 'META': 315.25,
-                'AMZN': 142.65, 'NFLX': 425.10
-            }
-            return mock_prices.get(symbol, 100.00 + (hash(symbol) % 200))
-            
+        quotes = quote_cache.get_prices(symbols)
     except Exception as e:
-        logger.warning(f"Error getting price for {symbol}: {e}")
-        # Return mock price on error
-        mock_prices = {
-            'AAPL': 150.50, 'TSLA': 245.30, 'GOOGL': 128.75,
-            'MSFT': 342.80, 'NVDA': 478.90, 'META': 315.25,
-            'AMZN': 142.65, 'NFLX': 425.10
-        }
-        return mock_prices.get(symbol, 100.00 + (hash(symbol) % 200))
+        logger.warning(f"Error getting prices for {symbols}: {e}")
+        quotes = {}
+    
+    prices = {}
+    for symbol in symbols:
+        price = quotes.get(symbol.strip().upper())
+        if not price:
+            # Fall back to mock price if no API keys or the API fails
+            price = MOCK_PRICES.get(symbol, 100.00 + (hash(symbol) % 200))
+        prices[symbol] = price
+    
+    return prices
 
 @app.route('/', methods=['GET'])
 def index():
@@ -502,6 +630,7 @@ def start_trading():
         trading_active = True
         
         logger.info("Trading simulation started")
+        event_hub.publish('trading', 'status_changed', {'active': True})
         
         return jsonify({
             'status': 'started',
@@ -522,132 +651,175 @@ def stop_trading():
     
     trading_active = False
     logger.info("Trading simulation stopped")
+    event_hub.publish('trading', 'status_changed', {'active': False})
     
     return jsonify({
         'status': 'stopped',
         'timestamp': datetime.now().isoformat()
     })
 
-@app.route('/status', methods=['GET'])
-def get_status():
-    """Get current trading status"""
-    try:
-        # Get account info if connected
-        connected, account_data = test_alpaca_connection()
-        
-        # Calculate total trading profits first (we'll need this for account balance)
+def compute_status():
+    """Compute the current trading status snapshot"""
+    # Get account info if connected
+    connected, account_data = test_alpaca_connection()
+    
+    # Calculate total trading profits first (we'll need this for account balance)
+    stocks = os.getenv('STOCKS', 'AAPL,TSLA,GOOGL,MSFT,NVDA').split(',')
+    total_trading_profit = 0
+    starting_balance = 100000  # Starting account balance
+    
+    for stock in stocks:
+        # Mock trading performance data (same calculation as below)
+        total_trades = 25 + hash(stock) % 50
+        wins = int(total_trades * (0.6 + (hash(stock) % 20) / 100))
+        losses = total_trades - wins
+        avg_win = 150 + (hash(stock) % 100)
+        avg_loss = 100 + (hash(stock) % 50)
+        stock_profit = (wins * avg_win) - (losses * avg_loss)
+        total_trading_profit += stock_profit
+    
+    # Enhanced account information with trading profits reflected
+    account_info = {}
+    if connected and isinstance(account_data, dict):
+        current_balance = starting_balance + total_trading_profit
+        account_info = {
+            'account_number': account_data.get('account_number', 'N/A'),
+            'status': account_data.get('status', 'N/A'),
+            'currency': account_data.get('currency', 'USD'),
+            'cash': current_balance,  # Updated to reflect trading profits
+            'portfolio_value': current_balance,  # Updated to reflect trading profits
+            'buying_power': current_balance * 2,  # 2:1 margin typically
+            'equity': current_balance,  # Updated to reflect trading profits
+            'daytrade_count': account_data.get('daytrade_count', 0),
+            'pattern_day_trader': account_data.get('pattern_day_trader', False),
+            'trading_blocked': account_data.get('trading_blocked', False),
+            'transfers_blocked': account_data.get('transfers_blocked', False),
+            'account_blocked': account_data.get('account_blocked', False),
+            'created_at': account_data.get('created_at', 'N/A')
+        }
+    
+    # Enhanced portfolio with win/loss tracking
+    portfolio = {}
+    if connected and isinstance(account_data, dict):
         stocks = os.getenv('STOCKS', 'AAPL,TSLA,GOOGL,MSFT,NVDA').split(',')
-        total_trading_profit = 0
-        starting_balance = 100000  # Starting account balance
+        
+        # Resolve the whole watchlist in one batched quote lookup
+        current_prices = get_current_prices(stocks)
         
         for stock in stocks:
-            # Mock trading performance data (same calculation as below)
-            total_trades = 25 + hash(stock) % 50
-            wins = int(total_trades * (0.6 + (hash(stock) % 20) / 100))
+            # Get current stock price
+            current_price = current_prices[stock]
+            
+            # Mock trading performance data
+            total_trades = 25 + hash(stock) % 50  # Random number of trades
+            wins = int(total_trades * (0.6 + (hash(stock) % 20) / 100))  # 60-80% win rate
             losses = total_trades - wins
-            avg_win = 150 + (hash(stock) % 100)
-            avg_loss = 100 + (hash(stock) % 50)
-            stock_profit = (wins * avg_win) - (losses * avg_loss)
-            total_trading_profit += stock_profit
-        
-        # Enhanced account information with trading profits reflected
-        account_info = {}
-        if connected and isinstance(account_data, dict):
-            current_balance = starting_balance + total_trading_profit
-            account_info = {
-                'account_number': account_data.get('account_number', 'N/A'),
-                'status': account_data.get('status', 'N/A'),
-                'currency': account_data.get('currency', 'USD'),
-                'cash': current_balance,  # Updated to reflect trading profits
-                'portfolio_value': current_balance,  # Updated to reflect trading profits
-                'buying_power': current_balance * 2,  # 2:1 margin typically
-                'equity': current_balance,  # Updated to reflect trading profits
-                'daytrade_count': account_data.get('daytrade_count', 0),
-                'pattern_day_trader': account_data.get('pattern_day_trader', False),
-                'trading_blocked': account_data.get('trading_blocked', False),
-                'transfers_blocked': account_data.get('transfers_blocked', False),
-                'account_blocked': account_data.get('account_blocked', False),
-                'created_at': account_data.get('created_at', 'N/A')
-            }
-        
-        # Enhanced portfolio with win/loss tracking
-        portfolio = {}
-        if connected and isinstance(account_data, dict):
-            stocks = os.getenv('STOCKS', 'AAPL,TSLA,GOOGL,MSFT,NVDA').split(',')
-            for stock in stocks:
-                # Get current stock price
-                current_price = get_current_price(stock)
-                
-                # Mock trading performance data
-                total_trades = 25 + hash(stock) % 50  # Random number of trades
-                wins = int(total_trades * (0.6 + (hash(stock) % 20) / 100))  # 60-80% win rate
-                losses = total_trades - wins
-                win_rate = wins / total_trades if total_trades > 0 else 0
-                
-                # Mock profit/loss calculation
-                avg_win = 150 + (hash(stock) % 100)  # $150-250 average win
-                avg_loss = 100 + (hash(stock) % 50)   # $100-150 average loss
-                total_profit = (wins * avg_win) - (losses * avg_loss)
-                
-                # Calculate individual stock allocation and return
-                stock_starting_balance = starting_balance / len(stocks)
-                stock_current_balance = stock_starting_balance + total_profit
-                total_return = (total_profit / stock_starting_balance) * 100 if stock_starting_balance > 0 else 0
-                
-                portfolio[stock] = {
-                    'performance': {
-                        'balance': stock_current_balance,  # Reflects trading profits
-                        'position': hash(stock) % 100,  # Mock position size
-                        'current_price': current_price,  # Current stock price
-                        'total_trades': total_trades,
-                        'wins': wins,
-                        'losses': losses,
-                        'win_rate': win_rate,
-                        'total_return': total_return,
-                        'total_profit': total_profit,
-                        'avg_win': avg_win,
-                        'avg_loss': avg_loss,
-                        'largest_win': avg_win * 1.5,
-                        'largest_loss': avg_loss * 1.3,
-                        'current_streak': hash(stock) % 5 - 2  # -2 to +2 streak
-                    }
-                }
-        
-        # Overall account performance
-        overall_performance = {}
-        if portfolio:
-            total_trades = sum(p['performance']['total_trades'] for p in portfolio.values())
-            total_wins = sum(p['performance']['wins'] for p in portfolio.values())
-            total_losses = sum(p['performance']['losses'] for p in portfolio.values())
-            total_profit = sum(p['performance']['total_profit'] for p in portfolio.values())
+            win_rate = wins / total_trades if total_trades > 0 else 0
+            
+            # Mock profit/loss calculation
+            avg_win = 150 + (hash(stock) % 100)  # $150-250 average win
+            avg_loss = 100 + (hash(stock) % 50)   # $100-150 average loss
+            total_profit = (wins * avg_win) - (losses * avg_loss)
             
-            overall_performance = {
-                'total_trades': total_trades,
-                'total_wins': total_wins,
-                'total_losses': total_losses,
-                'overall_win_rate': total_wins / total_trades if total_trades > 0 else 0,
-                'total_profit': total_profit,
-                'total_profit_percentage': (total_profit / starting_balance) * 100 if connected else 0,  # % return on starting balance
-                'best_performing_stock': max(portfolio.keys(), key=lambda k: portfolio[k]['performance']['total_return']) if portfolio else None,
-                'worst_performing_stock': min(portfolio.keys(), key=lambda k: portfolio[k]['performance']['total_return']) if portfolio else None
+            # Calculate individual stock allocation and return
+            stock_starting_balance = starting_balance / len(stocks)
+            stock_current_balance = stock_starting_balance + total_profit
+            total_return = (total_profit / stock_starting_balance) * 100 if stock_starting_balance > 0 else 0
+            
+            portfolio[stock] = {
+                'performance': {
+                    'balance': stock_current_balance,  # Reflects trading profits
+                    'position': hash(stock) % 100,  # Mock position size
+                    'current_price': current_price,  # Current stock price
+                    'total_trades': total_trades,
+                    'wins': wins,
+                    'losses': losses,
+                    'win_rate': win_rate,
+                    'total_return': total_return,
+                    'total_profit': total_profit,
+                    'avg_win': avg_win,
+                    'avg_loss': avg_loss,
+                    'largest_win': avg_win * 1.5,
+                    'largest_loss': avg_loss * 1.3,
+                    'current_streak': hash(stock) % 5 - 2  # -2 to +2 streak
+                }
             }
-        
-        return jsonify({
-            'trading_active': trading_active,
-            'mode': os.getenv('MODE', 'paper'),
-            'stocks': os.getenv('STOCKS', 'AAPL,TSLA').split(','),
-            'portfolio': portfolio,
-            'account_info': account_info,
-            'overall_performance': overall_performance,
-            'learning_progress': {},
-            'timestamp': datetime.now().isoformat(),
-            'alpaca_connected': connected
-        })
+    
+    # Overall account performance
+    overall_performance = {}
+    if portfolio:
+        total_trades = sum(p['performance']['total_trades'] for p in portfolio.values())
+        total_wins = sum(p['performance']['wins'] for p in portfolio.values())
+        total_losses = sum(p['performance']['losses'] for p in portfolio.values())
+        total_profit = sum(p['performance']['total_profit'] for p in portfolio.values())
+        
+        overall_performance = {
+            'total_trades': total_trades,
+            'total_wins': total_wins,
+            'total_losses': total_losses,
+            'overall_win_rate': total_wins / total_trades if total_trades > 0 else 0,
+            'total_profit': total_profit,
+            'total_profit_percentage': (total_profit / starting_balance) * 100 if connected else 0,  # % return on starting balance
+            'best_performing_stock': max(portfolio.keys(), key=lambda k: portfolio[k]['performance']['total_return']) if portfolio else None,
+            'worst_performing_stock': min(portfolio.keys(), key=lambda k: portfolio[k]['performance']['total_return']) if portfolio else None
+        }
+    
+    return {
+        'trading_active': trading_active,
+        'mode': os.getenv('MODE', 'paper'),
+        'stocks': os.getenv('STOCKS', 'AAPL,TSLA').split(','),
+        'portfolio': portfolio,
+        'account_info': account_info,
+        'overall_performance': overall_performance,
+        'learning_progress': {},
+        'timestamp': datetime.now().isoformat(),
+        'alpaca_connected': connected
+    }
+
+# Status is recomputed once per change (or every STATUS_REFRESH_INTERVAL seconds), not once per poll
+status_state = LiveState(
+    event_hub,
+    compute_status,
+    refresh_interval=float(os.getenv('STATUS_REFRESH_INTERVAL', 10))
+)
+
+@app.route('/status', methods=['GET'])
+def get_status():
+    """Get current trading status"""
+    try:
+        status_state.start()
+        return jsonify(status_state.get())
         
     except Exception as e:
         logger.error(f"Error getting status: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/events', methods=['GET'])
+def stream_updates():
+    """Stream status deltas and trading/training events as Server-Sent Events"""
+    channels = request.args.get('channels')
+    channels = [c.strip() for c in channels.split(',') if c.strip()] if channels else None
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    
+    status_state.start()
+    initial = [{
+        'channel': 'status',
+        'event': 'snapshot',
+        'data': status_state.get(),
+        'timestamp': datetime.now().isoformat()
+    }]
+    
+    stream = stream_events(
+        event_hub,
+        channels=channels,
+        last_event_id=int(last_event_id) if last_event_id and last_event_id.isdigit() else None,
+        initial=initial
+    )
+    return Response(stream_with_context(stream), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/switch-mode', methods=['POST'])
 def switch_mode():
     """Switch trading mode"""
@@ -660,6 +832,7 @@ def switch_mode():
         
         # Update environment variable (in memory)
         os.environ['MODE'] = new_mode
+        event_hub.publish('trading', 'mode_changed', {'mode': new_mode})
         
         return jsonify({
             'mode': new_mode,
@@ -685,6 +858,7 @@ def configure_stocks():
         os.environ['STOCKS'] = ','.join(new_stocks)
         
         logger.info(f"Reconfigured stocks: {new_stocks}")
+        event_hub.publish('trading', 'stocks_configured', {'stocks': new_stocks})
         
         return jsonify({
             'stocks': new_stocks,
@@ -747,143 +921,90 @@ def retrain_agent(symbol):
         logger.error(f"Error starting retraining for {symbol}: {e}")
         return jsonify({'error': str(e)}), 500
 
-def check_integration_status():
-    """Check the status of all system integrations"""
-    integrations = {}
-    
-    # 1. Alpaca API Market Data
-    try:
-        api_key = os.getenv('ALPACA_PAPER_KEY')
-        secret_key = os.getenv('ALPACA_PAPER_SECRET')
-        if api_key and secret_key:
-            headers = {
-                'APCA-API-KEY-ID': api_key,
-                'APCA-API-SECRET-KEY': secret_key
-            }
-            response = requests.get(
-                'https://data.alpaca.markets/v2/stocks/AAPL/trades/latest',
-                headers=headers,
-                timeout=5
-            )
-            integrations['alpaca_market_data'] = {
-                'name': 'Alpaca Market Data API',
-                'status': 'connected' if response.status_code == 200 else 'error',
-                'message': f'Latest AAPL price available' if response.status_code == 200 else f'Error: {response.status_code}',
-                'last_check': datetime.now().isoformat()
-            }
-        else:
-            integrations['alpaca_market_data'] = {
-                'name': 'Alpaca Market Data API',
-                'status': 'warning',
-                'message': 'API keys not configured, using mock data',
-                'last_check': datetime.now().isoformat()
-            }
-    except Exception as e:
-        integrations['alpaca_market_data'] = {
-            'name': 'Alpaca Market Data API',
-            'status': 'error',
-            'message': f'Connection failed: {str(e)}',
-            'last_check': datetime.now().isoformat()
-        }
-    
-    # 2. Alpaca Trading API
-    try:
-        connected, account_data = test_alpaca_connection()
-        integrations['alpaca_trading'] = {
-            'name': 'Alpaca Trading API',
-            'status': 'connected' if connected else 'error',
-            'message': f'Account active, Cash: ${float(account_data.get("cash", 0)):,.2f}' if connected and isinstance(account_data, dict) else 'Trading API connection failed',
-            'last_check': datetime.now().isoformat()
-        }
-    except Exception as e:
-        integrations['alpaca_trading'] = {
-            'name': 'Alpaca Trading API',
-            'status': 'error',
-            'message': f'Connection failed: {str(e)}',
-            'last_check': datetime.now().isoformat()
-        }
-    
-    # 3. Price Data Feed
-    try:
-        test_price = get_current_price('AAPL')
-        integrations['price_feed'] = {
-            'name': 'Real-time Price Feed',
-            'status': 'connected' if test_price > 0 else 'warning',
-            'message': f'AAPL: ${test_price:.2f}' if test_price > 0 else 'Using fallback prices',
-            'last_check': datetime.now().isoformat()
-        }
-    except Exception as e:
-        integrations['price_feed'] = {
-            'name': 'Real-time Price Feed',
-            'status': 'error',
-            'message': f'Price feed error: {str(e)}',
-            'last_check': datetime.now().isoformat()
-        }
-    
-    # 4. Portfolio Management
-    try:
-        stocks = os.getenv('STOCKS', 'AAPL,TSLA,GOOGL,MSFT,NVDA').split(',')
-        total_profit = 0
-        for stock in stocks:
-            total_trades = 25 + hash(stock) % 50
-            wins = int(total_trades * (0.6 + (hash(stock) % 20) / 100))
-            losses = total_trades - wins
-            avg_win = 150 + (hash(stock) % 100)
-            avg_loss = 100 + (hash(stock) % 50)
-            total_profit += (wins * avg_win) - (losses * avg_loss)
-        
-        integrations['portfolio_manager'] = {
-            'name': 'Portfolio Management',
-            'status': 'connected',
-            'message': f'Managing {len(stocks)} stocks, Total P&L: ${total_profit:,.0f}',
-            'last_check': datetime.now().isoformat()
-        }
-    except Exception as e:
-        integrations['portfolio_manager'] = {
-            'name': 'Portfolio Management',
-            'status': 'error',
-            'message': f'Portfolio error: {str(e)}',
-            'last_check': datetime.now().isoformat()
-        }
-    
-    # 5. Risk Management System
-    integrations['risk_management'] = {
-        'name': 'Risk Management',
-        'status': 'connected',
-        'message': 'Risk controls active, Position limits enforced',
-        'last_check': datetime.now().isoformat()
-    }
-    
-    # 6. Trading Engine
-    integrations['trading_engine'] = {
-        'name': 'Trading Engine',
-        'status': 'connected',
-        'message': 'Paper trading mode, Ready for orders',
-        'last_check': datetime.now().isoformat()
-    }
-    
-    # 7. AI/ML Models
-    integrations['ai_models'] = {
-        'name': 'AI/ML Models',
-        'status': 'connected',
-        'message': 'PPO agents loaded for all symbols',
-        'last_check': datetime.now().isoformat()
-    }
+def probe_alpaca_market_data():
+    """Health probe: Alpaca market data API"""
+    headers = get_alpaca_headers()
+    if not headers:
+        return 'warning', 'API keys not configured, using mock data'
     
-    # 8. Database Connection
-    integrations['database'] = {
-        'name': 'Database',
-        'status': 'connected',
-        'message': 'SQLite database accessible',
-        'last_check': datetime.now().isoformat()
-    }
+    response = http_client.get(
+        f'{ALPACA_DATA_URL}/v2/stocks/AAPL/trades/latest',
+        endpoint='alpaca.latest_trade',
+        headers=headers,
+        timeout=5
+    )
+    if response.status_code == 200:
+        return 'connected', 'Latest AAPL price available'
+    return 'error', f'Error: {response.status_code}'
+
+def probe_alpaca_trading():
+    """Health probe: Alpaca trading API"""
+    connected, account_data = test_alpaca_connection()
+    if connected and isinstance(account_data, dict):
+        return 'connected', f'Account active, Cash: ${float(account_data.get("cash", 0)):,.2f}'
+    return 'error', 'Trading API connection failed'
+
+def probe_price_feed():
+    """Health probe: real-time price feed"""
+    test_price = get_current_price('AAPL')
+    if test_price > 0:
+        return 'connected', f'AAPL: ${test_price:.2f}'
+    return 'warning', 'Using fallback prices'
+
+def probe_portfolio_manager():
+    """Health probe: portfolio management"""
+    stocks = os.getenv('STOCKS', 'AAPL,TSLA,GOOGL,MSFT,NVDA').split(',')
+    total_profit = 0
+    for stock in stocks:
+        total_trades = 25 + hash(stock) % 50
+        wins = int(total_trades * (0.6 + (hash(stock) % 20) / 100))
+        losses = total_trades - wins
+        avg_win = 150 + (hash(stock) % 100)
+        avg_loss = 100 + (hash(stock) % 50)
+        total_profit += (wins * avg_win) - (losses * avg_loss)
     
-    return integrations
+    return 'connected', f'Managing {len(stocks)} stocks, Total P&L: ${total_profit:,.0f}'
+
+# Background health monitor: external checks run on their own schedule, endpoints read the cache
+HEALTH_CHECK_INTERVAL = float(os.getenv('HEALTH_CHECK_INTERVAL', 30))
+STATIC_CHECK_INTERVAL = 300
+
+health_monitor = HealthMonitor()
+health_monitor.register('alpaca_market_data', 'Alpaca Market Data API', probe_alpaca_market_data,
+                        interval=HEALTH_CHECK_INTERVAL)
+health_monitor.register('alpaca_trading', 'Alpaca Trading API', probe_alpaca_trading,
+                        interval=HEALTH_CHECK_INTERVAL)
+health_monitor.register('price_feed', 'Real-time Price Feed', probe_price_feed,
+                        interval=HEALTH_CHECK_INTERVAL, error_message='Price feed error')
+health_monitor.register('portfolio_manager', 'Portfolio Management', probe_portfolio_manager,
+                        interval=HEALTH_CHECK_INTERVAL, error_message='Portfolio error')
+health_monitor.register('risk_management', 'Risk Management',
+                        lambda: ('connected', 'Risk controls active, Position limits enforced'),
+                        interval=STATIC_CHECK_INTERVAL)
+health_monitor.register('trading_engine', 'Trading Engine',
+                        lambda: ('connected', 'Paper trading mode, Ready for orders'),
+                        interval=STATIC_CHECK_INTERVAL)
+health_monitor.register('ai_models', 'AI/ML Models',
+                        lambda: ('connected', 'PPO agents loaded for all symbols'),
+                        interval=STATIC_CHECK_INTERVAL)
+health_monitor.register('database', 'Database',
+                        lambda: ('connected', 'SQLite database accessible'),
+                        interval=STATIC_CHECK_INTERVAL)
+
+def check_integration_status():
+    """Check the status of all system integrations (cached by the background health monitor)"""
+    if not health_monitor.running:
+        health_monitor.start()
+    return health_monitor.get_snapshot()
 
 @app.route('/integration-status', methods=['GET'])
 def get_integration_status():
     """Get the status of all system integrations"""
     try:
+        if request.args.get('refresh', '').lower() == 'true':
+            # Re-probe in the background; this response still returns the cached state
+            health_monitor.refresh()
+        
         integrations = check_integration_status()
         
         # Calculate overall health
@@ -891,8 +1012,11 @@ def get_integration_status():
         connected_count = sum(1 for i in integrations.values() if i['status'] == 'connected')
         warning_count = sum(1 for i in integrations.values() if i['status'] == 'warning')
         error_count = sum(1 for i in integrations.values() if i['status'] == 'error')
+        pending_count = sum(1 for i in integrations.values() if i['status'] == 'pending')
         
         overall_health = 'healthy' if error_count == 0 and warning_count <= 1 else 'warning' if error_count == 0 else 'critical'
+        if pending_count == total_integrations:
+            overall_health = 'pending'
         
         return jsonify({
             'success': True,
@@ -903,6 +1027,7 @@ def get_integration_status():
                     'connected': connected_count,
                     'warnings': warning_count,
                     'errors': error_count,
+                    'pending': pending_count,
                     'overall_health': overall_health
                 },
                 'last_updated': datetime.now().isoformat()
@@ -913,6 +1038,35 @@ def get_integration_status():
         logger.error(f"Error getting integration status: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/http-stats', methods=['GET'])
+def get_http_stats():
+    """Get per-endpoint latency statistics for outbound HTTP calls"""
+    try:
+        return jsonify({
+            'success': True,
+            'endpoints': http_client.get_latency_stats(),
+            'quote_cache': quote_cache.get_stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting HTTP stats: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+metrics.register_gauge('tradingbot_sse_subscribers', 'Connected /events subscribers',
+                       lambda: event_hub.get_stats()['subscribers'])
+metrics.register_gauge('tradingbot_status_computations', 'Status snapshot recomputations since start',
+                       lambda: status_state.compute_count)
+metrics.register_gauge('tradingbot_integration_up', 'Integration health from the background monitor (1 = connected)',
+                       lambda: {(key,): int(entry['status'] == 'connected')
+                                for key, entry in health_monitor.get_snapshot().items()},
+                       labelnames=('integration',))
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics: request latency per route/status and internal span timings"""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/logs', methods=['GET'])
 def get_logs():
     """Get recent trading logs with integration status"""
@@ -1018,17 +1172,18 @@ def get_logs():
 from advanced_training_system import AdvancedTrainingSystem
 
 # Initialize training system
-training_system = AdvancedTrainingSystem()
+training_system = AdvancedTrainingSystem(event_hub=event_hub)
 
 @app.route('/training/search-stocks', methods=['GET'])
 def search_stocks():
     """Search for stocks by symbol or company name"""
     try:
         query = request.args.get('query', '')
+        limit = int(request.args.get('limit', 20))
         if not query:
             return jsonify({'error': 'Query parameter is required'}), 400
         
-        stocks = training_system.search_stocks(query)
+        stocks = training_system.search_stocks(query, limit)
         return jsonify({
             'stocks': stocks,
             'query': query,
@@ -1054,6 +1209,29 @@ def get_stock_info(symbol):
         logger.error(f"Error getting stock info for {symbol}: {e}")
         return jsonify({'error': str(e)}), 500
 
+MAX_STOCK_INFO_SYMBOLS = 50
+
+@app.route('/training/stocks-info', methods=['GET'])
+def get_stocks_info():
+    """Get information for several stocks in one call (comma-separated symbols)"""
+    try:
+        symbols = [s for s in request.args.get('symbols', '').split(',') if s.strip()]
+        if not symbols:
+            return jsonify({'error': 'Symbols parameter is required'}), 400
+        if len(symbols) > MAX_STOCK_INFO_SYMBOLS:
+            return jsonify({'error': f'At most {MAX_STOCK_INFO_SYMBOLS} symbols per request'}), 400
+        
+        stocks = training_system.get_stocks_info(symbols)
+        return jsonify({
+            'stocks': stocks,
+            'count': len(stocks),
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting stocks info: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/training/import-data', methods=['POST'])
 def import_data():
     """Import historical data for training"""
@@ -1061,11 +1239,13 @@ def import_data():
         data = request.get_json() or {}
         symbol = data.get('symbol')
         months = data.get('months', 3)
+        timeframe = data.get('timeframe', '5Min')
+        resume = bool(data.get('resume', True))
         
         if not symbol:
             return jsonify({'error': 'Symbol is required'}), 400
         
-        result = training_system.import_historical_data(symbol, months)
+        result = training_system.import_historical_data(symbol, months, timeframe=timeframe, resume=resume)
         return jsonify({
             'import_result': result,
             'timestamp': datetime.now().isoformat()
@@ -1082,12 +1262,13 @@ def train_model():
         data = request.get_json() or {}
         symbol = data.get('symbol')
         model_type = data.get('model_type', 'PPO')
-        training_steps = data.get('training_steps', 50000)
+        training_steps = int(data.get('training_steps', 50000))
+        priority = int(data.get('priority', 0))
         
         if not symbol:
             return jsonify({'error': 'Symbol is required'}), 400
         
-        result = training_system.train_advanced_model(symbol, model_type, training_steps)
+        result = training_system.train_advanced_model(symbol, model_type, training_steps, priority=priority)
         return jsonify({
             'training_result': result,
             'timestamp': datetime.now().isoformat()
@@ -1119,6 +1300,101 @@ def run_simulation():
         logger.error(f"Error running simulation: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/training/simulation-sweep', methods=['POST'])
+def run_simulation_sweep():
+    """Backtest a grid of symbols x saved models x date windows in worker processes"""
+    try:
+        data = request.get_json() or {}
+        result = training_system.run_simulation_sweep(
+            symbols=data.get('symbols'),
+            model_paths=data.get('model_paths'),
+            windows=data.get('windows'),
+            rank_by=data.get('rank_by', 'sharpe_ratio'),
+            priority=int(data.get('priority', 0))
+        )
+        if 'error' in result:
+            return jsonify(result), 400
+        return jsonify({
+            'sweep_result': result,
+            'timestamp': datetime.now().isoformat()
+        }), 202
+        
+    except Exception as e:
+        logger.error(f"Error starting simulation sweep: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/training/walk-forward', methods=['POST'])
+def run_walk_forward():
+    """Walk-forward evaluation: train on rolling folds in worker processes and test on the next window"""
+    try:
+        data = request.get_json() or {}
+        if not data.get('symbol'):
+            return jsonify({'error': 'symbol is required'}), 400
+        
+        result = training_system.run_walk_forward(
+            symbol=data['symbol'],
+            model_type=data.get('model_type', 'PPO'),
+            folds=int(data.get('folds', 4)),
+            train_bars=data.get('train_bars'),
+            test_bars=data.get('test_bars'),
+            anchored=bool(data.get('anchored', False)),
+            timesteps=int(data.get('timesteps', 10000)),
+            hyperparameters=data.get('hyperparameters'),
+            seed=data.get('seed'),
+            priority=int(data.get('priority', 0))
+        )
+        if 'error' in result:
+            return jsonify(result), 400
+        return jsonify({
+            'walk_forward_result': result,
+            'timestamp': datetime.now().isoformat()
+        }), 202
+        
+    except Exception as e:
+        logger.error(f"Error starting walk-forward evaluation: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/training/simulation/<simulation_id>', methods=['GET'])
+def get_simulation(simulation_id):
+    """Get a stored simulation result, downsampled to ?points= and limited to ?start=/&end="""
+    try:
+        points = request.args.get('points', type=int)
+        result = training_system.get_simulation(
+            simulation_id, points, request.args.get('start'), request.args.get('end')
+        )
+        if 'error' in result:
+            return jsonify(result), 404 if result['error'].endswith('not found') else 400
+        return jsonify({
+            'simulation_result': result,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting simulation {simulation_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/training/simulation/<simulation_id>/bootstrap', methods=['GET'])
+def get_simulation_bootstrap(simulation_id):
+    """Monte Carlo block bootstrap of a stored simulation (?resamples=&block_size=&confidence=&seed=)"""
+    try:
+        result = training_system.get_simulation_bootstrap(
+            simulation_id,
+            resamples=request.args.get('resamples', 10000, type=int),
+            block_size=request.args.get('block_size', type=int),
+            confidence=request.args.get('confidence', 0.95, type=float),
+            seed=request.args.get('seed', type=int)
+        )
+        if 'error' in result:
+            return jsonify(result), 404 if result['error'].endswith('not found') else 400
+        return jsonify({
+            'bootstrap_result': result,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error bootstrapping simulation {simulation_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/training/status', methods=['GET'])
 def get_training_status():
     """Get training status"""
@@ -1134,6 +1410,21 @@ def get_training_status():
         logger.error(f"Error getting training status: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/training/cancel/<training_id>', methods=['POST'])
+def cancel_training(training_id):
+    """Cancel a queued or running training job"""
+    try:
+        result = training_system.cancel_training(training_id)
+        status_code = 404 if 'error' in result else 200
+        return jsonify({
+            **result,
+            'timestamp': datetime.now().isoformat()
+        }), status_code
+        
+    except Exception as e:
+        logger.error(f"Error cancelling training: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/training/models', methods=['GET'])
 def get_available_models():
     """Get available trained models"""
@@ -1385,5 +1676,8 @@ if __name__ == '__main__':
     # Initialize sample logs if needed
     initialize_sample_logs()
     
+    # Start background integration health checks
+    health_monitor.start()
+    
     port = int(os.getenv('PORT', 8080))  # Use port 8080
     app.run(host='0.0.0.0', port=port, debug=True, threaded=True)
\ No newline at end of file
@@ -0,0 +1,271 @@
+"""
+Simulation Result Store
+LRU-bounded in-memory store for simulation results that spills older results to compressed files,
+with time-window queries and LTTB downsampling for chart payloads
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Per-step series kept as arrays; everything else in a result is summary metadata
+CHART_COLUMNS = ('price', 'portfolio_value', 'position', 'balance', 'action', 'reward', 'volume')
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+SIMULATION_ID_PATTERN = re.compile(r'[A-Za-z0-9][A-Za-z0-9_.-]*')
+
+
+def utc_naive(value: str) -> np.datetime64:
+    """Naive UTC time, like the stored timestamps; times with an offset are converted first"""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert('UTC')
+    return np.datetime64(timestamp.tz_localize(None))
+
+
+def lttb(y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets downsampling
+    Points are assumed evenly spaced; the first and last point are always kept.
+    """
+    n = len(y)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1])[:max(threshold, 0)]
+
+    y = np.asarray(y, dtype=float)
+    # Bucket boundaries for the points between the first and last one
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start = edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = (next_start + next_end - 1) / 2.0
+        avg_y = y[next_start:next_end].mean()
+
+        xs = np.arange(start, end)
+        areas = np.abs((a - avg_x) * (y[start:end] - y[a]) - (a - xs) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return selected
+
+
+class SimulationStore:
+    """
+    Keeps the ``max_in_memory`` most recently used simulation results in memory
+    Evicted results are written to ``spill_dir`` as compressed ``.npz`` files
+    (series as arrays, summary and trades as JSON) and reloaded on access. At
+    most ``max_on_disk`` spilled results are kept; the oldest files are removed.
+    """
+
+    def __init__(self, spill_dir: str, max_in_memory: int = None, max_on_disk: int = None):
+        self.spill_dir = spill_dir
+        self.max_in_memory = max_in_memory or int(os.getenv('SIMULATION_CACHE_SIZE', 20))
+        self.max_on_disk = max_on_disk or int(os.getenv('SIMULATION_DISK_LIMIT', 500))
+        os.makedirs(self.spill_dir, exist_ok=True)
+
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self.spilled = 0
+        self.loaded = 0
+
+    def put(self, simulation_id: str, result: Dict):
+        """Store a result from ``_run_model_simulation`` (row-wise or columnar chart data)"""
+        self._check_id(simulation_id)
+        stored = self._to_columnar(result)
+        with self._lock:
+            self._results[simulation_id] = stored
+            self._results.move_to_end(simulation_id)
+            self._evict()
+
+    def get(self, simulation_id: str) -> Optional[Dict]:
+        """Full stored result: summary fields, ``trades`` and ``series`` columns"""
+        if not SIMULATION_ID_PATTERN.fullmatch(simulation_id or ''):
+            return None
+        with self._lock:
+            stored = self._results.get(simulation_id)
+            if stored is not None:
+                self._results.move_to_end(simulation_id)
+                return stored
+
+            stored = self._load(simulation_id)
+            if stored is not None:
+                self._results[simulation_id] = stored
+                self._evict()
+            return stored
+
+    def query(self, simulation_id: str, points: int = None, start: str = None, end: str = None,
+              max_trades: int = None) -> Optional[Dict]:
+        """
+        Result with chart data limited to the ``start``-``end`` window and downsampled to ``points``
+        Trades are limited to the window (the latest ``max_trades`` of them, default
+        ``points``) and carry the ``chart_index`` of the chart point they fall on.
+        Raises ``ValueError`` if ``start`` or ``end`` is not a valid time.
+        """
+        stored = self.get(simulation_id)
+        if stored is None:
+            return None
+
+        series = stored['series']
+        timestamps = series['timestamp']
+        lo, hi = 0, len(timestamps)
+        if start:
+            lo = int(np.searchsorted(timestamps, self._normalize_time(start), side='left'))
+        if end:
+            hi = int(np.searchsorted(timestamps, self._normalize_time(end), side='right'))
+        hi = max(lo, hi)
+
+        window = hi - lo
+        if points and window > points:
+            # Keep the shape of both the price line and the portfolio curve
+            prices, values = series['price'][lo:hi], series['portfolio_value'][lo:hi]
+            picked = np.union1d(lttb(prices, points), lttb(values, points))
+            if len(picked) > points:
+                half = max(3, points // 2)
+                picked = np.union1d(lttb(prices, half), lttb(values, half))
+            if len(picked) > points:
+                # Too few points to keep both curves; the portfolio curve wins
+                picked = lttb(values, points)
+            indices = lo + picked
+        else:
+            indices = np.arange(lo, hi)
+
+        columns = {name: series[name][indices].tolist() for name in CHART_COLUMNS}
+        chart_data = [
+            dict(step=int(step), timestamp=str(timestamps[step]), **{name: columns[name][i] for name in CHART_COLUMNS})
+            for i, step in enumerate(indices)
+        ]
+
+        trades = [trade for trade in stored['trades'] if lo <= trade['step'] < hi]
+        trades_in_window = len(trades)
+        max_trades = max_trades or points
+        if max_trades and len(trades) > max_trades:
+            trades = trades[-max_trades:]
+        if len(indices):
+            positions = np.searchsorted(indices, [trade['step'] for trade in trades], side='right') - 1
+            trades = [dict(trade, chart_index=int(max(position, 0))) for trade, position in zip(trades, positions)]
+
+        result = dict(stored['summary'])
+        result.update({
+            'simulation_id': simulation_id,
+            'chart_data': chart_data,
+            'portfolio_values': columns['portfolio_value'],
+            'trades': trades,
+            'trades_in_window': trades_in_window,
+            'points': {'total': len(timestamps), 'window': window, 'returned': len(chart_data)}
+        })
+        return result
+
+    def list_ids(self) -> List[str]:
+        """Ids of results in memory and on disk"""
+        with self._lock:
+            in_memory = list(self._results)
+        on_disk = [name[:-len('.npz')] for name in os.listdir(self.spill_dir) if name.endswith('.npz')]
+        return list(dict.fromkeys(in_memory + sorted(on_disk)))
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            in_memory = len(self._results)
+        return {
+            'in_memory': in_memory,
+            'max_in_memory': self.max_in_memory,
+            'spilled': self.spilled,
+            'loaded_from_disk': self.loaded
+        }
+
+    @staticmethod
+    def _check_id(simulation_id: str):
+        if not SIMULATION_ID_PATTERN.fullmatch(simulation_id or ''):
+            raise ValueError(f"Invalid simulation id: {simulation_id!r}")
+
+    @staticmethod
+    def _normalize_time(value: str) -> str:
+        try:
+            return pd.Timestamp(utc_naive(value)).strftime(TIMESTAMP_FORMAT)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid time: {value!r}")
+
+    @staticmethod
+    def _to_columnar(result: Dict) -> Dict:
+        summary = {key: value for key, value in result.items()
+                   if key not in ('chart_data', 'trades', 'portfolio_values')}
+        chart_data = result.get('chart_data') or []
+
+        if isinstance(chart_data, dict):
+            columns = chart_data
+            timestamps = columns.get('timestamp', [])
+        else:
+            columns = {name: [row.get(name, 0) for row in chart_data] for name in CHART_COLUMNS}
+            timestamps = [row.get('timestamp') for row in chart_data]
+
+        series = {'timestamp': np.asarray([str(ts) for ts in timestamps], dtype=str)}
+        for name in CHART_COLUMNS:
+            values = columns.get(name)
+            series[name] = (np.asarray(values, dtype=float) if values is not None and len(values)
+                            else np.zeros(len(series['timestamp'])))
+        series['action'] = series['action'].astype(np.int8)
+
+        return {'summary': summary, 'trades': list(result.get('trades') or []), 'series': series}
+
+    def _path(self, simulation_id: str) -> str:
+        return os.path.join(self.spill_dir, f'{simulation_id}.npz')
+
+    def _evict(self):
+        while len(self._results) > self.max_in_memory:
+            simulation_id, stored = self._results.popitem(last=False)
+            self._spill(simulation_id, stored)
+
+    def _spill(self, simulation_id: str, stored: Dict):
+        path = self._path(simulation_id)
+        if os.path.exists(path):
+            # Results never change after they are stored
+            return
+        try:
+            meta = json.dumps({'summary': stored['summary'], 'trades': stored['trades']}, default=str)
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.savez_compressed(f, meta=np.array(meta), **stored['series'])
+            os.replace(tmp_path, path)
+            self.spilled += 1
+            self._prune_disk()
+        except Exception as e:
+            logger.error(f"Error spilling simulation {simulation_id} to disk: {e}")
+
+    def _load(self, simulation_id: str) -> Optional[Dict]:
+        path = self._path(simulation_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data['meta']))
+                series = {name: data[name] for name in ('timestamp',) + CHART_COLUMNS}
+            self.loaded += 1
+            return {'summary': meta['summary'], 'trades': meta['trades'], 'series': series}
+        except Exception as e:
+            logger.error(f"Error loading simulation {simulation_id} from disk: {e}")
+            return None
+
+    def _prune_disk(self):
+        files = [os.path.join(self.spill_dir, name) for name in os.listdir(self.spill_dir) if name.endswith('.npz')]
+        excess = len(files) - self.max_on_disk
+        if excess > 0:
+            for path in sorted(files, key=os.path.getmtime)[:excess]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,189 @@
+"""
+Simulation Sweep
+Runs backtests for a grid of symbols x saved models x date windows in a process pool and ranks the results
+"""
+
+import os
+import logging
+import itertools
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backtest import BacktestEngine
+from columnar_store import load_columns, read_manifest
+from feature_store import feature_key, get_feature_registry
+from historical_import import DEFAULT_TIMEFRAME
+from simulation_store import utc_naive
+
+logger = logging.getLogger(__name__)
+
+# Market data columns the backtest reads; everything else in the datasets is left out
+MARKET_COLUMNS = ('Close', 'Volume', 'RSI', 'MACD')
+
+# Ranking metrics and whether higher is better
+RANK_METRICS = {
+    'sharpe_ratio': True,
+    'total_return_pct': True,
+    'win_rate': True,
+    'max_drawdown_pct': False
+}
+
+MAX_SWEEP_TASKS = 500
+MODEL_CACHE_SIZE = 4
+
+# Set in each worker process by _init_worker; read-only for the life of the pool
+_market_data = {}
+_models = OrderedDict()
+
+
+def load_market_data(data_path: str) -> Dict[str, np.ndarray]:
+    """Memory-map an imported dataset's market columns (timestamps as UTC datetime64)"""
+    data = load_columns(data_path, ('timestamp',) + MARKET_COLUMNS)
+    for column in MARKET_COLUMNS:
+        if column not in data:
+            data[column] = np.zeros(len(data['timestamp']))
+    return data
+
+
+def dataset_feature_key(symbol: str, data_path: str) -> str:
+    """Feature registry key of an imported dataset; sweeps and training environments share its set"""
+    manifest = read_manifest(data_path)
+    return feature_key(symbol, manifest.get('timeframe', DEFAULT_TIMEFRAME), manifest.get('start'), manifest.get('end'))
+
+
+def load_model(model_path: str):
+    """Load a saved Stable-Baselines3 model; the algorithm is taken from the file name"""
+    from stable_baselines3 import PPO, A2C, SAC
+
+    name = os.path.basename(model_path)
+    for key, model_class in (('PPO', PPO), ('A2C', A2C), ('SAC', SAC)):
+        if key in name:
+            return model_class.load(model_path)
+    raise ValueError(f'Unknown model type: {name}')
+
+
+def window_slice(timestamps: np.ndarray, start: Optional[str], end: Optional[str]) -> slice:
+    """Index range of sorted timestamps inside ``[start, end)``"""
+    lo = np.searchsorted(timestamps, utc_naive(start), 'left') if start else 0
+    hi = np.searchsorted(timestamps, utc_naive(end), 'left') if end else len(timestamps)
+    return slice(int(lo), int(hi))
+
+
+def pool_context(*preload: str):
+    """
+    Start method for worker pools; never ``fork``
+    The server process runs trading, training and stream threads, and a forked
+    child could inherit a lock one of them holds. ``forkserver`` children fork
+    from a single-threaded server that has imported ``preload``; platforms
+    without it use ``spawn``.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(list(preload))
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def _init_worker(descriptors: Dict[str, Dict]):
+    global _market_data
+    registry = get_feature_registry()
+    _market_data = {symbol: registry.attach(descriptor).columns for symbol, descriptor in descriptors.items()}
+
+
+def _get_model(model_path: str):
+    model = _models.get(model_path)
+    if model is None:
+        model = load_model(model_path)
+        _models[model_path] = model
+        while len(_models) > MODEL_CACHE_SIZE:
+            _models.popitem(last=False)
+    else:
+        _models.move_to_end(model_path)
+    return model
+
+
+def _run_task(task: Dict) -> Dict:
+    """Backtest one (symbol, model, window) cell inside a worker process"""
+    row = {
+        'symbol': task['symbol'],
+        'model': os.path.basename(task['model_path']),
+        'model_path': task['model_path'],
+        'start': task.get('start'),
+        'end': task.get('end')
+    }
+    try:
+        data = _market_data[task['symbol']]
+        window = window_slice(data['timestamp'], task.get('start'), task.get('end'))
+        df = pd.DataFrame({column: data[column][window] for column in MARKET_COLUMNS})
+        df['timestamp'] = data['timestamp'][window]
+        row['bars'] = len(df)
+
+        result = BacktestEngine().run(_get_model(task['model_path']), df, task['symbol'])
+        if not result.get('success'):
+            row['error'] = result.get('error', 'Simulation failed')
+            return row
+
+        for key in ('total_return_pct', 'sharpe_ratio', 'max_drawdown_pct', 'win_rate',
+                    'total_trades', 'final_value', 'total_reward'):
+            row[key] = result[key]
+        return row
+
+    except Exception as e:
+        row['error'] = str(e)
+        return row
+
+
+def build_tasks(symbols: List[str], model_paths: List[str], windows: List[Dict]) -> List[Dict]:
+    """Cartesian grid of sweep cells, grouped by model so workers reuse loaded models"""
+    windows = windows or [{}]
+    return [
+        {'symbol': symbol, 'model_path': model_path, 'start': window.get('start'), 'end': window.get('end')}
+        for model_path, symbol, window in itertools.product(model_paths, symbols, windows)
+    ]
+
+
+def rank_results(rows: List[Dict], rank_by: str = 'sharpe_ratio') -> List[Dict]:
+    """Sort successful rows by ``rank_by`` (failed rows last) and number them"""
+    higher_is_better = RANK_METRICS[rank_by]
+    ok = [row for row in rows if 'error' not in row]
+    failed = [row for row in rows if 'error' in row]
+    ok.sort(key=lambda row: row[rank_by], reverse=higher_is_better)
+    for rank, row in enumerate(ok, start=1):
+        row['rank'] = rank
+    return ok + failed
+
+
+def run_sweep(tasks: List[Dict], market_data: Dict[str, Dict], workers: int = None,
+              on_progress: Callable[[int, int], None] = None,
+              should_stop: Callable[[], None] = None) -> List[Dict]:
+    """
+    Run every task in a process pool and return the unranked result rows
+    ``market_data`` maps each symbol to the descriptor of its feature set
+    (see ``feature_store``); workers attach to the shared blocks, so every
+    worker reads the parent's single copy.
+    ``should_stop`` is called between completions and may raise to abort.
+    """
+    workers = max(1, min(workers or int(os.getenv('SIMULATION_SWEEP_WORKERS', os.cpu_count() or 1)), len(tasks)))
+    context = pool_context(__name__)
+
+    rows = []
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                   initializer=_init_worker, initargs=(market_data,))
+    try:
+        pending = {executor.submit(_run_task, task) for task in tasks}
+        while pending:
+            done, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            rows.extend(future.result() for future in done)
+            if done and on_progress:
+                on_progress(len(rows), len(tasks))
+            if should_stop:
+                should_stop()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return rows
@@ -0,0 +1,9 @@
+"""
+Test configuration
+Backend modules are imported as top-level modules, as app.py does
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
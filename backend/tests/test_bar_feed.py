@@ -0,0 +1,91 @@
+"""
+Bar feed selection, dispatching and failure reporting
+"""
+
+import threading
+import time
+
+import pytest
+
+from bar_feed import AlpacaBarFeed, BarDispatcher, BarFeed, create_bar_feed
+
+
+class ManualFeed(BarFeed):
+    """Feed driven by the test; ``start`` raises ``start_error`` if set"""
+
+    def __init__(self, start_error=None):
+        super().__init__()
+        self.start_error = start_error
+        self.stopped = False
+
+    def start(self, symbols):
+        if self.start_error is not None:
+            raise self.start_error
+
+    def stop(self):
+        self.stopped = True
+
+
+def test_poll_is_the_default(monkeypatch):
+    monkeypatch.delenv('BAR_FEED', raising=False)
+    assert create_bar_feed() is None
+
+
+def test_unknown_feed_is_rejected(monkeypatch):
+    monkeypatch.setenv('BAR_FEED', 'carrier-pigeon')
+    with pytest.raises(ValueError):
+        create_bar_feed()
+
+
+def test_dispatcher_coalesces_pending_bars():
+    feed = ManualFeed()
+    batches = []
+    release = threading.Event()
+
+    def on_bars(bars):
+        batches.append([bar['Close'] for bar in bars])
+        release.wait(2)
+
+    dispatcher = BarDispatcher(feed, on_bars)
+    dispatcher.start(['AAPL'])
+    feed.publish({'symbol': 'AAPL', 'Close': 1.0})
+    time.sleep(0.2)
+    for close in (2.0, 3.0, 4.0):
+        feed.publish({'symbol': 'AAPL', 'Close': close})
+    release.set()
+    time.sleep(0.3)
+    dispatcher.stop()
+
+    assert batches == [[1.0], [2.0, 3.0, 4.0]]
+
+
+def test_failed_start_stops_the_dispatcher():
+    feed = ManualFeed(start_error=ValueError('bad credentials'))
+    dispatcher = BarDispatcher(feed, lambda bars: None)
+
+    with pytest.raises(ValueError):
+        dispatcher.start(['AAPL'])
+
+    dispatcher.thread.join(timeout=3)
+    assert not dispatcher.thread.is_alive()
+    assert feed.stopped
+    assert feed._handlers == []
+
+
+def test_feed_failure_reaches_the_dispatcher():
+    feed = ManualFeed()
+    failures = []
+    dispatcher = BarDispatcher(feed, lambda bars: None, on_failure=failures.append)
+    dispatcher.start(['AAPL'])
+
+    error = RuntimeError('stream closed')
+    feed.fail(error)
+    dispatcher.stop()
+
+    assert failures == [error]
+    assert feed.get_stats()['error'] == 'stream closed'
+
+
+def test_alpaca_feed_requires_keys():
+    with pytest.raises(ValueError):
+        AlpacaBarFeed(None, None).start(['AAPL'])
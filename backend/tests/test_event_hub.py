@@ -0,0 +1,176 @@
+"""
+EventHub, merge patches, LiveState and the SSE stream, all in-process
+"""
+
+import json
+import time
+from datetime import datetime
+
+import pytest
+from flask import Flask, Response, request, stream_with_context
+
+from event_hub import EventHub, LiveState, merge_patch, stream_events
+
+
+def test_publish_fans_out_to_matching_subscribers():
+    hub = EventHub()
+    everything = hub.subscribe()
+    trading = hub.subscribe(['trading'])
+
+    hub.publish('trading', 'decision', {'symbol': 'AAPL'})
+    hub.publish('training', 'progress', {'done': 1})
+
+    assert [everything.get(0.1)['channel'] for _ in range(2)] == ['trading', 'training']
+    message = trading.get(0.1)
+    assert message['event'] == 'decision' and message['data'] == {'symbol': 'AAPL'}
+    assert trading.get(0.05) is None
+
+
+def test_listeners_are_called_and_errors_contained():
+    hub = EventHub()
+    seen = []
+    hub.add_listener(lambda message: 1 / 0)
+    hub.add_listener(seen.append)
+
+    hub.publish('trading', 'decision', {})
+
+    assert [message['event'] for message in seen] == ['decision']
+
+
+def test_slow_subscriber_drops_oldest_without_blocking_publisher():
+    hub = EventHub(subscriber_queue_size=3)
+    slow = hub.subscribe()
+    fast = hub.subscribe()
+    received = []
+
+    start = time.perf_counter()
+    for i in range(10):
+        hub.publish('trading', 'tick', i)
+        received.append(fast.get(0.1)['data'])
+    assert time.perf_counter() - start < 1
+
+    assert received == list(range(10))
+    assert [slow.get(0.1)['data'] for _ in range(3)] == [7, 8, 9]
+    assert slow.dropped == 7
+    assert hub.get_stats()['dropped_events'] == 7
+
+
+def test_subscribe_replays_history_after_last_event_id():
+    hub = EventHub()
+    ids = [hub.publish('trading', 'tick', i)['id'] for i in range(5)]
+
+    subscription = hub.subscribe(['trading'], last_event_id=ids[2])
+
+    assert [subscription.get(0.1)['data'] for _ in range(2)] == [3, 4]
+    subscription.close()
+    assert hub.get_stats()['subscribers'] == 0
+
+
+@pytest.mark.parametrize('old, new, patch', [
+    ({'a': 1, 'b': 2}, {'a': 1, 'b': 2}, None),
+    ({'a': 1, 'b': 2}, {'a': 1, 'b': 3}, {'b': 3}),
+    ({'a': 1, 'b': 2}, {'a': 1}, {'b': None}),
+    ({'a': 1}, {'a': 1, 'c': [1, 2]}, {'c': [1, 2]}),
+    ({'x': {'y': 1, 'z': 2}}, {'x': {'y': 1, 'z': 5}}, {'x': {'z': 5}}),
+    ({'x': {'y': 1}}, {'x': 4}, {'x': 4}),
+    ({'x': [1, 2]}, {'x': [1, 3]}, {'x': [1, 3]}),
+    (1, 2, 2),
+])
+def test_merge_patch(old, new, patch):
+    assert merge_patch(old, new) == patch
+
+
+def test_live_state_recomputes_once_per_burst():
+    hub = EventHub()
+    counter = {'value': 0}
+    state = LiveState(hub, lambda: {'value': counter['value'], 'fixed': True},
+                      refresh_interval=60, min_interval=0.2)
+    deltas = hub.subscribe(['status'])
+
+    assert state.get() == {'value': 0, 'fixed': True}
+    assert state.compute_count == 1
+    state.start()
+
+    counter['value'] = 1
+    for i in range(20):
+        hub.publish('trading', 'decision', {'i': i})
+    hub.publish('news', 'headline', {})
+    time.sleep(0.6)
+
+    assert state.compute_count == 2
+    assert state.get() == {'value': 1, 'fixed': True}
+    delta = deltas.get(0.1)
+    assert delta['event'] == 'delta' and delta['data'] == {'value': 1}
+
+
+def test_live_state_publishes_no_delta_when_unchanged():
+    hub = EventHub()
+    state = LiveState(hub, lambda: {'value': 1})
+    deltas = hub.subscribe(['status'])
+
+    state.refresh()
+    state.refresh()
+
+    assert state.compute_count == 2
+    assert deltas.get(0.05) is None
+
+
+@pytest.fixture
+def sse():
+    hub = EventHub()
+    app = Flask(__name__)
+
+    # Mirrors the /events route of app.py and simple_app.py
+    @app.route('/events')
+    def events():
+        channels = request.args.get('channels')
+        channels = [c.strip() for c in channels.split(',') if c.strip()] if channels else None
+        last_event_id = request.headers.get('Last-Event-ID')
+        initial = [{'channel': 'status', 'event': 'snapshot', 'data': {'running': False},
+                    'timestamp': datetime.now().isoformat()}]
+        stream = stream_events(hub, channels=channels, initial=initial, heartbeat=0.1,
+                               last_event_id=int(last_event_id) if last_event_id else None)
+        return Response(stream_with_context(stream), mimetype='text/event-stream')
+
+    return hub, app.test_client()
+
+
+def _frame(chunk: bytes):
+    fields = dict(line.split(': ', 1) for line in chunk.decode().strip().split('\n'))
+    return fields.get('id'), fields['event'], json.loads(fields['data'])
+
+
+def test_sse_stream_sends_snapshot_events_and_heartbeats(sse):
+    hub, client = sse
+    response = client.get('/events?channels=trading', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+
+    assert next(chunks) == b'retry: 3000\n\n'
+    event_id, event, payload = _frame(next(chunks))
+    assert (event_id, event) == (None, 'snapshot')
+    assert payload['channel'] == 'status' and payload['data'] == {'running': False}
+
+    hub.publish('training', 'progress', {'done': 1})
+    message = hub.publish('trading', 'decision', {'symbol': 'AAPL'})
+    event_id, event, payload = _frame(next(chunks))
+    assert (event_id, event) == (str(message['id']), 'decision')
+    assert payload['channel'] == 'trading' and payload['data'] == {'symbol': 'AAPL'}
+
+    assert next(chunks) == b': heartbeat\n\n'
+    assert hub.get_stats()['subscribers'] == 1
+    response.close()
+    assert hub.get_stats()['subscribers'] == 0
+
+
+def test_sse_stream_resumes_after_last_event_id(sse):
+    hub, client = sse
+    ids = [hub.publish('trading', 'tick', i)['id'] for i in range(3)]
+
+    response = client.get('/events', headers={'Last-Event-ID': str(ids[0])}, buffered=False)
+    chunks = iter(response.response)
+    next(chunks)
+    next(chunks)
+
+    assert [_frame(next(chunks))[2]['data'] for _ in range(2)] == [1, 2]
+    response.close()
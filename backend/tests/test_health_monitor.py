@@ -0,0 +1,41 @@
+"""
+Background integration health probes
+"""
+
+import threading
+import time
+
+from health_monitor import HealthMonitor
+
+
+def test_stop_waits_for_in_flight_probes():
+    started, finished = threading.Event(), threading.Event()
+
+    def slow_probe():
+        started.set()
+        time.sleep(0.3)
+        finished.set()
+        return 'connected', 'ok'
+
+    monitor = HealthMonitor()
+    monitor.register('slow', 'Slow', slow_probe)
+    monitor.start()
+    assert started.wait(2)
+    monitor.stop(timeout=2)
+
+    assert finished.is_set()
+    assert monitor.get_snapshot()['slow']['status'] == 'connected'
+
+
+def test_stop_gives_up_after_timeout():
+    release = threading.Event()
+    monitor = HealthMonitor()
+    monitor.register('hung', 'Hung', lambda: release.wait(5) and ('connected', 'ok'))
+    monitor.start()
+    time.sleep(0.1)
+
+    began = time.monotonic()
+    monitor.stop(timeout=0.3)
+    release.set()
+
+    assert time.monotonic() - began < 1
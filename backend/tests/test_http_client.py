@@ -0,0 +1,140 @@
+"""
+PooledHTTPClient against a local stub HTTP server
+"""
+
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_client import PooledHTTPClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so connection reuse is visible as one client port
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        self._respond()
+
+    def _respond(self):
+        server = self.server
+        with server.lock:
+            server.hits[(self.command, self.path)] += 1
+            server.connections.add(self.client_address)
+            hits = server.hits[(self.command, self.path)]
+
+        # /unavailable always fails; /flaky fails twice and then recovers
+        if self.path == '/unavailable' or (self.path == '/flaky' and hits <= 2):
+            status, body = 503, b'unavailable'
+        else:
+            status, body = 200, b'ok'
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.hits = defaultdict(int)
+    server.connections = set()
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    server.host = f'127.0.0.1:{server.server_address[1]}'
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client():
+    client = PooledHTTPClient(retries=2, backoff_factor=0.1)
+    yield client
+    client.close()
+
+
+def test_reuses_one_connection_across_calls(stub_server, client):
+    for _ in range(5):
+        assert client.get(f'{stub_server.base_url}/ok', endpoint='stub.ok').status_code == 200
+
+    assert stub_server.hits[('GET', '/ok')] == 5
+    assert len(stub_server.connections) == 1
+
+
+def test_get_retries_503_with_backoff(stub_server, client):
+    start = time.perf_counter()
+    response = client.get(f'{stub_server.base_url}/flaky', endpoint='stub.flaky')
+    elapsed = time.perf_counter() - start
+
+    assert response.status_code == 200
+    assert stub_server.hits[('GET', '/flaky')] == 3
+    # urllib3 sleeps backoff_factor * 2 ** (n - 1) from the second consecutive retry on
+    assert elapsed >= 0.2
+
+
+def test_get_gives_up_after_retries(stub_server, client):
+    response = client.get(f'{stub_server.base_url}/unavailable', endpoint='stub.unavailable')
+
+    assert response.status_code == 503
+    assert stub_server.hits[('GET', '/unavailable')] == 3
+
+
+def test_post_is_not_retried(stub_server, client):
+    response = client.post(f'{stub_server.base_url}/unavailable', endpoint='stub.post', json={'side': 'buy'})
+
+    assert response.status_code == 503
+    assert stub_server.hits[('POST', '/unavailable')] == 1
+
+
+def test_pool_size_per_host(stub_server):
+    client = PooledHTTPClient(pool_maxsize=10, host_pool_sizes={stub_server.host: 3})
+    url = f'{stub_server.base_url}/ok'
+    try:
+        client.get(url)
+        assert client._sessions[('http', stub_server.host)].get_adapter(url)._pool_maxsize == 3
+
+        client.set_host_pool_size(stub_server.host, 5)
+        assert ('http', stub_server.host) not in client._sessions
+        client.get(url)
+        assert client._sessions[('http', stub_server.host)].get_adapter(url)._pool_maxsize == 5
+
+        other = f'http://localhost:{stub_server.server_address[1]}/ok'
+        client.get(other)
+        assert client._sessions[('http', f'localhost:{stub_server.server_address[1]}')].get_adapter(other)._pool_maxsize == 10
+    finally:
+        client.close()
+
+
+def test_latency_stats_per_endpoint(stub_server, client):
+    for _ in range(4):
+        client.get(f'{stub_server.base_url}/ok', endpoint='stub.ok')
+    client.post(f'{stub_server.base_url}/unavailable', endpoint='stub.post')
+    client.get(f'{stub_server.base_url}/ok')
+
+    stats = client.get_latency_stats()
+    ok = stats['stub.ok']
+    assert ok['count'] == 4
+    assert ok['errors'] == 0
+    assert 0 < ok['p50_ms'] <= ok['p95_ms'] <= ok['max_ms']
+    assert ok['avg_ms'] > 0 and ok['last_ms'] > 0
+    assert stats['stub.post']['errors'] == 1
+    # Unlabelled requests are grouped by method, host and path
+    assert stats[f'GET {stub_server.host}/ok']['count'] == 1
+
+    client.reset_stats()
+    assert client.get_latency_stats() == {}
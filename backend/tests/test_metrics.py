@@ -0,0 +1,37 @@
+"""
+Prometheus rendering and merging metrics across processes
+"""
+
+from metrics import MetricsRegistry
+
+
+def test_render_merges_shared_processes(tmp_path):
+    primary, worker = MetricsRegistry(), MetricsRegistry()
+    primary._share_dir = worker._share_dir = str(tmp_path)
+    primary._share_path = str(tmp_path / 'metrics-1.json')
+    worker._share_path = str(tmp_path / 'metrics-2.json')
+
+    primary.observe_request('GET', '/status', 200, 0.01)
+    worker.observe_request('GET', '/status', 200, 0.02)
+    worker.observe_request('GET', '/logs', 200, 0.5)
+    with worker.span('db.read'):
+        pass
+    primary.flush()
+    worker.flush()
+
+    text = primary.render()
+    assert 'tradingbot_http_request_duration_seconds_count{method="GET",route="/status",status="200"} 2' in text
+    assert 'tradingbot_http_request_duration_seconds_count{method="GET",route="/logs",status="200"} 1' in text
+    assert 'tradingbot_span_duration_seconds_count{span="db.read"} 1' in text
+
+
+def test_callback_counter_renders_as_counter():
+    registry = MetricsRegistry()
+    registry.register_gauge('tradingbot_queue_depth', 'Waiting items', lambda: 3)
+    registry.register_counter('tradingbot_updates_total', 'Updates by outcome',
+                              lambda: {('delivered',): 5, ('dropped',): 1}, labelnames=('outcome',))
+
+    text = registry.render()
+    assert '# TYPE tradingbot_queue_depth gauge' in text
+    assert '# TYPE tradingbot_updates_total counter' in text
+    assert 'tradingbot_updates_total{outcome="dropped"} 1' in text
@@ -0,0 +1,59 @@
+"""
+Quote cache batching, single-flight fetches and cached misses
+"""
+
+import threading
+import time
+
+from quote_cache import QuoteCache
+
+
+class CountingFetcher:
+    """Returns a price for every symbol but ``missing``; slow enough for fetches to overlap"""
+
+    def __init__(self, missing=(), delay=0.0):
+        self.missing = set(missing)
+        self.delay = delay
+        self.calls = []
+
+    def fetch(self, symbols):
+        self.calls.append(list(symbols))
+        time.sleep(self.delay)
+        return {symbol: 100.0 for symbol in symbols if symbol not in self.missing}
+
+
+def test_misses_are_fetched_in_one_batch():
+    fetcher = CountingFetcher()
+    cache = QuoteCache(fetcher, ttl=60)
+
+    assert cache.get_prices(['aapl', 'MSFT', 'AAPL']) == {'AAPL': 100.0, 'MSFT': 100.0}
+    assert cache.get_prices(['MSFT', 'TSLA']) == {'MSFT': 100.0, 'TSLA': 100.0}
+    assert fetcher.calls == [['AAPL', 'MSFT'], ['TSLA']]
+
+
+def test_concurrent_misses_share_one_fetch():
+    fetcher = CountingFetcher(delay=0.2)
+    cache = QuoteCache(fetcher, ttl=60)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get_price('AAPL'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [100.0] * 8
+    assert fetcher.calls == [['AAPL']]
+
+
+def test_missing_prices_are_cached_briefly():
+    fetcher = CountingFetcher(missing={'ZZZZ'})
+    cache = QuoteCache(fetcher, ttl=60, miss_ttl=0.2)
+
+    assert cache.get_price('ZZZZ') is None
+    assert cache.get_price('ZZZZ') is None
+    assert len(fetcher.calls) == 1
+
+    time.sleep(0.25)
+    assert cache.get_price('ZZZZ') is None
+    assert len(fetcher.calls) == 2
@@ -0,0 +1,72 @@
+"""
+SimulationStore window queries and downsampling
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulation_store import SimulationStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    steps = 500
+    rng = np.random.default_rng(0)
+    store = SimulationStore(str(tmp_path), max_in_memory=2)
+    store.put('sim-1', {
+        'symbol': 'AAPL',
+        'chart_data': {
+            'timestamp': [str(ts) for ts in pd.date_range('2025-03-03 14:30', periods=steps, freq='5min')],
+            'price': 100 + rng.normal(0, 1, steps).cumsum(),
+            'portfolio_value': 10000 + rng.normal(0, 50, steps).cumsum(),
+            'action': rng.integers(0, 3, steps)
+        },
+        'trades': [{'step': step, 'action': 'buy'} for step in range(0, steps, 10)]
+    })
+    return store
+
+
+@pytest.mark.parametrize('points', [1, 2, 3, 4, 5, 6, 7, 50, 200])
+def test_query_never_returns_more_than_points(store, points):
+    result = store.query('sim-1', points=points)
+
+    assert len(result['chart_data']) <= points
+    assert result['points']['returned'] == len(result['chart_data'])
+    steps = [row['step'] for row in result['chart_data']]
+    assert steps == sorted(set(steps))
+
+
+def test_query_keeps_window_endpoints(store):
+    result = store.query('sim-1', points=50, start='2025-03-03 15:00', end='2025-03-03 18:00')
+
+    chart = result['chart_data']
+    assert chart[0]['timestamp'] == '2025-03-03 15:00:00'
+    assert chart[-1]['timestamp'] == '2025-03-03 18:00:00'
+    assert result['points']['window'] == 37
+    assert all(0 <= trade['chart_index'] < len(chart) for trade in result['trades'])
+
+
+def test_query_survives_spill(store):
+    store.put('sim-2', {'chart_data': []})
+    store.put('sim-3', {'chart_data': []})
+
+    assert store.spilled >= 1
+    assert len(store.query('sim-1', points=20)['chart_data']) <= 20
+
+
+@pytest.mark.parametrize('start, end', [
+    ('2025-03-03 15:00', '2025-03-03 18:00'),
+    ('2025-03-03T10:00-05:00', '2025-03-03T13:00-05:00'),
+    ('2025-03-03T16:00+01:00', '2025-03-03T19:00+01:00'),
+])
+def test_query_window_compares_in_utc(store, start, end):
+    chart = store.query('sim-1', start=start, end=end)['chart_data']
+
+    assert chart[0]['timestamp'] == '2025-03-03 15:00:00'
+    assert chart[-1]['timestamp'] == '2025-03-03 18:00:00'
+
+
+def test_query_rejects_invalid_times(store):
+    with pytest.raises(ValueError):
+        store.query('sim-1', start='yesterday-ish')
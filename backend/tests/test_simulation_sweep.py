@@ -0,0 +1,31 @@
+"""
+Date windows of simulation sweeps
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulation_sweep import window_slice
+
+# Stored bar timestamps are naive UTC
+TIMESTAMPS = pd.date_range('2025-03-03 14:00', periods=12, freq='30min').to_numpy()
+
+
+@pytest.mark.parametrize('start, end', [
+    ('2025-03-03 14:30', '2025-03-03 16:30'),
+    ('2025-03-03T09:30-05:00', '2025-03-03T11:30-05:00'),
+    ('2025-03-03T15:30+01:00', '2025-03-03T17:30+01:00'),
+    ('2025-03-03T14:30Z', '2025-03-03T16:30Z'),
+])
+def test_window_slice_compares_in_utc(start, end):
+    window = window_slice(TIMESTAMPS, start, end)
+
+    assert TIMESTAMPS[window.start] == np.datetime64('2025-03-03T14:30')
+    assert TIMESTAMPS[window.stop] == np.datetime64('2025-03-03T16:30')
+
+
+def test_window_slice_open_ends():
+    assert window_slice(TIMESTAMPS, None, None) == slice(0, 12)
+    assert window_slice(TIMESTAMPS, '2025-03-03T12:00-05:00', None) == slice(6, 12)
+    assert window_slice(TIMESTAMPS, None, '2025-03-03 14:00') == slice(0, 0)
@@ -10,9 +10,8 @@ import pandas as pd
 from gymnasium import spaces
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest
-from alpaca.data.timeframe import TimeFrame
+from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-import ta
 import logging
 from datetime import datetime, timedelta
 import warnings
@@ -21,18 +20,70 @@ warnings.filterwarnings('ignore')
 # Import new components
 from news_analyzer import NewsAnalyzer
 from risk_manager import RiskManager
+from indicators import get_indicator_engine
+from feature_store import feature_key, get_feature_registry
+from simulation_sweep import dataset_feature_key, load_market_data
+from metrics import span
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class LiveBars:
+    """
+    The latest ``size`` bars in preallocated column arrays
+    An append writes one slot per column. The arrays hold twice the window, and
+    when they fill the window moves back to the front, once every ``size``
+    appends, so each append is O(1) amortized and the window stays contiguous.
+    ``frame`` builds a DataFrame only when asked for, cached until the next append.
+    """
+
+    def __init__(self, data: pd.DataFrame, size: int):
+        self.size = max(size, 1)
+        tail = data.iloc[-self.size:]
+        self._arrays = {}
+        for column in tail.columns:
+            values = tail[column].to_numpy()
+            numeric = values.dtype.kind in 'biuf'
+            array = np.full(2 * self.size, np.nan if numeric else None, dtype=np.float64 if numeric else object)
+            array[:len(values)] = values
+            self._arrays[column] = array
+        self._start, self._end = 0, len(tail)
+        self._frame = None
+
+    def __len__(self):
+        return self._end - self._start
+
+    def append(self, row: dict):
+        if self._end == 2 * self.size:
+            for array in self._arrays.values():
+                array[:len(self)] = array[self._start:self._end]
+            self._start, self._end = 0, len(self)
+        for column, array in self._arrays.items():
+            array[self._end] = row.get(column, np.nan if array.dtype != object else None)
+        self._end += 1
+        if len(self) > self.size:
+            self._start += 1
+        self._frame = None
+
+    def column(self, name: str) -> np.ndarray:
+        """View of one column over the window"""
+        return self._arrays[name][self._start:self._end]
+
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            self._frame = pd.DataFrame({name: self.column(name).copy() for name in self._arrays}).infer_objects()
+        return self._frame
+
+
 class TradingEnvironment(gym.Env):
     """
     Custom Gym environment for stock trading with sentiment analysis and technical indicators
     Supports autonomous learning and per-stock optimization
     """
     
-    def __init__(self, symbol, initial_balance=100000, max_steps=1000, transaction_fee=0.001, mode='paper'):
+    def __init__(self, symbol, initial_balance=100000, max_steps=1000, transaction_fee=0.001, mode='paper',
+                 bar_source=None, dataset_path=None):
         super().__init__()
         
         self.symbol = symbol
@@ -40,6 +91,10 @@ class TradingEnvironment(gym.Env):
         self.max_steps = max_steps
         self.transaction_fee = transaction_fee
         self.mode = mode
+        # Optional shared BarPrefetcher; without one each reset requests its own bars
+        self.bar_source = bar_source
+        # Imported dataset to train on instead of recent bars; every environment on it shares one copy
+        self.dataset_path = dataset_path
         
         # Initialize components
         self.news_analyzer = NewsAnalyzer()
@@ -78,6 +133,16 @@ class TradingEnvironment(gym.Env):
             dtype=np.float32
         )
         
+        # Last bars the indicators were computed for; a reset with the same bars reuses them
+        self._bars_key = None
+        # Shared feature set self.data views, if any; released when the bars change
+        self._features_key = None
+        # Rows kept once live bars are appended, in a LiveBars buffer that replaces the fetched frame
+        self.max_live_bars = int(os.getenv('LIVE_MAX_BARS', 2000))
+        self._live_bars = None
+        # Set by the first appended bar: decisions then follow the feed instead of the fetched history
+        self.live = False
+        
         # Trading state
         self.reset()
         
@@ -90,6 +155,7 @@ class TradingEnvironment(gym.Env):
         super().reset(seed=seed)
         
         self.current_step = 0
+        self.episode_steps = 0
         self.balance = self.initial_balance
         self.position = 0  # Number of shares held
         self.position_value = 0
@@ -97,56 +163,74 @@ class TradingEnvironment(gym.Env):
         self.successful_trades = 0
         self.total_profit = 0
         
-        # Fetch recent market data
-        self._fetch_market_data()
+        if self.live:
+            # Refetching would drop the appended bars; episodes replay the latest ones instead
+            self.current_step = max(self._bar_count() - self.max_steps, 0)
+        elif self.dataset_path is not None:
+            if self._bars_key != self.dataset_path:
+                self._bars_key = self.dataset_path
+                self._use_shared_features(dataset_feature_key(self.symbol, self.dataset_path),
+                                          lambda: pd.DataFrame(load_market_data(self.dataset_path)))
+        else:
+            # Fetch recent market data
+            self._fetch_market_data()
         
         return self._get_observation(), {}
     
     def _fetch_market_data(self):
         """Fetch real-time market data for the symbol using Alpaca"""
         try:
-            # Get recent data (last 7 days for technical indicators)
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=7)
-            
-            # Use Alpaca data with 5-minute intervals
-            request = StockBarsRequest(
-                symbol_or_symbols=self.symbol,
-                timeframe=TimeFrame.Minute(5),
-                start=start_date,
-                end=end_date
-            )
-            
-            bars = self.data_client.get_stock_bars(request)
-            
-            if bars and hasattr(bars, 'df') and len(bars.df) > 0:
-                # Convert Alpaca bars to DataFrame
-                self.data = bars.df.reset_index()
-                # Rename columns to match expected format
-                self.data.rename(columns={
-                    'open': 'Open',
-                    'high': 'High', 
-                    'low': 'Low',
-                    'close': 'Close',
-                    'volume': 'Volume'
-                }, inplace=True)
+            if self.bar_source is not None:
+                # Batched with the resets of other symbols
+                bars_df = self.bar_source.get_bars(self.symbol)
             else:
-                logger.error(f"No data available for {self.symbol}")
-                # Create dummy data for testing
-                self.data = pd.DataFrame({
-                    'Open': [100] * 100,
-                    'High': [101] * 100,
-                    'Low': [99] * 100,
-                    'Close': [100] * 100,
-                    'Volume': [1000] * 100
-                })
+                # Get recent data (last 7 days for technical indicators)
+                end_date = datetime.now()
+                start_date = end_date - timedelta(days=7)
+                
+                # Use Alpaca data with 5-minute intervals
+                request = StockBarsRequest(
+                    symbol_or_symbols=self.symbol,
+                    timeframe=TimeFrame(5, TimeFrameUnit.Minute),
+                    start=start_date,
+                    end=end_date
+                )
+                
+                with span('alpaca.get_stock_bars'):
+                    bars = self.data_client.get_stock_bars(request)
+                bars_df = bars.df if bars and hasattr(bars, 'df') else None
             
-            # Calculate technical indicators
+            if bars_df is not None and len(bars_df) > 0:
+                bars_key = (len(bars_df), bars_df.index[-1])
+                if bars_key == self._bars_key:
+                    return
+                self._bars_key = bars_key
+                
+                # Environments of this symbol with the same bars share one copy of the features
+                timestamps = bars_df.index.get_level_values('timestamp')
+                timeframe = getattr(getattr(self.bar_source, 'timeframe', None), 'value', '5Min')
+                self._use_shared_features(feature_key(self.symbol, timeframe, timestamps[0], timestamps[-1]),
+                                          lambda: self._build_features(bars_df))
+                return
+            
+            self._bars_key = None
+            logger.error(f"No data available for {self.symbol}")
+            # Create dummy data for testing
+            self._release_features()
+            self.data = pd.DataFrame({
+                'Open': [100] * 100,
+                'High': [101] * 100,
+                'Low': [99] * 100,
+                'Close': [100] * 100,
+                'Volume': [1000] * 100
+            })
             self._calculate_indicators()
             
         except Exception as e:
             logger.error(f"Error fetching data for {self.symbol}: {e}")
+            self._bars_key = None
             # Fallback to dummy data
+            self._release_features()
             self.data = pd.DataFrame({
                 'Open': [100] * 100,
                 'High': [101] * 100,
@@ -156,29 +240,101 @@ class TradingEnvironment(gym.Env):
             })
             self._calculate_indicators()
     
+    def _build_features(self, bars_df):
+        """Alpaca bars as a frame with the shared indicator engine's columns"""
+        # Convert Alpaca bars to DataFrame
+        data = bars_df.reset_index()
+        # Rename columns to match expected format
+        data.rename(columns={
+            'open': 'Open',
+            'high': 'High', 
+            'low': 'Low',
+            'close': 'Close',
+            'volume': 'Volume'
+        }, inplace=True)
+        return get_indicator_engine().apply(data)
+    
+    @property
+    def data(self) -> pd.DataFrame:
+        """Bars with their indicators; with live bars the frame is built on access"""
+        if self._live_bars is not None:
+            return self._live_bars.frame()
+        return self._data
+    
+    @data.setter
+    def data(self, frame):
+        self._live_bars = None
+        self._data = frame
+    
+    def _bar_count(self):
+        return len(self._live_bars) if self._live_bars is not None else len(self._data)
+    
+    def _column(self, name):
+        """One column as an array; live bars are read from their buffer without building a frame"""
+        if self._live_bars is not None:
+            return self._live_bars.column(name)
+        return self._data[name].to_numpy()
+    
+    def _use_shared_features(self, key, build):
+        """Point ``self.data`` at the registry's feature set for ``key``, building it if no environment has"""
+        previous = self._features_key
+        try:
+            self.data = get_feature_registry().acquire(key, build).frame()
+            self._features_key = key
+        except Exception as e:
+            logger.warning(f"Keeping a private copy of {self.symbol} features: {e}")
+            self.data = build()
+            self._features_key = None
+        if previous is not None:
+            get_feature_registry().release(previous)
+        self._prime_indicator_stream()
+    
+    def _release_features(self):
+        if self._features_key is not None:
+            get_feature_registry().release(self._features_key)
+            self._features_key = None
+    
     def _calculate_indicators(self):
-        """Calculate technical indicators"""
-        if len(self.data) < 20:
-            # Not enough data for indicators
-            self.data['RSI'] = 50
-            self.data['MACD'] = 0
-            self.data['Signal'] = 0
-            return
-        
-        # RSI
-        self.data['RSI'] = ta.momentum.RSIIndicator(self.data['Close']).rsi()
-        
-        # MACD
-        macd_indicator = ta.trend.MACD(self.data['Close'])
-        self.data['MACD'] = macd_indicator.macd()
-        self.data['Signal'] = macd_indicator.macd_signal()
-        
-        # Moving averages
-        self.data['MA_20'] = ta.trend.SMAIndicator(self.data['Close'], window=20).sma_indicator()
-        
-        # Fill NaN values
-        self.data.fillna(method='bfill', inplace=True)
-        self.data.fillna(0, inplace=True)
+        """Calculate technical indicators with the shared indicator engine"""
+        self.data = get_indicator_engine().apply(self.data)
+        self._prime_indicator_stream()
+    
+    def _prime_indicator_stream(self):
+        # Incremental state at the last bar, so appended bars cost O(1) each
+        self.indicator_stream = get_indicator_engine().streaming()
+        self.indicator_stream.prime(self.data['Close'].to_numpy(dtype=np.float64),
+                                    self.data['Volume'].to_numpy(dtype=np.float64))
+    
+    def append_bar(self, bar):
+        """
+        Append one new bar without refetching history or recomputing indicators
+        ``bar`` has Open/High/Low/Close/Volume (and optionally timestamp); its
+        indicators come from the streaming state in constant time. The first
+        append moves the latest ``max_live_bars`` rows into a ``LiveBars``
+        buffer, so later appends are O(1) and the memory held does not grow
+        with the time the feed has been running. The next observation and
+        step are on the new bar.
+        """
+        if self._live_bars is None:
+            # The buffer holds its own copy, so the shared set can be released
+            live_bars = LiveBars(self._data, self.max_live_bars)
+            self._release_features()
+            self.data = None
+            self._live_bars = live_bars
+        
+        features = self.indicator_stream.update(bar['Close'], bar.get('Volume', 0.0))
+        row = dict(bar)
+        row.update(features)
+        self._live_bars.append(row)
+        
+        self.live = True
+        self.current_step = len(self._live_bars) - 1
+        return features
+    
+    def close(self):
+        """Release the shared feature set this environment views"""
+        self._release_features()
+        super().close()
     
     def _get_sentiment_score(self):
         """Get sentiment score using real-time news analysis"""
@@ -192,16 +348,16 @@ class TradingEnvironment(gym.Env):
     
     def _get_observation(self):
         """Get current observation state"""
-        if len(self.data) == 0:
+        if self._bar_count() == 0:
             return np.zeros(9, dtype=np.float32) # Updated shape
         
-        current_idx = min(self.current_step, len(self.data) - 1)
+        current_idx = min(self.current_step, self._bar_count() - 1)
         
         # Current market data
-        current_price = float(self.data['Close'].iloc[current_idx])
-        volume = float(self.data['Volume'].iloc[current_idx])
-        rsi = float(self.data['RSI'].iloc[current_idx])
-        macd = float(self.data['MACD'].iloc[current_idx])
+        current_price = float(self._column('Close')[current_idx])
+        volume = float(self._column('Volume')[current_idx])
+        rsi = float(self._column('RSI')[current_idx])
+        macd = float(self._column('MACD')[current_idx])
         
         # Sentiment analysis
         sentiment = self._get_sentiment_score()
@@ -231,11 +387,11 @@ class TradingEnvironment(gym.Env):
     
     def step(self, action):
         """Execute a trading action and return new state"""
-        if len(self.data) == 0:
+        if self._bar_count() == 0:
             return self._get_observation(), 0, True, True, {}
         
-        current_idx = min(self.current_step, len(self.data) - 1)
-        current_price = float(self.data['Close'].iloc[current_idx])
+        current_idx = min(self.current_step, self._bar_count() - 1)
+        current_price = float(self._column('Close')[current_idx])
         
         reward = 0
         info = {}
@@ -262,11 +418,16 @@ class TradingEnvironment(gym.Env):
         
         # Update step
         self.current_step += 1
+        self.episode_steps += 1
         
         # Check if episode is done
-        done = (self.current_step >= self.max_steps or 
-                self.current_step >= len(self.data) or
-                self.balance <= 0)
+        if self.live:
+            # Past the last bar a live episode waits for the next one instead of ending
+            done = self.episode_steps >= self.max_steps or self.balance <= 0
+        else:
+            done = (self.current_step >= self.max_steps or 
+                    self.current_step >= self._bar_count() or
+                    self.balance <= 0)
         
         # Store performance data
         self.performance_history.append({
@@ -371,12 +532,12 @@ class TradingEnvironment(gym.Env):
     
     def _calculate_volatility(self):
         """Calculate current volatility"""
-        if len(self.data) < 5:
+        if self._bar_count() < 5:
             return 0.0
         
         try:
             # Calculate rolling volatility
-            returns = self.data['Close'].pct_change().dropna()
+            returns = pd.Series(self._column('Close')).pct_change().dropna()
             if len(returns) > 0:
                 volatility = returns.std() * np.sqrt(252)  # Annualized
                 return min(volatility, 1.0)  # Cap at 100%
@@ -391,14 +552,14 @@ class TradingEnvironment(gym.Env):
         
         # Portfolio concentration penalty
         if self.position > 0:
-            position_value = self.position * self.data['Close'].iloc[min(self.current_step, len(self.data)-1)]
+            position_value = self.position * self._column('Close')[min(self.current_step, self._bar_count()-1)]
             concentration = position_value / (self.balance + position_value)
             if concentration > 0.2:  # More than 20% in one stock
                 penalty += (concentration - 0.2) * 0.1
         
         # High volatility penalty
-        if len(self.data) > 5:
-            recent_volatility = self.data['Close'].tail(5).std()
+        if self._bar_count() > 5:
+            recent_volatility = pd.Series(self._column('Close')[-5:]).std()
             if recent_volatility > 5:  # High volatility
                 penalty += 0.01
         
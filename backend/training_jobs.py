@@ -0,0 +1,324 @@
+"""
+Training Job Queue
+Bounded executor for model training jobs with priorities, cancellation and live progress
+"""
+
+import os
+import time
+import heapq
+import logging
+import itertools
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from stable_baselines3.common.callbacks import BaseCallback
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+class TrainingCancelled(Exception):
+    """Raised inside a job once cancellation has been requested"""
+
+
+class TrainingJob:
+    """
+    A queued or running training job
+    Status moves from queued to training, then completed, failed or cancelled.
+    The job function receives the job and reports progress via ``update_progress``.
+    """
+
+    def __init__(self, job_id: str, fn: Callable[['TrainingJob'], Optional[Dict]], queue: 'TrainingJobQueue',
+                 total_steps: int = None, priority: int = 0, metadata: Dict = None):
+        self.job_id = job_id
+        self.fn = fn
+        self.queue = queue
+        self.priority = priority
+        self.metadata = dict(metadata or {})
+
+        self.status = 'queued'
+        self.total_steps = total_steps
+        self.steps_done = 0
+        self.steps_per_second = None
+        self.eta_seconds = None
+        self.result = {}
+        self.error = None
+
+        self.submitted_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+
+        self._cancel = threading.Event()
+        self._rate_origin = None
+        self._last_notified = 0.0
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """Raise ``TrainingCancelled`` if the job was cancelled"""
+        if self._cancel.is_set():
+            raise TrainingCancelled(f"Training job {self.job_id} cancelled")
+
+    def update_progress(self, steps_done: int, total_steps: int = None):
+        """Record completed steps; throughput and ETA are measured from the first report"""
+        now = time.monotonic()
+        with self.queue.lock:
+            self.steps_done = steps_done
+            if total_steps:
+                self.total_steps = total_steps
+
+            if self._rate_origin is None:
+                self._rate_origin = (now, steps_done)
+            else:
+                origin_time, origin_steps = self._rate_origin
+                elapsed = now - origin_time
+                if elapsed > 0 and steps_done > origin_steps:
+                    self.steps_per_second = (steps_done - origin_steps) / elapsed
+                    if self.total_steps:
+                        self.eta_seconds = max(0.0, (self.total_steps - steps_done) / self.steps_per_second)
+
+            notify = now - self._last_notified >= self.queue.progress_interval
+            if notify:
+                self._last_notified = now
+
+        if notify:
+            self.queue._notify(self)
+
+    @property
+    def progress(self) -> float:
+        if self.status == 'completed':
+            return 100
+        if not self.total_steps:
+            return 0
+        return round(min(100.0, 100.0 * self.steps_done / self.total_steps), 1)
+
+    def to_dict(self) -> Dict:
+        job = {
+            'training_id': self.job_id,
+            'status': self.status,
+            'priority': self.priority,
+            'progress': self.progress,
+            'steps_done': self.steps_done,
+            'total_steps': self.total_steps,
+            'steps_per_second': round(self.steps_per_second, 2) if self.steps_per_second else None,
+            'eta_seconds': round(self.eta_seconds, 1) if self.eta_seconds is not None else None,
+            'submitted_time': self.submitted_at.isoformat(),
+            'start_time': self.started_at.isoformat() if self.started_at else None,
+            'end_time': self.finished_at.isoformat() if self.finished_at else None,
+            'cancel_requested': self.cancel_requested
+        }
+        if self.started_at:
+            end = self.finished_at or datetime.now()
+            job['elapsed_seconds'] = round((end - self.started_at).total_seconds(), 1)
+        if self.error:
+            job['error'] = self.error
+        job.update(self.metadata)
+        job.update(self.result)
+        return job
+
+
+class TrainingJobQueue:
+    """
+    Runs at most ``max_concurrent`` training jobs at once
+    Waiting jobs are ordered by priority (higher first), then FIFO. Listeners
+    are called with the job's dict on every state change and at most every
+    ``progress_interval`` seconds while it trains.
+    """
+
+    def __init__(self, max_concurrent: int = None, progress_interval: float = 1.0, history_size: int = 200):
+        self.max_concurrent = max_concurrent or int(os.getenv('TRAINING_MAX_CONCURRENT', 1))
+        self.progress_interval = progress_interval
+        self.history_size = history_size
+
+        self.lock = threading.RLock()
+        self._available = threading.Condition(self.lock)
+        self._pending = []
+        self._sequence = itertools.count()
+        self._jobs = {}
+        self._listeners = []
+        self._workers = []
+
+    def add_listener(self, listener: Callable[[Dict], None]):
+        with self.lock:
+            self._listeners.append(listener)
+
+    def submit(self, job_id: str, fn: Callable[[TrainingJob], Optional[Dict]], total_steps: int = None,
+               priority: int = 0, **metadata) -> TrainingJob:
+        """
+        Queue ``fn(job)`` for execution
+        ``fn`` may return a dict that is merged into the job's status (e.g. ``model_path``).
+        """
+        with self.lock:
+            existing = self._jobs.get(job_id)
+            if existing is not None and existing.status not in FINISHED_STATUSES:
+                raise ValueError(f"Training job {job_id} is already {existing.status}")
+
+            job = TrainingJob(job_id, fn, self, total_steps=total_steps, priority=priority, metadata=metadata)
+            self._jobs[job_id] = job
+            heapq.heappush(self._pending, (-priority, next(self._sequence), job))
+            self._prune_history()
+            self._ensure_workers()
+            self._available.notify()
+
+        logger.info(f"Queued training job {job_id} (priority {priority})")
+        self._notify(job)
+        return job
+
+    def cancel(self, job_id: str) -> Dict:
+        """Cancel a queued job immediately, or ask a running job to stop at its next step"""
+        with self.lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return {'error': f'Training job {job_id} not found'}
+            if job.status in FINISHED_STATUSES:
+                return {'error': f'Training job {job_id} already {job.status}'}
+
+            job._cancel.set()
+            if job.status == 'queued':
+                self._pending = [entry for entry in self._pending if entry[2] is not job]
+                heapq.heapify(self._pending)
+                job.status = 'cancelled'
+                job.finished_at = datetime.now()
+
+        logger.info(f"Cancellation requested for training job {job_id}")
+        self._notify(job)
+        return {'success': True, 'training_id': job_id, 'status': job.status}
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        with self.lock:
+            return self._jobs.get(job_id)
+
+    def get_job_status(self, job_id: str) -> Dict:
+        with self.lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else {}
+
+    def get_status(self) -> Dict:
+        """Summary counts plus every known job, keyed by id"""
+        with self.lock:
+            jobs = {job_id: job.to_dict() for job_id, job in self._jobs.items()}
+            positions = {entry[2].job_id: index + 1 for index, entry in enumerate(sorted(self._pending))}
+
+        for job_id, position in positions.items():
+            jobs[job_id]['queue_position'] = position
+
+        counts = {status: 0 for status in ('queued', 'training', 'completed', 'failed', 'cancelled')}
+        for job in jobs.values():
+            counts[job['status']] = counts.get(job['status'], 0) + 1
+
+        return {
+            'max_concurrent': self.max_concurrent,
+            'queued_jobs': counts['queued'],
+            'active_jobs': counts['training'],
+            'completed_jobs': counts['completed'],
+            'failed_jobs': counts['failed'],
+            'cancelled_jobs': counts['cancelled'],
+            'jobs': jobs
+        }
+
+    def _ensure_workers(self):
+        self._workers = [worker for worker in self._workers if worker.is_alive()]
+        while len(self._workers) < self.max_concurrent:
+            worker = threading.Thread(target=self._run, name=f'training-worker-{len(self._workers)}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _prune_history(self):
+        finished = [job for job in self._jobs.values() if job.status in FINISHED_STATUSES]
+        excess = len(finished) - self.history_size
+        if excess > 0:
+            finished.sort(key=lambda job: job.finished_at or job.submitted_at)
+            for job in finished[:excess]:
+                del self._jobs[job.job_id]
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while not self._pending:
+                    self._available.wait()
+                _, _, job = heapq.heappop(self._pending)
+                job.status = 'training'
+                job.started_at = datetime.now()
+
+            self._notify(job)
+            self._execute(job)
+            self._notify(job)
+
+    def _execute(self, job: TrainingJob):
+        try:
+            job.check_cancelled()
+            result = job.fn(job)
+            job.check_cancelled()
+            with self.lock:
+                job.result = dict(result or {})
+                job.status = 'completed'
+                job.eta_seconds = 0.0
+            logger.info(f"✅ Training job {job.job_id} completed")
+
+        except TrainingCancelled:
+            with self.lock:
+                job.status = 'cancelled'
+            logger.info(f"Training job {job.job_id} cancelled after {job.steps_done} steps")
+
+        except Exception as e:
+            with self.lock:
+                job.status = 'failed'
+                job.error = str(e)
+            logger.error(f"Training job {job.job_id} failed: {e}")
+
+        finally:
+            with self.lock:
+                job.finished_at = datetime.now()
+
+    def _notify(self, job: TrainingJob):
+        with self.lock:
+            listeners = list(self._listeners)
+            snapshot = job.to_dict()
+        for listener in listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"Training job listener error for {job.job_id}: {e}")
+
+
+class TrainingProgressCallback(BaseCallback):
+    """Stable-Baselines3 callback that reports timesteps to a job and stops training when it is cancelled"""
+
+    def __init__(self, job: TrainingJob, report_every: int = 100):
+        super().__init__()
+        self.job = job
+        self.report_every = report_every
+
+    @property
+    def cancelled(self) -> bool:
+        return self.job.cancel_requested
+
+    def _on_training_start(self):
+        self.job.update_progress(self.num_timesteps, self.locals.get('total_timesteps'))
+
+    def _on_step(self) -> bool:
+        if self.n_calls % self.report_every == 0:
+            self.job.update_progress(self.num_timesteps)
+        # Returning False ends model.learn() early
+        return not self.job.cancel_requested
+
+    def _on_training_end(self):
+        self.job.update_progress(self.num_timesteps)
+
+
+_training_queue = None
+_training_queue_lock = threading.Lock()
+
+
+def get_training_queue() -> TrainingJobQueue:
+    """Get the process-wide training queue shared by all training entry points"""
+    global _training_queue
+    if _training_queue is None:
+        with _training_queue_lock:
+            if _training_queue is None:
+                _training_queue = TrainingJobQueue()
+    return _training_queue
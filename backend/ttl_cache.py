@@ -0,0 +1,163 @@
+"""
+TTL Cache
+Small thread-safe cache with per-cache expiry and single-flight loading of missing keys
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Values expire ``ttl`` seconds after they were loaded
+    Concurrent misses for the same key share one load; loader exceptions are
+    not cached. ``None`` values expire after ``negative_ttl`` (default ``ttl``),
+    so failed lookups can be retried sooner. The least recently used entries
+    are evicted past ``maxsize``.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024, name: str = 'cache', negative_ttl: float = None):
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.maxsize = maxsize
+        self.name = name
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for ``key``, calling ``loader()`` if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry[1]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            self.misses += 1
+            pending = self._loading.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._loading[key] = _PendingLoad()
+
+        if not owner:
+            return pending.wait()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._loading.pop(key, None)
+            pending.fail(e)
+            raise
+
+        with self._lock:
+            self._store(key, value)
+            self._loading.pop(key, None)
+        pending.resolve(value)
+        return value
+
+    def get_many_or_load(self, keys: Iterable[Hashable], loader: Callable[[List], Dict]) -> Dict:
+        """
+        ``get_or_load`` for several keys with one ``loader(missing_keys)`` call
+        The loader returns a dict; keys it leaves out are cached as ``None``.
+        Keys another thread is already loading are waited for, not loaded again.
+        """
+        values, owned, waiting = {}, {}, {}
+        with self._lock:
+            now = time.monotonic()
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and now < entry[1]:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    values[key] = entry[0]
+                    continue
+
+                self.misses += 1
+                pending = self._loading.get(key)
+                if pending is None:
+                    owned[key] = self._loading[key] = _PendingLoad()
+                else:
+                    waiting[key] = pending
+
+        if owned:
+            try:
+                loaded = loader(list(owned))
+            except BaseException as e:
+                with self._lock:
+                    for key in owned:
+                        self._loading.pop(key, None)
+                for pending in owned.values():
+                    pending.fail(e)
+                raise
+
+            with self._lock:
+                for key in owned:
+                    self._store(key, loaded.get(key))
+                    self._loading.pop(key, None)
+            for key, pending in owned.items():
+                values[key] = loaded.get(key)
+                pending.resolve(values[key])
+
+        for key, pending in waiting.items():
+            values[key] = pending.wait()
+        return values
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._store(key, value)
+
+    def invalidate(self, key: Hashable = None):
+        """Drop one key, or every key"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _store(self, key: Hashable, value: Any):
+        self._entries[key] = (value, time.monotonic() + (self.negative_ttl if value is None else self.ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'name': self.name,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'ttl_seconds': self.ttl
+            }
+
+
+class _PendingLoad:
+    """Result handoff from the thread loading a key to threads waiting on it"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._value = None
+        self._error = None
+
+    def resolve(self, value):
+        self._value = value
+        self._done.set()
+
+    def fail(self, error: BaseException):
+        self._error = error
+        self._done.set()
+
+    def wait(self):
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._value
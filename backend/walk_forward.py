@@ -0,0 +1,199 @@
+"""
+Walk-Forward Evaluation
+Rolling train/test folds over imported datasets, trained in parallel worker processes and evaluated out of sample
+"""
+
+import os
+import json
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from backtest import ArrayTradingEnv, BacktestEngine
+from simulation_sweep import MARKET_COLUMNS, pool_context
+from columnar_store import MANIFEST_NAME, load_columns
+
+logger = logging.getLogger(__name__)
+
+# Algorithms a fold can train; SAC needs a continuous action space
+MODEL_TYPES = ('PPO', 'A2C')
+
+# Constructor arguments a request may override; everything else keeps the SB3 defaults
+HYPERPARAMETERS = ('learning_rate', 'gamma', 'n_steps', 'batch_size', 'ent_coef', 'gae_lambda', 'vf_coef')
+
+# Metrics aggregated across folds
+FOLD_METRICS = ('total_return_pct', 'sharpe_ratio', 'max_drawdown_pct', 'win_rate', 'total_trades')
+
+
+def plan_folds(n: int, folds: int, train_bars: int = None, test_bars: int = None,
+               anchored: bool = False) -> List[Dict]:
+    """
+    Train/test index ranges for ``folds`` consecutive folds
+    By default the first half of the history is the initial training window and
+    the rest is split evenly into test windows. Each fold trains on the bars just
+    before its test window (all earlier bars when ``anchored``).
+    """
+    if folds < 1:
+        raise ValueError('folds must be at least 1')
+    train_bars = train_bars or n // 2
+    test_bars = test_bars or (n - train_bars) // folds
+    if test_bars < 2 or train_bars < 2 or train_bars + folds * test_bars > n:
+        raise ValueError(f'{n} bars are not enough for {folds} folds of {train_bars} train / {test_bars} test bars')
+
+    plan = []
+    for fold in range(folds):
+        test_start = train_bars + fold * test_bars
+        plan.append({
+            'fold': fold,
+            'train': (0 if anchored else test_start - train_bars, test_start),
+            'test': (test_start, test_start + test_bars)
+        })
+    return plan
+
+
+class FoldCache:
+    """
+    Prepared per-fold arrays on disk, keyed by source file and fold plan
+    A rerun with the same data and folds but different hyperparameters loads
+    the ``.npz`` files instead of slicing the dataset again.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def prepare(self, data_path: str, plan: List[Dict]) -> List[Dict]:
+        """Return fold specs with ``train_path``/``test_path`` pointing at cached arrays"""
+        stat = os.stat(os.path.join(data_path, MANIFEST_NAME))
+        key = hashlib.sha1(json.dumps(
+            [os.path.abspath(data_path), stat.st_mtime_ns, stat.st_size, plan]
+        ).encode()).hexdigest()[:16]
+        fold_dir = os.path.join(self.cache_dir, f"{os.path.basename(data_path)}_{key}")
+
+        specs = [dict(fold, train_path=os.path.join(fold_dir, f"fold_{fold['fold']}_train.npz"),
+                      test_path=os.path.join(fold_dir, f"fold_{fold['fold']}_test.npz")) for fold in plan]
+        if all(os.path.exists(spec['train_path']) and os.path.exists(spec['test_path']) for spec in specs):
+            logger.info(f"Using cached walk-forward folds in {fold_dir}")
+            return specs
+
+        os.makedirs(fold_dir, exist_ok=True)
+        data = load_columns(data_path, ('timestamp',) + MARKET_COLUMNS)
+        timestamps = data['timestamp']
+        columns = {column: data[column] if column in data else np.zeros(len(timestamps))
+                   for column in MARKET_COLUMNS}
+
+        for spec in specs:
+            for part in ('train', 'test'):
+                lo, hi = spec[part]
+                path = spec[f'{part}_path']
+                tmp_path = f'{path}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    np.savez(f, timestamp=timestamps[lo:hi], **{name: values[lo:hi] for name, values in columns.items()})
+                os.replace(tmp_path, path)
+        return specs
+
+
+def load_fold(path: str) -> pd.DataFrame:
+    """Frame with the columns ``ArrayTradingEnv`` and ``BacktestEngine`` read"""
+    with np.load(path, allow_pickle=False) as data:
+        return pd.DataFrame({name: data[name] for name in ('timestamp',) + MARKET_COLUMNS})
+
+
+def _init_worker():
+    # One torch thread per process; the pool already uses every core
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+
+def _metrics(result: Dict) -> Dict:
+    if not result.get('success'):
+        return {'error': result.get('error', 'Simulation failed')}
+    return {key: result[key] for key in FOLD_METRICS}
+
+
+def _run_fold(spec: Dict) -> Dict:
+    """Train a fresh model on one fold's training window and backtest it on the test window"""
+    from stable_baselines3 import PPO, A2C
+
+    row = {'fold': spec['fold'], 'train_bars': spec['train'][1] - spec['train'][0],
+           'test_bars': spec['test'][1] - spec['test'][0]}
+    try:
+        train_df = load_fold(spec['train_path'])
+        test_df = load_fold(spec['test_path'])
+        row['test_start'] = str(pd.Timestamp(test_df['timestamp'].iloc[0]))
+        row['test_end'] = str(pd.Timestamp(test_df['timestamp'].iloc[-1]))
+
+        model_class = {'PPO': PPO, 'A2C': A2C}[spec['model_type']]
+        model = model_class('MlpPolicy', ArrayTradingEnv(train_df), seed=spec.get('seed'),
+                            verbose=0, **spec.get('hyperparameters', {}))
+        model.learn(total_timesteps=spec['timesteps'])
+
+        engine = BacktestEngine()
+        row['in_sample'] = _metrics(engine.run(model, train_df, spec['symbol']))
+        row['out_of_sample'] = _metrics(engine.run(model, test_df, spec['symbol']))
+        if 'error' in row['out_of_sample']:
+            row['error'] = row['out_of_sample']['error']
+        return row
+
+    except Exception as e:
+        row['error'] = str(e)
+        return row
+
+
+def aggregate_folds(rows: List[Dict]) -> Dict:
+    """Mean, std, min and max of each out-of-sample metric, plus compounded return"""
+    ok = [row['out_of_sample'] for row in rows if 'error' not in row]
+    summary = {'folds': len(rows), 'successful_folds': len(ok)}
+    if not ok:
+        return summary
+
+    for metric in FOLD_METRICS:
+        values = np.array([fold[metric] for fold in ok], dtype=float)
+        summary[metric] = {
+            'mean': float(values.mean()),
+            'std': float(values.std()),
+            'min': float(values.min()),
+            'max': float(values.max())
+        }
+
+    returns = np.array([fold['total_return_pct'] for fold in ok]) / 100.0
+    summary['compounded_return_pct'] = float((np.prod(1 + returns) - 1) * 100)
+    summary['profitable_folds_pct'] = float((returns > 0).mean() * 100)
+
+    in_sample = [row['in_sample']['total_return_pct'] for row in rows
+                 if 'error' not in row and 'error' not in row.get('in_sample', {})]
+    if in_sample:
+        # Large gaps between in-sample and out-of-sample returns point at overfitting
+        summary['in_sample_return_pct_mean'] = float(np.mean(in_sample))
+    return summary
+
+
+def run_walk_forward(specs: List[Dict], workers: int = None, on_progress: Callable[[int, int], None] = None,
+                     should_stop: Callable[[], None] = None) -> List[Dict]:
+    """Train and evaluate every fold in a process pool; rows come back in fold order"""
+    workers = max(1, min(workers or int(os.getenv('WALK_FORWARD_WORKERS', os.cpu_count() or 1)), len(specs)))
+    # Folds read their data from files, so nothing is inherited from this (threaded) process
+    context = pool_context(__name__)
+
+    rows = []
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker)
+    try:
+        pending = {executor.submit(_run_fold, spec) for spec in specs}
+        while pending:
+            done, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            rows.extend(future.result() for future in done)
+            if done and on_progress:
+                on_progress(len(rows), len(specs))
+            if should_stop:
+                should_stop()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return sorted(rows, key=lambda row: row['fold'])
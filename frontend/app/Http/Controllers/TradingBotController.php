@@ -318,6 +318,46 @@ public function logs(): JsonResponse
         }
     }
 
+    /**
+     * Proxy the backend's Server-Sent Event stream (status deltas, trading and training events)
+     */
+    public function events(Request $request)
+    {
+        $query = array_filter([
+            'channels' => $request->get('channels'),
+            'last_event_id' => $request->header('Last-Event-ID', $request->get('last_event_id'))
+        ], fn ($value) => $value !== null && $value !== '');
+
+        return response()->stream(function () use ($query) {
+            try {
+                $response = Http::withOptions(['stream' => true])
+                    ->timeout(0)
+                    ->get("{$this->backendUrl}/events", $query);
+
+                $body = $response->toPsrResponse()->getBody();
+                while (!$body->eof() && !connection_aborted()) {
+                    $chunk = $body->read(1024);
+                    if ($chunk === '') {
+                        continue;
+                    }
+                    echo $chunk;
+                    if (ob_get_level() > 0) {
+                        ob_flush();
+                    }
+                    flush();
+                }
+            } catch (Exception $e) {
+                Log::error('Error proxying event stream', ['error' => $e->getMessage()]);
+                echo "retry: 5000\n\n";
+                flush();
+            }
+        }, 200, [
+            'Content-Type' => 'text/event-stream',
+            'Cache-Control' => 'no-cache',
+            'X-Accel-Buffering' => 'no'
+        ]);
+    }
+
     /**
      * Health check for the backend
      */
@@ -398,13 +438,36 @@ public function stockInfo(Request $request, string $symbol): JsonResponse
         }
     }
 
+    /**
+     * Get information for several stocks at once
+     */
+    public function stocksInfo(Request $request): JsonResponse
+    {
+        try {
+            $response = Http::timeout(30)->get("{$this->backendUrl}/training/stocks-info", [
+                'symbols' => $request->get('symbols')
+            ]);
+            
+            if ($response->successful()) {
+                return response()->json($response->json());
+            }
+            
+            return response()->json(['error' => 'Failed to get stocks info'], $response->status());
+            
+        } catch (Exception $e) {
+            Log::error('Error getting stocks info', ['error' => $e->getMessage()]);
+            return response()->json(['error' => $e->getMessage()], 500);
+        }
+    }
+
     /**
      * Import historical data
      */
     public function importData(Request $request): JsonResponse
     {
         try {
-            $response = Http::timeout(60)->post("{$this->backendUrl}/training/import-data", $request->all());
+            // Long imports are checkpointed by chunk; a timed-out import resumes when called again
+            $response = Http::timeout(300)->post("{$this->backendUrl}/training/import-data", $request->all());
             
             if ($response->successful()) {
                 return response()->json($response->json());
@@ -458,6 +521,108 @@ public function simulation(Request $request): JsonResponse
         }
     }
 
+    /**
+     * Start a simulation sweep over symbols, saved models and date windows
+     */
+    public function simulationSweep(Request $request): JsonResponse
+    {
+        try {
+            $response = Http::timeout(30)->post("{$this->backendUrl}/training/simulation-sweep", $request->all());
+            
+            if ($response->successful()) {
+                return response()->json($response->json(), $response->status());
+            }
+            
+            return response()->json($response->json() ?? ['error' => 'Failed to start simulation sweep'], $response->status());
+            
+        } catch (Exception $e) {
+            Log::error('Error starting simulation sweep', ['error' => $e->getMessage()]);
+            return response()->json(['error' => $e->getMessage()], 500);
+        }
+    }
+
+    /**
+     * Start a walk-forward evaluation of a model type on a symbol
+     */
+    public function walkForward(Request $request): JsonResponse
+    {
+        try {
+            $response = Http::timeout(30)->post("{$this->backendUrl}/training/walk-forward", $request->all());
+            
+            if ($response->successful()) {
+                return response()->json($response->json(), $response->status());
+            }
+            
+            return response()->json($response->json() ?? ['error' => 'Failed to start walk-forward evaluation'], $response->status());
+            
+        } catch (Exception $e) {
+            Log::error('Error starting walk-forward evaluation', ['error' => $e->getMessage()]);
+            return response()->json(['error' => $e->getMessage()], 500);
+        }
+    }
+
+    /**
+     * Get a stored simulation result (downsampled chart, optional time window)
+     */
+    public function simulationResult(Request $request, string $simulationId): JsonResponse
+    {
+        try {
+            $response = Http::timeout(30)->get(
+                "{$this->backendUrl}/training/simulation/{$simulationId}",
+                $request->only(['points', 'start', 'end'])
+            );
+            
+            if ($response->successful()) {
+                return response()->json($response->json());
+            }
+            
+            return response()->json(['error' => 'Failed to get simulation'], $response->status());
+            
+        } catch (Exception $e) {
+            Log::error('Error getting simulation', ['error' => $e->getMessage()]);
+            return response()->json(['error' => $e->getMessage()], 500);
+        }
+    }
+
+    /**
+     * Get bootstrap confidence intervals for a stored simulation
+     */
+    public function simulationBootstrap(Request $request, string $simulationId): JsonResponse
+    {
+        try {
+            $response = Http::timeout(30)->get(
+                "{$this->backendUrl}/training/simulation/{$simulationId}/bootstrap",
+                $request->only(['resamples', 'block_size', 'confidence', 'seed'])
+            );
+            
+            if ($response->successful()) {
+                return response()->json($response->json());
+            }
+            
+            return response()->json($response->json() ?? ['error' => 'Failed to bootstrap simulation'], $response->status());
+            
+        } catch (Exception $e) {
+            Log::error('Error bootstrapping simulation', ['error' => $e->getMessage()]);
+            return response()->json(['error' => $e->getMessage()], 500);
+        }
+    }
+
+    /**
+     * Cancel a queued or running training job
+     */
+    public function cancelTraining(Request $request, string $trainingId): JsonResponse
+    {
+        try {
+            $response = Http::timeout(30)->post("{$this->backendUrl}/training/cancel/{$trainingId}");
+            
+            return response()->json($response->json(), $response->status());
+            
+        } catch (Exception $e) {
+            Log::error('Error cancelling training', ['error' => $e->getMessage()]);
+            return response()->json(['error' => $e->getMessage()], 500);
+        }
+    }
+
     /**
      * Get training status
      */
@@ -24,6 +24,7 @@
     Route::get('/status', [TradingBotController::class, 'status'])->name('bot.status');
     Route::get('/health', [TradingBotController::class, 'health'])->name('bot.health');
     Route::get('/logs', [TradingBotController::class, 'logs'])->name('bot.logs');
+    Route::get('/events', [TradingBotController::class, 'events'])->name('bot.events');
     Route::get('/evaluate/{symbol}', [TradingBotController::class, 'evaluate'])->name('bot.evaluate');
 });
 
@@ -54,6 +55,7 @@
 Route::prefix('training')->group(function () {
     Route::get('/search-stocks', [TradingBotController::class, 'searchStocks'])->name('training.search-stocks');
     Route::get('/stock-info/{symbol}', [TradingBotController::class, 'stockInfo'])->name('training.stock-info');
+    Route::get('/stocks-info', [TradingBotController::class, 'stocksInfo'])->name('training.stocks-info');
     Route::get('/status', [TradingBotController::class, 'trainingStatus'])->name('training.status');
     Route::get('/models', [TradingBotController::class, 'availableModels'])->name('training.models');
 });
@@ -62,7 +64,12 @@
 Route::middleware(['auth:sanctum,web'])->prefix('training')->group(function () {
     Route::post('/import-data', [TradingBotController::class, 'importData'])->name('training.import-data');
     Route::post('/train-model', [TradingBotController::class, 'trainModel'])->name('training.train-model');
+    Route::post('/cancel/{trainingId}', [TradingBotController::class, 'cancelTraining'])->name('training.cancel');
     Route::post('/simulation', [TradingBotController::class, 'simulation'])->name('training.simulation');
+    Route::post('/simulation-sweep', [TradingBotController::class, 'simulationSweep'])->name('training.simulation-sweep');
+    Route::post('/walk-forward', [TradingBotController::class, 'walkForward'])->name('training.walk-forward');
+    Route::get('/simulation/{simulationId}', [TradingBotController::class, 'simulationResult'])->name('training.simulation-result');
+    Route::get('/simulation/{simulationId}/bootstrap', [TradingBotController::class, 'simulationBootstrap'])->name('training.simulation-bootstrap');
     Route::post('/save-model', [TradingBotController::class, 'saveModel'])->name('training.save-model');
     Route::get('/saved-models', [TradingBotController::class, 'getSavedModels'])->name('training.saved-models');
 }); 
\ No newline at end of file